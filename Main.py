@@ -6,28 +6,64 @@
 
 import os
 import time
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 from Protein_Folding import Peptide
+from Protein_Folding.benchmarks import MAIN_PROTEINS
 from Protein_Folding.interactions.miyazawa_jernigan_interaction import MiyazawaJerniganInteraction
 from Protein_Folding.penalty_parameters import PenaltyParameters
 from Protein_Folding.protein_folding_problem import ProteinFoldingProblem
 from qiskit_ibm_runtime import QiskitRuntimeService
 from Qiskit_VQE import VQE5, StateCalculator
+from Qiskit_VQE.session import SessionManager
+
+# Transpiled ansatz circuits are shared by all proteins with the same qubit count and backend.
+TRANSPILE_CACHE_DIR = os.path.join("Result", "transpile_cache")
+# Optimized parameters of all proteins, used to warm start the VQE of similar proteins.
+PARAMETER_LIBRARY_DIR = os.path.join("Result", "parameter_library")
 
 def predict_protein_structure(
     main_chain_sequence: str,
     protein_id: str,
-    service: QiskitRuntimeService,
-    max_iter: int = 150
+    service: Optional[QiskitRuntimeService],
+    max_iter: int = 150,
+    backend=None,
+    estimator=None,
+    sampler=None,
+    resume: bool = False,
+    checkpoint_interval: int = 10,
+    cvar_alpha: Optional[float] = None,
+    warm_start: bool = True,
+    ansatz_factory=None,
+    shot_schedule=None,
+    stopping_rules=None,
+    session_manager: Optional[SessionManager] = None
 ):
     """
     Predicts a protein structure using a quantum VQE workflow and saves the results.
 
     :param main_chain_sequence: The main chain amino acid sequence (single-letter representation).
     :param protein_id: The identifier/name for the protein (used for output directories and files).
-    :param service: An instance of QiskitRuntimeService for submitting quantum jobs.
+    :param service: An instance of QiskitRuntimeService for submitting quantum jobs. It may be None if a
+                    backend or primitives are given.
     :param max_iter: Maximum iteration count for VQE optimization, default is 150.
+    :param backend: Optional local or remote BackendV2 to run on instead of the least busy backend.
+    :param estimator: Optional EstimatorV2 primitive for the VQE, e.g. a StatevectorEstimator for offline runs.
+    :param sampler: Optional SamplerV2 primitive for the measurements, e.g. a StatevectorSampler.
+    :param resume: If True, restarts the VQE of this protein from its last checkpoint, e.g. after a
+                   session expiry or a crash. A new run is started if there is no checkpoint.
+    :param checkpoint_interval: Number of VQE iterations between checkpoints.
+    :param cvar_alpha: If given, the VQE optimizes the CVaR of sampled energies at this alpha (e.g. 0.1)
+                       instead of the mean energy.
+    :param warm_start: If True, the VQE starts from the stored parameters of the most similar protein
+                       folded before with the same qubit count. The best parameters are stored either way.
+    :param ansatz_factory: Optional AnsatzFactory selecting the ansatz family and a two-qubit gate/depth budget.
+    :param shot_schedule: Optional ShotSchedule, e.g. an AdaptiveShotSchedule with a total shot budget, instead
+                          of a fixed number of shots per iteration. The shots consumed per iteration are saved.
+    :param stopping_rules: Optional list of StoppingRule callbacks, e.g. RelativeImprovement or TargetEnergy,
+                           that end the VQE before max_iter iterations.
+    :param session_manager: Optional SessionManager whose backend and session are kept alive across the VQE
+                            and the measurements of this and other proteins.
     """
     print(f"Starting prediction for protein: {protein_id}, sequence: {main_chain_sequence}")
 
@@ -46,25 +82,47 @@ def predict_protein_structure(
     qubit_count = hamiltonian.num_qubits + 5
     print(f"Number of qubits required: {qubit_count}")
 
-    # Initialize the VQE solver
+    # Initialize the VQE solver, checkpointing its progress next to the results
+    output_dir = os.path.join("Result", "process_data", "best_group", protein_id)
     vqe_instance = VQE5(
         service=service,
         hamiltonian=hamiltonian,
         min_qubit_num=qubit_count,
-        maxiter=max_iter
+        maxiter=max_iter,
+        backend=backend,
+        estimator=estimator,
+        sampler=sampler,
+        checkpoint_path=os.path.join(output_dir, "vqe_checkpoint.pkl"),
+        checkpoint_interval=checkpoint_interval,
+        transpile_cache_dir=TRANSPILE_CACHE_DIR,
+        history_log_path=os.path.join(output_dir, "vqe_history.bin"),
+        cvar_alpha=cvar_alpha,
+        parameter_library_dir=PARAMETER_LIBRARY_DIR,
+        sequence=main_chain_sequence,
+        warm_start=warm_start,
+        ansatz_factory=ansatz_factory,
+        shot_schedule=shot_schedule,
+        stopping_rules=stopping_rules,
+        session_manager=session_manager
     )
 
     # Run the VQE and obtain results
-    energy_list, final_result, ansatz, top_results = vqe_instance.run_vqe()
+    energy_list, final_result, ansatz, top_results = vqe_instance.run_vqe(resume=resume)
 
     # Save the energy list to a file
     output_energy_path = os.path.join("Result", "process_data", "best_group", protein_id, "System_Energy")
     os.makedirs(output_energy_path, exist_ok=True)
     with open(os.path.join(output_energy_path, f"energy_list_{protein_id}.txt"), 'w') as file:
         file.writelines(f"{energy}\n" for energy in energy_list)
+    with open(os.path.join(output_energy_path, f"shots_per_iteration_{protein_id}.txt"), 'w') as file:
+        file.writelines(f"{shots}\n" for shots in vqe_instance.shots_per_iteration)
+    print(f"Total shots consumed: {vqe_instance.total_shots}")
 
     # Calculate and save the probability distribution
-    state_calculator = StateCalculator(service, qubit_count, ansatz)
+    state_calculator = StateCalculator(
+        service, qubit_count, ansatz, backend=backend, sampler=sampler, transpile_cache_dir=TRANSPILE_CACHE_DIR,
+        session_manager=session_manager
+    )
     probability_distribution = state_calculator.get_probability_distribution(final_result)
 
     output_prob_path = os.path.join("Result", "process_data", "best_group", protein_id, "Prob_distribution")
@@ -75,7 +133,6 @@ def predict_protein_structure(
 
     # Interpret the probability distribution and save the predicted structure
     protein_result = protein_folding_problem.interpret(probability_distribution)
-    output_dir = os.path.join("Result", "process_data", "best_group", protein_id)
     protein_result.save_xyz_file(name=protein_id, path=output_dir)
     print("Protein structure saved as .xyz file")
 
@@ -103,19 +160,12 @@ def main():
     )
 
     # List of proteins to process
-    protein_list: List[Tuple[str, str]] = [
-        ("DGKMKGLAF", "1qin"),
-        ("IHGIGGFI", "1a9m"),
-        ("KSIVDSGTTNLR", "1fkn"),
-        ("NNLGTIAKSGT", "3b26"),
-        ("GAVEDGATMTFF", "2xxx"),
-        ("DWGGM", "3ans"),
-        ("YAGYS", "6mu3")
-    ]
-
-    # Log execution times for each protein
+    protein_list: List[Tuple[str, str]] = list(MAIN_PROTEINS)
+
+    # Log execution times for each protein; all proteins share one backend and session,
+    # which is renewed when it expires
     log_file_path = "execution_time_log.txt"
-    with open(log_file_path, 'w') as log_file:
+    with open(log_file_path, 'w') as log_file, SessionManager(service) as session_manager:
         log_file.write("Protein_ID\tExecution_Time(s)\n")
 
         for sequence, protein_name in protein_list:
@@ -125,7 +175,8 @@ def main():
                 main_chain_sequence=sequence,
                 protein_id=protein_name,
                 service=service,
-                max_iter=150
+                max_iter=150,
+                session_manager=session_manager
             )
 
             execution_time = time.time() - start_time
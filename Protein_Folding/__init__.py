@@ -1,6 +1,7 @@
 from .exceptions.invalid_residue_exception import InvalidResidueException
 from .exceptions.invalid_side_chain_exception import InvalidSideChainException
 from .exceptions.invalid_size_exception import InvalidSizeException
+from .exceptions.memory_budget_exception import MemoryBudgetException
 from .interactions.interaction import Interaction
 from .interactions.mixed_interaction import MixedInteraction
 from .interactions.miyazawa_jernigan_interaction import MiyazawaJerniganInteraction
@@ -24,4 +25,5 @@ __all__ = [
     "InvalidResidueException",
     "InvalidSideChainException",
     "InvalidSizeException",
+    "MemoryBudgetException",
 ]
\ No newline at end of file
@@ -4,12 +4,14 @@
 # You may obtain a copy of this license at http://www.apache.org/licenses/LICENSE-2.0.
 
 """A class that stores distances between beads of a peptide as qubit operators."""
+import functools
 from typing import Union, Tuple, DefaultDict, Dict
 import numpy as np
 
 from qiskit.quantum_info import Operator, Pauli, SparsePauliOp
 
 from .distance_map_builder import DistanceMapBuilder
+from .operator_dag import ExpressionNode, OperatorDag
 from ..peptide.beads.base_bead import BaseBead
 from ..peptide.pauli_ops_builder import _build_full_identity #mark
 from ..peptide.Peptide import Peptide
@@ -17,7 +19,9 @@ from ..qubit_utils.qubit_fixing import _fix_qubits
 
 
 class DistanceMap:
-    """Stores distances between beads of a peptide as qubit operators."""
+    """Stores distances between beads of a peptide as qubit operators. Distances and the neighbor
+    interactions built from them are kept in a hash-consed :class:`OperatorDag` and expanded into
+    operators lazily, the first time they are requested."""
 
     def __init__(self, peptide: Peptide):
         """
@@ -25,14 +29,16 @@ class DistanceMap:
             peptide: A Peptide object that includes all information about a protein.
         """
         self._peptide = peptide
+        self._num_qubits = peptide.get_main_chain[0].turn_qubits[0].num_qubits
+        self._dag = OperatorDag(finalize=_fix_qubits)
         (
             self._distance_map,
             self._num_distances,
-        ) = DistanceMapBuilder().create_distance_qubits(peptide)
+        ) = DistanceMapBuilder(self._dag).create_distance_qubits(peptide)
 
     def __getitem__(self, position: Tuple[BaseBead, BaseBead]) -> Operator:
         item1, item2 = position
-        return self._distance_map[item1][item2]
+        return self._distance_map[item1][item2].evaluate()
 
     @property
     def peptide(self) -> Peptide:
@@ -40,8 +46,9 @@ class DistanceMap:
         return self._peptide
 
     @property
-    def distance_map(self) -> DefaultDict[BaseBead, Dict[BaseBead, Operator]]:
-        """Returns a distance map."""
+    def distance_map(self) -> DefaultDict[BaseBead, Dict[BaseBead, ExpressionNode]]:
+        """Returns a distance map of expression nodes. Call ``evaluate()`` on a node, or index the
+        :class:`DistanceMap` directly, to obtain a qubit operator."""
         return self._distance_map
 
     @property
@@ -49,6 +56,13 @@ class DistanceMap:
         """Returns the number of distances calculated."""
         return self._num_distances
 
+    @property
+    def expression_stats(self) -> Dict[str, int]:
+        """Returns counters of the underlying expression DAG. Comparing
+        ``multiplications_requested`` with ``multiplications`` gives the number of operator
+        multiplications saved by sharing sub-expressions and by lazy expansion."""
+        return self._dag.stats
+
     def first_neighbor(
         self,
         peptide: Peptide,
@@ -93,10 +107,15 @@ class DistanceMap:
             is_side_chain_lower
         ]
         x = self.distance_map[lower_bead][upper_bead]
-        expression = lambda_0 * (
-            x - _build_full_identity(x.num_qubits)
-        ) + pair_energies_multiplier * energy * _build_full_identity(x.num_qubits)
-        return _fix_qubits(expression)
+        full_id = self._full_identity()
+        expression = self._dag.linear_combination(
+            [
+                (lambda_0, x),
+                (-lambda_0, full_id),
+                (pair_energies_multiplier * energy, full_id),
+            ]
+        )
+        return expression.evaluate()
 
     def second_neighbor(
         self,
@@ -139,7 +158,20 @@ class DistanceMap:
         if is_side_chain_upper == 1:
             upper_bead = upper_bead.side_chain[0]
         x = self.distance_map[lower_bead][upper_bead]
-        expression = lambda_1 * (
-            2 * (_build_full_identity(x.num_qubits)) - x
-        ) + pair_energies_multiplier * energy * _build_full_identity(x.num_qubits)
-        return _fix_qubits(expression)
+        full_id = self._full_identity()
+        expression = self._dag.linear_combination(
+            [
+                (2 * lambda_1, full_id),
+                (-lambda_1, x),
+                (pair_energies_multiplier * energy, full_id),
+            ]
+        )
+        return expression.evaluate()
+
+    def _full_identity(self) -> ExpressionNode:
+        """Returns a shared DAG leaf for the full identity on the turn qubits of the peptide. The
+        qubit count is taken from the peptide rather than from a distance, which may be zero."""
+        return self._dag.leaf(
+            ("identity", self._num_qubits),
+            functools.partial(_build_full_identity, self._num_qubits),
+        )
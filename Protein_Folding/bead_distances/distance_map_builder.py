@@ -5,11 +5,11 @@
 
 """Builds a distance map that stores distances between beads in a peptide."""
 import collections
+import functools
 import logging
-from typing import Dict, DefaultDict, Tuple, Union, List
-
-from qiskit.quantum_info import Operator, Pauli, SparsePauliOp
+from typing import Dict, DefaultDict, Optional, Tuple, Union, List
 
+from .operator_dag import ExpressionNode, OperatorDag
 from ..peptide.beads.base_bead import BaseBead
 from ..peptide.beads.main_bead import MainBead
 from ..peptide.beads.side_bead import SideBead
@@ -25,14 +25,25 @@ class DistanceMapBuilder:
     Distance Map Builder.
     """
 
-    def __init__(self):
+    def __init__(self, dag: Optional[OperatorDag] = None):
+        """
+        Args:
+            dag: An expression DAG in which distances are built. Distances are hash-consed, so
+                 shared sub-expressions are computed once and only when an operator is requested.
+        """
+        self._dag = dag if dag is not None else OperatorDag(finalize=_fix_qubits)
         self._distance_map_axes = self._init_dicts()
         self.num_distances = 0
 
+    @property
+    def dag(self) -> OperatorDag:
+        """Returns the expression DAG in which distances are built."""
+        return self._dag
+
     def create_distance_qubits(
         self,
         peptide: Peptide,
-    ) -> Tuple[DefaultDict[BaseBead, Dict[BaseBead, Operator]], int]:
+    ) -> Tuple[DefaultDict[BaseBead, Dict[BaseBead, ExpressionNode]], int]:
         """
         Creates total distances between all bead pairs by summing the
         distances over all turns with axes, a = 0,1,2,3.
@@ -42,14 +53,14 @@ class DistanceMapBuilder:
 
         Returns:
             Tuple of beads-indexed dictionary that stores distances between beads of a peptide as
-            qubit operators and the number of distances calculated.
+            lazily evaluated expression nodes and the number of distances calculated.
         """
         self._calc_distances_main_chain(peptide) #####
         self._add_distances_side_chain(peptide)
         main_chain_len = len(peptide.get_main_chain)
 
         distance_map: DefaultDict[
-            BaseBead, Dict[BaseBead, Operator]
+            BaseBead, Dict[BaseBead, ExpressionNode]
         ] = collections.defaultdict(dict)
 
         for lower_bead_ind in range(1, main_chain_len):  # upper_bead_ind>lower_bead_ind
@@ -65,28 +76,28 @@ class DistanceMapBuilder:
                     lower_main_bead,
                     upper_main_bead,
                 )
-                if distance_map[lower_main_bead][upper_main_bead] != 0:
+                if distance_map[lower_main_bead][upper_main_bead] is not self._dag.zero:
                     self.num_distances += 1
 
                 distance_map[lower_side_bead][upper_main_bead] = self._calc_distance(
                     lower_side_bead,
                     upper_main_bead,
                 )
-                if distance_map[lower_side_bead][upper_main_bead] != 0:
+                if distance_map[lower_side_bead][upper_main_bead] is not self._dag.zero:
                     self.num_distances += 1
 
                 distance_map[lower_main_bead][upper_side_bead] = self._calc_distance(
                     lower_main_bead,
                     upper_side_bead,
                 )
-                if distance_map[lower_main_bead][upper_side_bead] != 0:
+                if distance_map[lower_main_bead][upper_side_bead] is not self._dag.zero:
                     self.num_distances += 1
 
                 distance_map[lower_side_bead][upper_side_bead] = self._calc_distance(
                     lower_side_bead,
                     upper_side_bead,
                 )
-                if distance_map[lower_side_bead][upper_side_bead] != 0:
+                if distance_map[lower_side_bead][upper_side_bead] is not self._dag.zero:
                     self.num_distances += 1
 
         logger.info(self.num_distances, " distances created")
@@ -96,11 +107,11 @@ class DistanceMapBuilder:
         self,
         lower_bead: BaseBead,
         upper_bead: BaseBead,
-    ) -> Union[SparsePauliOp, Pauli]:
-        distance = 0
-        for dist_map_ax in self._distance_map_axes:
-            distance += dist_map_ax[lower_bead][upper_bead] ** 2
-        return _fix_qubits(distance)
+    ) -> ExpressionNode:
+        return self._dag.linear_combination(
+            (1, self._dag.square(dist_map_ax[lower_bead][upper_bead], finalize=False))
+            for dist_map_ax in self._distance_map_axes
+        )
 
     def _calc_distances_main_chain(self, peptide: Peptide) -> None:
         r"""
@@ -111,39 +122,49 @@ class DistanceMapBuilder:
         distance_map_axis_a :math:`= \sum_k (-1)^k*indica(k)` where :math:`k` iterates from
         lower_bead_ind to upper_bead_ind - 1.
 
+        The raw sum up to upper_bead_ind extends the raw sum up to the preceding upper bead by one
+        indicator leaf, and only the resulting distance is finalized.
+
         Args:
             peptide: A Peptide object that includes all information about a protein.
         """
         main_chain_len = len(peptide.get_main_chain)
 
         for lower_bead_ind in range(1, main_chain_len):
+            lower_main_bead = peptide.get_main_chain[lower_bead_ind - 1]
+            axis_sums = [self._dag.zero] * len(self._distance_map_axes)
             for upper_bead_ind in range(lower_bead_ind + 1, main_chain_len + 1):
-                lower_main_bead = peptide.get_main_chain[lower_bead_ind - 1]
                 upper_main_bead = peptide.get_main_chain[upper_bead_ind - 1]
-
-                for k in range(lower_bead_ind, upper_bead_ind):
-                    indic_funs = peptide.get_main_chain[k - 1].indicator_functions
-                    for dist_map_ax, indic_fun_x in zip(
-                        self._distance_map_axes, indic_funs
-                    ):
-                        dist_map_ax[lower_main_bead][upper_main_bead] += (
-                            -1
-                        ) ** k * indic_fun_x
-
-                for dist_map_ax in self._distance_map_axes:
-                    dist_map_ax[lower_main_bead][upper_main_bead] = _fix_qubits( ####
-                        dist_map_ax[lower_main_bead][upper_main_bead]
+                k = upper_bead_ind - 1
+                indic_leaves = self._get_indicator_leaves(peptide.get_main_chain[k - 1])
+                axis_sums = [
+                    self._dag.linear_combination(
+                        [(1, axis_sum), ((-1) ** k, indic_leaf)], finalize=False
                     )
+                    for axis_sum, indic_leaf in zip(axis_sums, indic_leaves)
+                ]
+                for dist_map_ax, axis_sum in zip(self._distance_map_axes, axis_sums):
+                    dist_map_ax[lower_main_bead][upper_main_bead] = self._dag.finalized(axis_sum)
 
-    @staticmethod
-    def _init_dicts():
+    def _init_dicts(self):
         return [
-            collections.defaultdict(lambda: collections.defaultdict(int)),
-            collections.defaultdict(lambda: collections.defaultdict(int)),
-            collections.defaultdict(lambda: collections.defaultdict(int)),
-            collections.defaultdict(lambda: collections.defaultdict(int)),
+            collections.defaultdict(lambda: collections.defaultdict(lambda: self._dag.zero))
+            for _ in range(4)
         ]
 
+    def _get_indicator_leaves(
+        self, bead: BaseBead
+    ) -> Tuple[ExpressionNode, ExpressionNode, ExpressionNode, ExpressionNode]:
+        """Returns the turn indicator functions of a bead as DAG leaves, so that each is built once
+        per bead rather than once per bead pair."""
+        return tuple(
+            self._dag.leaf(
+                ("indicator", bead, turn_index),
+                functools.partial(bead.get_turn_indicator_function, turn_index),
+            )
+            for turn_index in range(4)
+        )
+
     def _add_distances_side_chain(self, peptide: Peptide) -> None:
         """
         Calculates distances between beads located on side chains and adds the contribution to the
@@ -210,16 +231,15 @@ class DistanceMapBuilder:
             side_bead = None
         return main_bead, side_bead
 
-    @staticmethod
     def _get_indicator_funs(
-        peptide: Peptide, side_chain: List[bool], bead_ind: int
+        self, peptide: Peptide, side_chain: List[bool], bead_ind: int
     ) -> Union[
         Tuple[None, None, None, None],
-        Tuple[Operator, Operator, Operator, Operator],
+        Tuple[ExpressionNode, ExpressionNode, ExpressionNode, ExpressionNode],
     ]:
         if side_chain[bead_ind - 1]:
-            indic_0, indic_1, indic_2, indic_3 = (
-                peptide.get_main_chain[bead_ind - 1].side_chain[0].indicator_functions
+            indic_0, indic_1, indic_2, indic_3 = self._get_indicator_leaves(
+                peptide.get_main_chain[bead_ind - 1].side_chain[0]
             )
         else:
             indic_0, indic_1, indic_2, indic_3 = None, None, None, None
@@ -230,10 +250,10 @@ class DistanceMapBuilder:
         peptide: Peptide,
         lower_bead_ind: int,
         lower_side_bead: BaseBead,
-        lower_indic_funs: Tuple[Operator, Operator, Operator, Operator],
+        lower_indic_funs: Tuple[ExpressionNode, ExpressionNode, ExpressionNode, ExpressionNode],
         upper_bead_ind: int,
         upper_side_bead: BaseBead,
-        upper_indic_funs: Tuple[Operator, Operator, Operator, Operator],
+        upper_indic_funs: Tuple[ExpressionNode, ExpressionNode, ExpressionNode, ExpressionNode],
     ) -> None:
         for dist_map_ax, lower_indic_fun_x, upper_indic_fun_x in zip(
             self._distance_map_axes, lower_indic_funs, upper_indic_funs
@@ -254,7 +274,7 @@ class DistanceMapBuilder:
         lower_side_bead: BaseBead,
         upper_bead_ind: int,
         upper_main_bead: BaseBead,
-        indic_funs: Tuple[Operator, Operator, Operator, Operator],
+        indic_funs: Tuple[ExpressionNode, ExpressionNode, ExpressionNode, ExpressionNode],
     ) -> None:
         for dist_map_ax, indic_fun_x in zip(self._distance_map_axes, indic_funs):
             dist_map_ax[lower_side_bead][upper_main_bead] = self._calc_distance_term(
@@ -268,7 +288,7 @@ class DistanceMapBuilder:
         lower_bead: BaseBead,
         upper_bead_ind: int,
         upper_bead: BaseBead,
-        indic_funs: Tuple[Operator, Operator, Operator, Operator],
+        indic_funs: Tuple[ExpressionNode, ExpressionNode, ExpressionNode, ExpressionNode],
     ) -> None:
         for dist_map_ax, indic_fun_x in zip(self._distance_map_axes, indic_funs):
             dist_map_ax[lower_bead][upper_bead] = self._calc_distance_term(
@@ -278,18 +298,18 @@ class DistanceMapBuilder:
     def _calc_distance_term(
         self,
         peptide: Peptide,
-        distance_map_axis_x: Dict[BaseBead, Operator],
+        distance_map_axis_x: Dict[BaseBead, ExpressionNode],
         lower_bead_ind: int,
-        lower_indic_fun: Operator,
+        lower_indic_fun: ExpressionNode,
         upper_bead_ind: int,
-        upper_indic_fun: Operator,
-    ) -> Union[SparsePauliOp, Pauli]:
+        upper_indic_fun: ExpressionNode,
+    ) -> ExpressionNode:
         lower_main_bead = peptide.get_main_chain[lower_bead_ind - 1]
         upper_main_bead = peptide.get_main_chain[upper_bead_ind - 1]
-        result = distance_map_axis_x[lower_main_bead][upper_main_bead]
+        terms = [(1, distance_map_axis_x[lower_main_bead][upper_main_bead])]
         if lower_indic_fun is not None:
-            result -= (-1) ** lower_bead_ind * lower_indic_fun
+            terms.append((-((-1) ** lower_bead_ind), lower_indic_fun))
         if upper_indic_fun is not None:
-            result += (-1) ** upper_bead_ind * upper_indic_fun
+            terms.append(((-1) ** upper_bead_ind, upper_indic_fun))
 
-        return _fix_qubits(result)
+        return self._dag.linear_combination(terms)
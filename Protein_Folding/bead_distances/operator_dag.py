@@ -0,0 +1,200 @@
+# This code is licensed under the Apache License, Version 2.0.
+# You may obtain a copy of this license at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""A hash-consed DAG of qubit operator expressions that are expanded lazily."""
+import collections
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+_UNSET = object()
+
+
+class ExpressionNode:
+    """A node of an :class:`OperatorDag`. The operator it represents is computed on the first call
+    of :meth:`evaluate` and cached afterwards."""
+
+    __slots__ = ("node_id", "kind", "_compute", "_value")
+
+    def __init__(self, node_id: int, kind: str, compute: Callable[[], Any]):
+        """
+        Args:
+            node_id: Unique id of the node within its DAG.
+            kind: Type of the node, either "zero", "leaf", "sum" or "product".
+            compute: A callable that builds the operator represented by the node.
+        """
+        self.node_id = node_id
+        self.kind = kind
+        self._compute = compute
+        self._value = _UNSET
+
+    @property
+    def is_evaluated(self) -> bool:
+        """Returns True if the operator of the node has already been computed."""
+        return self._value is not _UNSET
+
+    def evaluate(self) -> Any:
+        """Returns the operator represented by the node, computing it if necessary."""
+        if self._value is _UNSET:
+            self._value = self._compute()
+            self._compute = None
+        return self._value
+
+
+class OperatorDag:
+    """Stores expressions built from qubit operators as a directed acyclic graph. Structurally equal
+    expressions are hash-consed into a single node, so that every distinct sub-expression is
+    computed and simplified at most once, and only when its value is actually requested. Sums are
+    kept as linear combinations of child nodes in the order of their terms, since the term order of
+    the resulting operator matters to the finalize function, and products are treated as
+    commutative, which holds for the diagonal operators used throughout the protein folding
+    problem."""
+
+    def __init__(self, finalize: Optional[Callable[[Any], Any]] = None):
+        """
+        Args:
+            finalize: A function applied once to the value of every sum and product node built with
+                      ``finalize=True``, e.g. fixing qubits and simplifying the resulting operator.
+        """
+        self._finalize = finalize if finalize is not None else (lambda operator: operator)
+        self._nodes: Dict[Hashable, ExpressionNode] = {}
+        self._stats: collections.Counter = collections.Counter()
+        self.zero = self._intern(("zero",), "zero", lambda: 0)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Returns counters of the DAG: the number of nodes, cache hits, requested and performed
+        operator multiplications and performed operator additions."""
+        stats = dict(self._stats)
+        stats["nodes"] = len(self._nodes)
+        return stats
+
+    def leaf(self, key: Hashable, factory: Callable[[], Any]) -> ExpressionNode:
+        """
+        Returns a node for an operator that is not built from other nodes.
+
+        Args:
+            key: A hashable key that uniquely identifies the operator.
+            factory: A callable that builds the operator when it is first needed.
+
+        Returns:
+            A leaf node.
+        """
+        return self._intern(("leaf", key), "leaf", self._counted(factory, "leaves"))
+
+    def linear_combination(
+        self, terms: Iterable[Tuple[float, ExpressionNode]], finalize: bool = True
+    ) -> ExpressionNode:
+        """
+        Returns a node for a linear combination of nodes. Coefficients of repeated nodes are
+        merged into their first occurrence and terms with zero coefficients are dropped.
+
+        Args:
+            terms: Pairs of a coefficient and a node.
+            finalize: If True, the finalize function is applied to the sum. Raw sums are meant
+                      to be extended further, e.g. as prefix sums, and finalized once with
+                      :meth:`finalized`.
+
+        Returns:
+            A node representing the sum of all terms.
+        """
+        merged: Dict[int, list] = {}
+        for coeff, node in terms:
+            if node is self.zero or coeff == 0:
+                continue
+            if node.node_id in merged:
+                merged[node.node_id][0] += coeff
+            else:
+                merged[node.node_id] = [coeff, node]
+        ordered = tuple(
+            (node_id, coeff, node) for node_id, (coeff, node) in merged.items() if coeff != 0
+        )
+        if not ordered:
+            return self.zero
+        if len(ordered) == 1 and ordered[0][1] == 1 and not finalize:
+            return ordered[0][2]
+        key = ("sum", finalize, tuple((node_id, coeff) for node_id, coeff, _ in ordered))
+        summands = [(coeff, node) for _, coeff, node in ordered]
+        if finalize:
+            return self._intern(key, "sum", lambda: self._finalize(self._sum(summands)))
+        return self._intern(key, "sum", lambda: self._sum(summands))
+
+    def product(
+        self, first: ExpressionNode, second: ExpressionNode, finalize: bool = True
+    ) -> ExpressionNode:
+        """
+        Returns a node for the product of two nodes.
+
+        Args:
+            first: A node of the first factor.
+            second: A node of the second factor.
+            finalize: If True, the finalize function is applied to the product.
+
+        Returns:
+            A node representing the product of both factors.
+        """
+        if first is self.zero or second is self.zero:
+            return self.zero
+        self._stats["multiplications_requested"] += 1
+        if second.node_id < first.node_id:
+            first, second = second, first
+        key = ("product", finalize, first.node_id, second.node_id)
+        if finalize:
+            return self._intern(
+                key, "product", lambda: self._finalize(self._multiply(first, second))
+            )
+        return self._intern(key, "product", lambda: self._multiply(first, second))
+
+    def square(self, node: ExpressionNode, finalize: bool = True) -> ExpressionNode:
+        """Returns a node for the square of a node."""
+        return self.product(node, node, finalize)
+
+    def finalized(self, node: ExpressionNode) -> ExpressionNode:
+        """
+        Returns a node for the finalized value of a raw node, i.e. one built with
+        ``finalize=False`` or a leaf.
+
+        Args:
+            node: A raw node.
+
+        Returns:
+            A node representing the finalized operator.
+        """
+        if node is self.zero:
+            return self.zero
+        return self._intern(
+            ("finalized", node.node_id), "sum", lambda: self._finalize(node.evaluate())
+        )
+
+    def _intern(
+        self, key: Hashable, kind: str, compute: Callable[[], Any]
+    ) -> ExpressionNode:
+        node = self._nodes.get(key)
+        if node is not None:
+            self._stats["hits"] += 1
+            return node
+        self._stats["misses"] += 1
+        node = ExpressionNode(len(self._nodes), kind, compute)
+        self._nodes[key] = node
+        return node
+
+    def _counted(self, factory: Callable[[], Any], counter: str) -> Callable[[], Any]:
+        def compute():
+            self._stats[counter] += 1
+            return factory()
+
+        return compute
+
+    def _sum(self, terms):
+        total = None
+        for coeff, node in terms:
+            operator = node.evaluate()
+            term = operator if coeff == 1 else coeff * operator
+            if total is None:
+                total = term
+            else:
+                total = total + term
+                self._stats["additions"] += 1
+        return total
+
+    def _multiply(self, first: ExpressionNode, second: ExpressionNode):
+        self._stats["multiplications"] += 1
+        return first.evaluate() @ second.evaluate()
@@ -0,0 +1,22 @@
+# This code is licensed under the Apache License, Version 2.0.
+# You may obtain a copy of this license at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+from .benchmark_harness import BenchmarkHarness, BenchmarkRecord
+from .benchmark_set import (
+    MAIN_PROTEINS,
+    BenchmarkInstance,
+    generate_benchmark_set,
+    load_benchmark_set,
+    verify_hamiltonians,
+)
+
+__all__ = [
+    "MAIN_PROTEINS",
+    "BenchmarkHarness",
+    "BenchmarkInstance",
+    "BenchmarkRecord",
+    "generate_benchmark_set",
+    "load_benchmark_set",
+    "verify_hamiltonians",
+]
@@ -0,0 +1,198 @@
+# This code is licensed under the Apache License, Version 2.0.
+# You may obtain a copy of this license at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""Measures optimality gaps and time-to-solution of solvers on a benchmark set."""
+import math
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from ..qubit_utils.diagonal_energy import DiagonalEnergyEvaluator
+from .benchmark_set import BenchmarkInstance
+
+# A solver receives an instance and returns bitstrings measured on its compressed Hamiltonian,
+# either as counts (e.g. from StateCalculator) or as an iterable of bitstrings.
+Solver = Callable[[BenchmarkInstance], Union[Dict[str, float], Iterable[str]]]
+
+
+class BenchmarkRecord:
+    """Results of repeated runs of a solver on one benchmark instance."""
+
+    def __init__(
+        self,
+        solver_name: str,
+        instance: BenchmarkInstance,
+        best_energies: List[float],
+        run_times: List[float],
+        tolerance: float,
+        target_probability: float,
+    ):
+        """
+        Args:
+            solver_name: Name of the solver.
+            instance: The solved instance.
+            best_energies: Lowest energy returned by every run.
+            run_times: Wall-clock time of every run in seconds.
+            tolerance: Absolute energy tolerance within which a run counts as successful.
+            target_probability: Target success probability of the time-to-solution.
+        """
+        self.solver_name = solver_name
+        self.instance_id = instance.instance_id
+        self.reference_energy = instance.reference_energy
+        self.best_energies = best_energies
+        self.run_times = run_times
+        self.tolerance = tolerance
+        self.target_probability = target_probability
+
+    @property
+    def best_energy(self) -> float:
+        """Returns the lowest energy over all runs."""
+        return min(self.best_energies)
+
+    @property
+    def optimality_gap(self) -> float:
+        """Returns the difference between the lowest energy found and the reference energy. It is
+        negative if a solver beats a best known reference."""
+        return self.best_energy - self.reference_energy
+
+    @property
+    def relative_gap(self) -> float:
+        """Returns the optimality gap relative to the magnitude of the reference energy."""
+        return self.optimality_gap / max(abs(self.reference_energy), 1e-12)
+
+    @property
+    def success_probability(self) -> float:
+        """Returns the fraction of runs that reached the reference energy within the tolerance."""
+        successes = [
+            energy <= self.reference_energy + self.tolerance for energy in self.best_energies
+        ]
+        return sum(successes) / len(successes)
+
+    @property
+    def mean_run_time(self) -> float:
+        """Returns the mean wall-clock time of a run in seconds."""
+        return float(np.mean(self.run_times))
+
+    @property
+    def time_to_solution(self) -> float:
+        """Returns the expected time in seconds to reach the reference energy at least once with
+        the target probability, t * log(1 - target) / log(1 - p) for runs of mean time t and
+        success probability p. It is infinite if no run succeeded."""
+        success_probability = self.success_probability
+        if success_probability == 0:
+            return math.inf
+        if success_probability == 1:
+            return self.mean_run_time
+        return self.mean_run_time * max(
+            1.0,
+            math.log(1 - self.target_probability) / math.log(1 - success_probability),
+        )
+
+    def as_dict(self) -> Dict[str, Union[str, float]]:
+        """Returns the summary of the record as a dictionary."""
+        return {
+            "solver": self.solver_name,
+            "instance_id": self.instance_id,
+            "reference_energy": self.reference_energy,
+            "best_energy": self.best_energy,
+            "optimality_gap": self.optimality_gap,
+            "relative_gap": self.relative_gap,
+            "success_probability": self.success_probability,
+            "mean_run_time": self.mean_run_time,
+            "time_to_solution": self.time_to_solution,
+        }
+
+
+class BenchmarkHarness:
+    """Runs solvers on the instances of a benchmark set. The energies of the returned bitstrings
+    are evaluated on the stored compressed Hamiltonians, so every solver is scored the same
+    way."""
+
+    def __init__(
+        self,
+        instances: List[BenchmarkInstance],
+        repetitions: int = 1,
+        tolerance: float = 1e-6,
+        target_probability: float = 0.99,
+    ):
+        """
+        Args:
+            instances: Instances of the benchmark set, e.g. from
+                       :func:`~Protein_Folding.benchmarks.load_benchmark_set`.
+            repetitions: Number of runs of a solver on every instance.
+            tolerance: Absolute energy tolerance within which a run counts as successful.
+            target_probability: Target success probability of the time-to-solution.
+        """
+        self._instances = instances
+        self._repetitions = repetitions
+        self._tolerance = tolerance
+        self._target_probability = target_probability
+        self._evaluators: Dict[str, DiagonalEnergyEvaluator] = {}
+        self.records: List[BenchmarkRecord] = []
+
+    def run(
+        self, solver: Solver, solver_name: str, instance_ids: Optional[Iterable[str]] = None
+    ) -> List[BenchmarkRecord]:
+        """
+        Runs a solver on the benchmark set.
+
+        Args:
+            solver: A callable that receives a
+                    :class:`~Protein_Folding.benchmarks.BenchmarkInstance` and returns bitstrings
+                    measured on its compressed Hamiltonian, as counts or as an iterable.
+            solver_name: Name of the solver in the records.
+            instance_ids: Identifiers of the instances to run. All instances by default.
+
+        Returns:
+            One record per instance, also appended to :attr:`records`.
+        """
+        selected = set(instance_ids) if instance_ids is not None else None
+        records = []
+        for instance in self._instances:
+            if selected is not None and instance.instance_id not in selected:
+                continue
+            evaluator = self._evaluator(instance)
+            best_energies, run_times = [], []
+            for _ in range(self._repetitions):
+                start = time.perf_counter()
+                bitstrings = solver(instance)
+                run_times.append(time.perf_counter() - start)
+                if not isinstance(bitstrings, dict):
+                    bitstrings = list(bitstrings)
+                best_energies.append(float(np.min(evaluator.energies(bitstrings))))
+            record = BenchmarkRecord(
+                solver_name,
+                instance,
+                best_energies,
+                run_times,
+                self._tolerance,
+                self._target_probability,
+            )
+            print(
+                f"{solver_name} on {instance.instance_id}: gap {record.optimality_gap:.6f}, "
+                f"time to solution {record.time_to_solution:.2f} s"
+            )
+            records.append(record)
+        self.records.extend(records)
+        return records
+
+    def save_report(self, file_path: str) -> None:
+        """
+        Writes all records to a tab-separated file.
+
+        Args:
+            file_path: Path of the report.
+        """
+        rows = [record.as_dict() for record in self.records]
+        with open(file_path, "w") as file:
+            if not rows:
+                return
+            file.write("\t".join(rows[0]) + "\n")
+            for row in rows:
+                file.write("\t".join(str(value) for value in row.values()) + "\n")
+
+    def _evaluator(self, instance: BenchmarkInstance) -> DiagonalEnergyEvaluator:
+        if instance.instance_id not in self._evaluators:
+            self._evaluators[instance.instance_id] = DiagonalEnergyEvaluator(instance.hamiltonian)
+        return self._evaluators[instance.instance_id]
@@ -0,0 +1,278 @@
+# This code is licensed under the Apache License, Version 2.0.
+# You may obtain a copy of this license at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""A corpus of protein folding instances with reference ground states."""
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from qiskit.quantum_info import PauliList, SparsePauliOp
+
+from ..classical_solvers.exact_solver import ExactFoldingSolver
+from ..classical_solvers.parallel_tempering import ParallelTemperingSolver
+from ..classical_solvers.pull_move_solver import PullMoveSolver
+from ..interactions.miyazawa_jernigan_interaction import MiyazawaJerniganInteraction
+from ..interactions.random_interaction import RandomInteraction
+from ..penalty_parameters import PenaltyParameters
+from ..peptide.Peptide import Peptide
+from ..protein_folding_problem import ProteinFoldingProblem
+
+# Proteins folded by Main.py, as (main chain sequence, protein id).
+MAIN_PROTEINS: List[Tuple[str, str]] = [
+    ("DGKMKGLAF", "1qin"),
+    ("IHGIGGFI", "1a9m"),
+    ("KSIVDSGTTNLR", "1fkn"),
+    ("NNLGTIAKSGT", "3b26"),
+    ("GAVEDGATMTFF", "2xxx"),
+    ("DWGGM", "3ans"),
+    ("YAGYS", "6mu3"),
+]
+
+MANIFEST_NAME = "benchmark.json"
+
+# Main chains up to this length are folded with the exact solver, longer ones with pull moves.
+_MAX_EXACT_LENGTH = 14
+
+
+class BenchmarkInstance:
+    """A protein folding instance of the benchmark set with its reference solutions. Two references
+    are stored: the lowest energy of the compressed Hamiltonian, which is exact if the whole
+    spectrum could be computed and the best known energy otherwise, and the lowest contact energy
+    of a fold on the lattice."""
+
+    def __init__(self, path: str, metadata: Dict[str, Any]):
+        """
+        Args:
+            path: Directory of the benchmark set.
+            metadata: The entry of the instance in the manifest of the benchmark set.
+        """
+        self._path = path
+        self._metadata = metadata
+        self._hamiltonian: Optional[SparsePauliOp] = None
+
+    @property
+    def instance_id(self) -> str:
+        """Returns the identifier of the instance."""
+        return self._metadata["instance_id"]
+
+    @property
+    def sequence(self) -> str:
+        """Returns the main chain sequence."""
+        return self._metadata["sequence"]
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Returns all stored properties of the instance."""
+        return self._metadata
+
+    @property
+    def num_qubits(self) -> int:
+        """Returns the number of qubits of the compressed Hamiltonian."""
+        return self._metadata["num_qubits"]
+
+    @property
+    def build_time(self) -> float:
+        """Returns the time in seconds it took to build the compressed Hamiltonian."""
+        return self._metadata["build_time"]
+
+    @property
+    def reference_energy(self) -> float:
+        """Returns the exact or best known ground-state energy of the compressed Hamiltonian."""
+        return self._metadata["reference_energy"]
+
+    @property
+    def reference_bitstring(self) -> str:
+        """Returns a bitstring of energy :attr:`reference_energy`."""
+        return self._metadata["reference_bitstring"]
+
+    @property
+    def is_exact(self) -> bool:
+        """Returns True if :attr:`reference_energy` is the exact ground-state energy."""
+        return self._metadata["reference_method"] == "spectrum"
+
+    @property
+    def hamiltonian(self) -> SparsePauliOp:
+        """Returns the compressed Hamiltonian, loaded from disk on first access."""
+        if self._hamiltonian is None:
+            data = np.load(os.path.join(self._path, self._metadata["hamiltonian_file"]))
+            paulis = PauliList.from_symplectic(data["z"], data["x"])
+            self._hamiltonian = SparsePauliOp(paulis, coeffs=data["coeffs"])
+        return self._hamiltonian
+
+    def problem(self) -> ProteinFoldingProblem:
+        """Rebuilds the protein folding problem of the instance. Its qubit operator is not built."""
+        return _make_problem(
+            self.sequence,
+            self._metadata["interaction"],
+            self._metadata["seed"],
+            self._metadata["penalty_parameters"],
+        )
+
+
+def _make_problem(
+    sequence: str, interaction: str, seed: Optional[int], penalties: Sequence[float]
+) -> ProteinFoldingProblem:
+    peptide = Peptide(sequence, ["" for _ in sequence])
+    if interaction == "random":
+        interaction_model = RandomInteraction(seed)
+    else:
+        interaction_model = MiyazawaJerniganInteraction()
+    return ProteinFoldingProblem(peptide, interaction_model, PenaltyParameters(*penalties))
+
+
+def generate_benchmark_set(
+    path: str,
+    proteins: Iterable[Tuple[str, str]] = MAIN_PROTEINS,
+    random_lengths: Iterable[int] = (5, 6, 7, 8, 9, 10),
+    random_seeds: Iterable[int] = (0, 1, 2),
+    penalty_parameters: Tuple[float, float, float] = (10, 10, 10),
+    max_spectrum_qubits: int = 26,
+    num_sweeps: int = 2000,
+) -> List[BenchmarkInstance]:
+    """
+    Generates a benchmark set and stores it in a directory: a manifest ``benchmark.json`` with the
+    properties of all instances and one ``.npz`` file per compressed Hamiltonian.
+
+    Args:
+        path: Directory of the benchmark set. It is created if necessary.
+        proteins: Sequences and identifiers of instances with a Miyazawa-Jernigan interaction.
+        random_lengths: Main chain lengths of instances with a random interaction.
+        random_seeds: Seeds of the random interactions generated for every length.
+        penalty_parameters: Penalties of the Hamiltonians, as for PenaltyParameters.
+        max_spectrum_qubits: Hamiltonians with at most this number of qubits are solved exactly
+                             from their full spectrum, larger ones with parallel tempering.
+        num_sweeps: Number of sweeps of the heuristic solvers.
+
+    Returns:
+        The generated instances.
+    """
+    os.makedirs(path, exist_ok=True)
+    specifications = [
+        (protein_id, sequence, "mj", None) for sequence, protein_id in proteins
+    ]
+    specifications += [
+        (f"random_{length}_{seed}", "A" * length, "random", seed)
+        for length in random_lengths
+        for seed in random_seeds
+    ]
+
+    entries = []
+    for instance_id, sequence, interaction, seed in specifications:
+        problem = _make_problem(sequence, interaction, seed, penalty_parameters)
+        start = time.perf_counter()
+        hamiltonian = problem.qubit_op()
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if hamiltonian.num_qubits <= max_spectrum_qubits:
+            energies, bitstrings = problem.lowest_energy_states(1)
+            reference_method = "spectrum"
+        else:
+            solver = ParallelTemperingSolver(hamiltonian, num_sweeps=num_sweeps, num_best=1)
+            result = solver.run(seed=0)
+            energies, bitstrings = result.best_energies, result.best_bitstrings
+            reference_method = "parallel_tempering"
+        reference_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if len(sequence) <= _MAX_EXACT_LENGTH:
+            fold = ExactFoldingSolver(problem.peptide, problem.pair_energies).solve()
+            fold_method = "exact"
+        else:
+            fold = PullMoveSolver(
+                problem.peptide, problem.pair_energies, num_sweeps=num_sweeps
+            ).solve(seed=0)[0]
+            fold_method = "pull_move"
+        fold_time = time.perf_counter() - start
+
+        hamiltonian_file = f"{instance_id}.npz"
+        np.savez_compressed(
+            os.path.join(path, hamiltonian_file),
+            z=hamiltonian.paulis.z,
+            x=hamiltonian.paulis.x,
+            coeffs=hamiltonian.coeffs,
+        )
+        entries.append(
+            {
+                "instance_id": instance_id,
+                "sequence": sequence,
+                "interaction": interaction,
+                "seed": seed,
+                "penalty_parameters": list(penalty_parameters),
+                "num_qubits": hamiltonian.num_qubits,
+                "num_terms": len(hamiltonian),
+                "unused_qubits": [int(qubit) for qubit in problem.unused_qubits],
+                "hamiltonian_file": hamiltonian_file,
+                "build_time": build_time,
+                "reference_energy": float(energies[0]),
+                "reference_bitstring": bitstrings[0],
+                "reference_method": reference_method,
+                "reference_time": reference_time,
+                "fold_energy": fold.energy,
+                "fold_bitstring": fold.bitstring,
+                "fold_method": fold_method,
+                "fold_time": fold_time,
+            }
+        )
+        print(f"Benchmark instance {instance_id}: {hamiltonian.num_qubits} qubits")
+
+    with open(os.path.join(path, MANIFEST_NAME), "w") as file:
+        json.dump(entries, file, indent=2)
+    return [BenchmarkInstance(path, entry) for entry in entries]
+
+
+def load_benchmark_set(path: str) -> List[BenchmarkInstance]:
+    """
+    Loads a benchmark set generated by :func:`generate_benchmark_set`. Hamiltonians are read
+    lazily.
+
+    Args:
+        path: Directory of the benchmark set.
+
+    Returns:
+        The instances of the benchmark set.
+    """
+    with open(os.path.join(path, MANIFEST_NAME)) as file:
+        entries = json.load(file)
+    return [BenchmarkInstance(path, entry) for entry in entries]
+
+
+def verify_hamiltonians(instances: Iterable[BenchmarkInstance]) -> List[str]:
+    """
+    Rebuilds the Hamiltonians of benchmark instances and compares them exactly, term by term and
+    in order, with the stored ones. A benchmark set generated before a change of the Hamiltonian
+    construction thus checks that the change leaves the Hamiltonians unchanged, e.g. for the
+    instances of :data:`MAIN_PROTEINS`:
+
+        instances = [
+            instance
+            for instance in load_benchmark_set(path)
+            if instance.metadata["interaction"] == "mj"
+        ]
+        assert not verify_hamiltonians(instances)
+
+    The order of the terms matters: qubits are fixed by their position in sums of terms, so a
+    different order of the same terms can lead to a different Hamiltonian later on.
+
+    Args:
+        instances: The instances to check.
+
+    Returns:
+        The identifiers of the instances whose rebuilt Hamiltonian differs from the stored one.
+    """
+    mismatches = []
+    for instance in instances:
+        stored = instance.hamiltonian
+        rebuilt = instance.problem().qubit_op()
+        identical = (
+            rebuilt.num_qubits == stored.num_qubits
+            and np.array_equal(rebuilt.paulis.z, stored.paulis.z)
+            and np.array_equal(rebuilt.paulis.x, stored.paulis.x)
+            and np.array_equal(rebuilt.coeffs, stored.coeffs)
+        )
+        if not identical:
+            mismatches.append(instance.instance_id)
+        print(f"Benchmark instance {instance.instance_id}: {'identical' if identical else 'differs'}")
+    return mismatches
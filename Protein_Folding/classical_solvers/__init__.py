@@ -0,0 +1,24 @@
+# This code is licensed under the Apache License, Version 2.0.
+# You may obtain a copy of this license at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+from .classical_folding_result import ClassicalFoldingResult
+from .exact_solver import ExactFoldingSolver
+from .fold_energy import FoldEnergyEvaluator, FoldEvaluation
+from .parallel_tempering import (
+    ParallelTemperingResult,
+    ParallelTemperingSolver,
+    geometric_betas,
+)
+from .pull_move_solver import PullMoveSolver
+
+__all__ = [
+    "ClassicalFoldingResult",
+    "ExactFoldingSolver",
+    "FoldEnergyEvaluator",
+    "FoldEvaluation",
+    "ParallelTemperingResult",
+    "ParallelTemperingSolver",
+    "PullMoveSolver",
+    "geometric_betas",
+]
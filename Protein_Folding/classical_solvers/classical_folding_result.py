@@ -0,0 +1,79 @@
+# This code is licensed under the Apache License, Version 2.0.
+# You may obtain a copy of this license at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""The result of a classical protein folding solver."""
+from typing import List, Optional
+
+from ..peptide.Peptide import Peptide
+from ..protein_folding_result import ProteinFoldingResult
+from .lattice import conformation_unused_qubits, turns_to_bitstring
+
+
+class ClassicalFoldingResult:
+    """A fold found by a classical solver, together with its energy and its encoding as a
+    conformation bitstring that :class:`~Protein_Folding.ProteinFoldingResult` can decode."""
+
+    def __init__(
+        self,
+        peptide: Peptide,
+        energy: float,
+        main_turns: List[int],
+        side_turns: List[Optional[int]],
+    ):
+        """
+        Args:
+            peptide: The peptide that was folded.
+            energy: Contact energy of the fold.
+            main_turns: Turns of the main chain, starting with the fixed turns (1, 0).
+            side_turns: Turn of the side bead of every main bead, or None without a side bead.
+        """
+        self._peptide = peptide
+        self._energy = energy
+        self._main_turns = list(main_turns)
+        self._side_turns = list(side_turns)
+        self._side_chain_hot_vector = peptide.get_side_chain_hot_vector()
+
+    @property
+    def energy(self) -> float:
+        """Returns the contact energy of the fold."""
+        return self._energy
+
+    @property
+    def main_turns(self) -> List[int]:
+        """Returns the turns of the main chain."""
+        return self._main_turns
+
+    @property
+    def side_turns(self) -> List[Optional[int]]:
+        """Returns the turns of the side beads, None for main beads without a side bead."""
+        return self._side_turns
+
+    @property
+    def bitstring(self) -> str:
+        """Returns the conformation qubits of the fold in Qiskit order, i.e. the rightmost part of
+        a bitstring measured on the compressed qubit operator. Contact qubits are not included."""
+        return turns_to_bitstring(
+            self._main_turns, self._side_turns, self._side_chain_hot_vector
+        )
+
+    def to_protein_folding_result(
+        self, unused_qubits: Optional[List[int]] = None
+    ) -> ProteinFoldingResult:
+        """
+        Returns a :class:`~Protein_Folding.ProteinFoldingResult` for the fold.
+
+        Args:
+            unused_qubits: Qubits removed during compression, e.g.
+                           :attr:`~Protein_Folding.ProteinFoldingProblem.unused_qubits`. If not
+                           given, the conformation qubits fixed by symmetry are used.
+
+        Returns:
+            The protein folding result decoded from :attr:`bitstring`.
+        """
+        if not unused_qubits:
+            unused_qubits = conformation_unused_qubits(self._side_chain_hot_vector)
+        return ProteinFoldingResult(
+            peptide=self._peptide,
+            unused_qubits=unused_qubits,
+            vector_sequence=self.bitstring,
+        )
@@ -0,0 +1,193 @@
+# This code is licensed under the Apache License, Version 2.0.
+# You may obtain a copy of this license at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""An exact branch-and-bound solver of the lattice protein folding problem."""
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..peptide.Peptide import Peptide
+from .classical_folding_result import ClassicalFoldingResult
+from .lattice import (
+    FIXED_MAIN_TURNS,
+    Bead,
+    add_sites,
+    are_bonded,
+    chiral_side_turn,
+    contact_energy,
+    neighbor_sites,
+)
+
+
+class ExactFoldingSolver:
+    """Finds a fold of minimal contact energy on the tetrahedral lattice. The main chain is grown
+    turn by turn in depth-first order, in the encoding of
+    :class:`~Protein_Folding.utils.ProteinShapeDecoder`: the first two turns are fixed, the third
+    one is restricted by symmetry if the second bead has no side chain and every side turn is
+    the one imposed by chirality. Branches that overlap a bead are discarded and branches whose
+    energy cannot beat the best fold found so far, even if every remaining bead realised its
+    most favourable contacts, are cut.
+
+    The energy of a fold is the sum of the pair energies of all non-bonded beads at unit
+    distance, i.e. the energy the Hamiltonian assigns to a fold without penalties.
+    """
+
+    def __init__(self, peptide: Peptide, pair_energies: np.ndarray):
+        """
+        Args:
+            peptide: The peptide to be folded.
+            pair_energies: Pair energies of shape (N + 1, 2, N + 1, 2), e.g.
+                           :attr:`~Protein_Folding.ProteinFoldingProblem.pair_energies`.
+        """
+        self._peptide = peptide
+        self._pair_energies = pair_energies
+        self._side_chain_hot_vector = peptide.get_side_chain_hot_vector()
+        self._main_chain_len = len(self._side_chain_hot_vector)
+        self._remaining_bounds = self._create_remaining_bounds()
+        self.num_nodes = 0
+
+        self._turns: List[int] = []
+        self._side_turns: List[Optional[int]] = []
+        self._main_sites: List[Tuple[int, int, int]] = []
+        self._occupied: Dict[Tuple[int, int, int], Bead] = {}
+        self._best_energy = math.inf
+        self._best: Optional[Tuple[List[int], List[Optional[int]]]] = None
+
+    def solve(self, upper_bound: float = math.inf) -> Optional[ClassicalFoldingResult]:
+        """
+        Searches all folds for one of minimal energy.
+
+        Args:
+            upper_bound: Only folds with an energy strictly below this value are searched, e.g.
+                         the energy of a fold found by a heuristic.
+
+        Returns:
+            An optimal fold, or None if no fold has an energy below upper_bound.
+        """
+        self.num_nodes = 0
+        self._best_energy = upper_bound
+        self._best = None
+        self._turns = []
+        self._side_turns = [None] * self._main_chain_len
+        self._main_sites = [(0, 0, 0)]
+        self._occupied = {(0, 0, 0): (0, 0)}
+        self._grow(0, 0.0)
+        if self._best is None:
+            return None
+        main_turns, side_turns = self._best
+        return ClassicalFoldingResult(self._peptide, self._best_energy, main_turns, side_turns)
+
+    def _grow(self, step: int, energy: float) -> None:
+        """Chooses the turn leaving main bead ``step``, which places the next main bead and the
+        side bead of main bead ``step``."""
+        self.num_nodes += 1
+        if step == self._main_chain_len - 1:
+            if energy < self._best_energy:
+                self._best_energy = energy
+                self._best = (list(self._turns), list(self._side_turns))
+            return
+
+        children = []
+        for turn in self._candidate_turns(step):
+            child = self._place(step, turn)
+            if child is not None:
+                children.append(child)
+        children.sort(key=lambda child: child[0])
+
+        bound = self._remaining_bounds[step + 1]
+        for delta, turn, side_turn, main_site, side_site in children:
+            if energy + delta + bound >= self._best_energy:
+                break
+            self._turns.append(turn)
+            self._main_sites.append(main_site)
+            self._occupied[main_site] = (step + 1, 0)
+            if side_site is not None:
+                self._side_turns[step] = side_turn
+                self._occupied[side_site] = (step, 1)
+
+            self._grow(step + 1, energy + delta)
+
+            if side_site is not None:
+                self._side_turns[step] = None
+                del self._occupied[side_site]
+            del self._occupied[main_site]
+            self._main_sites.pop()
+            self._turns.pop()
+
+    def _candidate_turns(self, step: int) -> List[int]:
+        if step < len(FIXED_MAIN_TURNS):
+            return [FIXED_MAIN_TURNS[step]]
+        if step == 2 and not self._side_chain_hot_vector[1]:
+            # ProteinShapeDecoder sets the second bit of the third turn to 1.
+            return [1, 3]
+        return [turn for turn in range(4) if turn != self._turns[step - 1]]
+
+    def _place(self, step: int, turn: int):
+        """Returns the energy change, turns and sites of the beads placed by a turn, or None if
+        they overlap other beads."""
+        sign = (-1) ** step
+        main_site = add_sites(self._main_sites[step], turn, sign)
+        if main_site in self._occupied:
+            return None
+        delta = self._contacts(main_site, (step + 1, 0))
+
+        side_turn, side_site = None, None
+        if self._side_chain_hot_vector[step] and step > 0:
+            side_turn = chiral_side_turn(step, self._turns[step - 1], turn)
+            side_site = add_sites(self._main_sites[step], side_turn, sign)
+            if side_site in self._occupied:
+                return None
+            delta += self._contacts(side_site, (step, 1))
+        return delta, turn, side_turn, main_site, side_site
+
+    def _contacts(self, site: Tuple[int, int, int], bead: Bead) -> float:
+        energy = 0.0
+        for neighbor_site in neighbor_sites(site):
+            other = self._occupied.get(neighbor_site)
+            if other is not None and not are_bonded(bead, other):
+                energy += contact_energy(self._pair_energies, bead, other)
+        return energy
+
+    def _free_sites(self, bead: Bead) -> int:
+        """Returns the number of lattice neighbors of a bead that are not taken by its bonds."""
+        index, is_side = bead
+        if is_side:
+            return 3
+        bonds = (index > 0) + (index < self._main_chain_len - 1)
+        return 4 - bonds - int(self._side_chain_hot_vector[index])
+
+    def _create_remaining_bounds(self) -> List[float]:
+        """
+        Computes, for every step, a lower bound of the energy contributed by the beads placed from
+        that step onwards. The contacts of a bead are counted when it is placed, so they involve
+        beads placed before and there are at most as many as its free lattice neighbors.
+
+        Returns:
+            A list whose entry k bounds the energy of steps k, k + 1, ... from below.
+        """
+        placed: List[Bead] = [(0, 0)]
+        step_bounds = []
+        for step in range(self._main_chain_len - 1):
+            new_beads = [(step + 1, 0)]
+            if self._side_chain_hot_vector[step]:
+                new_beads.append((step, 1))
+            bound = 0.0
+            for bead in new_beads:
+                energies = sorted(
+                    energy
+                    for energy in (
+                        contact_energy(self._pair_energies, bead, other)
+                        for other in placed
+                        if not are_bonded(bead, other)
+                    )
+                    if energy < 0
+                )
+                bound += sum(energies[: self._free_sites(bead)])
+            placed.extend(new_beads)
+            step_bounds.append(bound)
+
+        remaining_bounds = [0.0] * self._main_chain_len
+        for step in range(self._main_chain_len - 2, -1, -1):
+            remaining_bounds[step] = remaining_bounds[step + 1] + step_bounds[step]
+        return remaining_bounds
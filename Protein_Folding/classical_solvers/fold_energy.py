@@ -0,0 +1,316 @@
+# This code is licensed under the Apache License, Version 2.0.
+# You may obtain a copy of this license at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""Evaluates the physical energy of batches of folds from their lattice coordinates."""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ..peptide.Peptide import Peptide
+from ..qubit_utils.diagonal_energy import Bitstrings, bitstrings_to_array
+from .lattice import (
+    FIXED_MAIN_TURNS,
+    TURN_VECTORS,
+    are_bonded,
+    chiral_side_turn,
+    contact_energy,
+    conformation_unused_qubits,
+)
+
+_TURN_VECTORS = np.array(TURN_VECTORS, dtype=np.int64)
+
+
+def _build_chiral_array() -> np.ndarray:
+    """Returns the side turn imposed by chirality indexed by [parity of the main bead, lower turn,
+    upper turn], with -1 where both turns are equal."""
+    table = np.full((2, 4, 4), -1, dtype=np.int64)
+    for parity in range(2):
+        for lower in range(4):
+            for upper in range(4):
+                if lower != upper:
+                    table[parity, lower, upper] = chiral_side_turn(parity, lower, upper)
+    return table
+
+
+_CHIRAL_ARRAY = _build_chiral_array()
+
+
+class FoldEvaluation:
+    """Energies and constraint violations of a batch of folds."""
+
+    def __init__(
+        self,
+        energies: np.ndarray,
+        num_contacts: np.ndarray,
+        num_overlaps: np.ndarray,
+        num_chirality_violations: np.ndarray,
+    ):
+        """
+        Args:
+            energies: Contact energy of every fold.
+            num_contacts: Number of pairs of non-bonded beads at unit distance of every fold.
+            num_overlaps: Number of pairs of beads on the same lattice site of every fold.
+            num_chirality_violations: Number of side beads of every fold whose turn differs from
+                                      the one imposed by chirality.
+        """
+        self._energies = energies
+        self._num_contacts = num_contacts
+        self._num_overlaps = num_overlaps
+        self._num_chirality_violations = num_chirality_violations
+
+    @property
+    def energies(self) -> np.ndarray:
+        """Returns the contact energy of every fold."""
+        return self._energies
+
+    @property
+    def num_contacts(self) -> np.ndarray:
+        """Returns the number of contacts of every fold."""
+        return self._num_contacts
+
+    @property
+    def num_overlaps(self) -> np.ndarray:
+        """Returns the number of overlapping pairs of beads of every fold."""
+        return self._num_overlaps
+
+    @property
+    def num_chirality_violations(self) -> np.ndarray:
+        """Returns the number of side beads of every fold that violate chirality."""
+        return self._num_chirality_violations
+
+    @property
+    def is_valid(self) -> np.ndarray:
+        """Returns True for folds without overlaps and chirality violations."""
+        return (self._num_overlaps == 0) & (self._num_chirality_violations == 0)
+
+
+class FoldEnergyEvaluator:
+    """Re-scores folds independently of the qubit Hamiltonian. Folds are given as bitstrings,
+    turns or coordinates and are converted to integer coordinates on the tetrahedral lattice.
+    The energy of a fold is the sum of the pair energies of all non-bonded beads at unit
+    distance. Pairwise squared distances are computed for chunks of folds at once."""
+
+    def __init__(
+        self,
+        peptide: Peptide,
+        pair_energies: np.ndarray,
+        unused_qubits: Optional[List[int]] = None,
+        chunk_size: int = 4096,
+    ):
+        """
+        Args:
+            peptide: The folded peptide.
+            pair_energies: Pair energies of shape (N + 1, 2, N + 1, 2), e.g.
+                           :attr:`~Protein_Folding.ProteinFoldingProblem.pair_energies`.
+            unused_qubits: Qubits removed during compression, used to decode bitstrings as
+                           :class:`~Protein_Folding.ProteinFoldingResult` does. If not given, the
+                           conformation qubits fixed by symmetry are assumed.
+            chunk_size: Number of folds scored at once, which bounds the memory of pairwise
+                        distances.
+        """
+        self._side_chain_hot_vector = peptide.get_side_chain_hot_vector()
+        self._main_chain_len = len(self._side_chain_hot_vector)
+        self._side_indices = np.flatnonzero(self._side_chain_hot_vector)
+        if not unused_qubits:
+            unused_qubits = conformation_unused_qubits(self._side_chain_hot_vector)
+        self._fifth_bit = 5 in unused_qubits[:6]
+        self._chunk_size = chunk_size
+
+        beads = [(index, 0) for index in range(self._main_chain_len)]
+        beads += [(int(index), 1) for index in self._side_indices]
+        num_beads = len(beads)
+        self._contact_energies = np.zeros((num_beads, num_beads))
+        self._contact_mask = np.zeros((num_beads, num_beads), dtype=bool)
+        for first in range(num_beads):
+            for second in range(first + 1, num_beads):
+                if not are_bonded(beads[first], beads[second]):
+                    self._contact_mask[first, second] = True
+                    self._contact_energies[first, second] = contact_energy(
+                        pair_energies, beads[first], beads[second]
+                    )
+        self._pair_mask = np.triu(np.ones((num_beads, num_beads), dtype=bool), k=1)
+
+    def decode(
+        self, bitstrings: Bitstrings, num_qubits: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Decodes a batch of bitstrings measured on the compressed qubit operator into turns, as
+        :class:`~Protein_Folding.utils.ProteinShapeDecoder` does.
+
+        Args:
+            bitstrings: A batch of bitstrings in any format accepted by
+                        :func:`~Protein_Folding.qubit_utils.diagonal_energy.bitstrings_to_array`.
+                        Only the conformation qubits (the rightmost bits) are read.
+            num_qubits: Number of qubits of the bitstrings. Inferred from the bitstrings if not
+                        given; required for packed integers.
+
+        Returns:
+            An array of main turns of shape (number of folds, N - 1) and an array of side turns of
+            shape (number of folds, number of side beads).
+        """
+        if num_qubits is None:
+            num_qubits = self._infer_num_qubits(bitstrings)
+        bits = bitstrings_to_array(bitstrings, num_qubits)
+        num_folds = len(bits)
+        num_main_bits = 2 * (self._main_chain_len - 3) - self._fifth_bit
+
+        main_bits = np.zeros((num_folds, 2 * (self._main_chain_len - 1)), dtype=np.int64)
+        for turn_index, turn in enumerate(FIXED_MAIN_TURNS):
+            main_bits[:, 2 * turn_index] = turn >> 1
+            main_bits[:, 2 * turn_index + 1] = turn & 1
+        if self._fifth_bit:
+            main_bits[:, 4] = bits[:, 0]
+            main_bits[:, 5] = 1
+            main_bits[:, 6:] = bits[:, 1:num_main_bits]
+        else:
+            main_bits[:, 4:] = bits[:, :num_main_bits]
+        main_turns = 2 * main_bits[:, 0::2] + main_bits[:, 1::2]
+
+        side_bits = bits[:, num_main_bits : num_main_bits + 2 * len(self._side_indices)]
+        side_bits = side_bits.astype(np.int64)
+        side_turns = 2 * side_bits[:, 0::2] + side_bits[:, 1::2]
+        return main_turns, side_turns
+
+    def positions(self, main_turns: np.ndarray, side_turns: np.ndarray) -> np.ndarray:
+        """
+        Computes the integer lattice coordinates of a batch of folds, in the units of
+        :data:`~Protein_Folding.classical_solvers.lattice.TURN_VECTORS`.
+
+        Args:
+            main_turns: Main turns of shape (number of folds, N - 1).
+            side_turns: Side turns of shape (number of folds, number of side beads).
+
+        Returns:
+            Coordinates of shape (number of folds, number of beads, 3), main beads first and then
+            side beads in the order of the main chain.
+        """
+        main_turns = np.asarray(main_turns, dtype=np.int64)
+        side_turns = np.asarray(side_turns, dtype=np.int64).reshape(len(main_turns), -1)
+        signs = (-1) ** np.arange(self._main_chain_len - 1)
+        steps = signs[None, :, None] * _TURN_VECTORS[main_turns]
+        main_positions = np.zeros((len(main_turns), self._main_chain_len, 3), dtype=np.int64)
+        np.cumsum(steps, axis=1, out=main_positions[:, 1:])
+        side_signs = (-1) ** self._side_indices
+        side_positions = (
+            main_positions[:, self._side_indices]
+            + side_signs[None, :, None] * _TURN_VECTORS[side_turns]
+        )
+        return np.concatenate([main_positions, side_positions], axis=1)
+
+    def evaluate(
+        self, bitstrings: Bitstrings, num_qubits: Optional[int] = None
+    ) -> FoldEvaluation:
+        """
+        Evaluates a batch of bitstrings, e.g. all samples of a run.
+
+        Args:
+            bitstrings: A dictionary of counts keyed by bitstrings, an iterable of bitstrings, an
+                        iterable of packed integers or a uint8 matrix whose column i holds
+                        qubit i. For a dictionary the results follow the order of its keys.
+            num_qubits: Number of qubits of the bitstrings, required for packed integers.
+
+        Returns:
+            The energies and constraint violations of all folds.
+        """
+        return self.evaluate_turns(*self.decode(bitstrings, num_qubits))
+
+    def evaluate_turns(self, main_turns: np.ndarray, side_turns: np.ndarray) -> FoldEvaluation:
+        """
+        Evaluates a batch of folds given by their turns.
+
+        Args:
+            main_turns: Main turns of shape (number of folds, N - 1).
+            side_turns: Side turns of shape (number of folds, number of side beads).
+
+        Returns:
+            The energies and constraint violations of all folds.
+        """
+        main_turns = np.asarray(main_turns, dtype=np.int64)
+        side_turns = np.asarray(side_turns, dtype=np.int64).reshape(len(main_turns), -1)
+        positions = self.positions(main_turns, side_turns)
+        energies, num_contacts, num_overlaps = self._score(positions)
+
+        required = _CHIRAL_ARRAY[
+            (self._side_indices % 2)[None, :],
+            main_turns[:, self._side_indices - 1],
+            main_turns[:, self._side_indices],
+        ]
+        violations = ((required >= 0) & (side_turns != required)).sum(axis=1)
+        return FoldEvaluation(energies, num_contacts, num_overlaps, violations)
+
+    def evaluate_coordinates(
+        self, main_positions: np.ndarray, side_positions: Optional[np.ndarray] = None
+    ) -> FoldEvaluation:
+        """
+        Evaluates a batch of folds given by the coordinates of
+        :class:`~Protein_Folding.utils.ProteinShapeFileGen`. Turns are recovered from the bond
+        vectors, so chirality can be checked as well.
+
+        Args:
+            main_positions: Coordinates of the main beads of shape (number of folds, N, 3).
+            side_positions: Coordinates of the side beads of shape
+                            (number of folds, number of side beads, 3).
+
+        Returns:
+            The energies and constraint violations of all folds.
+
+        Raises:
+            ValueError: If a bond is not a vector of the tetrahedral lattice.
+        """
+        main_positions = np.asarray(main_positions, dtype=float)
+        if main_positions.ndim == 2:
+            main_positions = main_positions[None]
+        lattice_main = np.rint(main_positions * np.sqrt(3)).astype(np.int64)
+        signs = (-1) ** np.arange(self._main_chain_len - 1)
+        main_steps = signs[None, :, None] * np.diff(lattice_main, axis=1)
+        main_turns = self._turns_from_steps(main_steps)
+
+        if len(self._side_indices):
+            lattice_side = np.rint(
+                np.asarray(side_positions, dtype=float).reshape(len(lattice_main), -1, 3)
+                * np.sqrt(3)
+            ).astype(np.int64)
+            side_signs = (-1) ** self._side_indices
+            side_steps = side_signs[None, :, None] * (
+                lattice_side - lattice_main[:, self._side_indices]
+            )
+            side_turns = self._turns_from_steps(side_steps)
+        else:
+            side_turns = np.zeros((len(lattice_main), 0), dtype=np.int64)
+        return self.evaluate_turns(main_turns, side_turns)
+
+    def _score(self, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        num_folds = len(positions)
+        energies = np.zeros(num_folds)
+        num_contacts = np.zeros(num_folds, dtype=np.int64)
+        num_overlaps = np.zeros(num_folds, dtype=np.int64)
+        for start in range(0, num_folds, self._chunk_size):
+            chunk = positions[start : start + self._chunk_size]
+            differences = chunk[:, :, None, :] - chunk[:, None, :, :]
+            squared_distances = np.einsum("fijk,fijk->fij", differences, differences)
+            contacts = (squared_distances == 3) & self._contact_mask
+            stop = start + len(chunk)
+            energies[start:stop] = np.einsum("fij,ij->f", contacts, self._contact_energies)
+            num_contacts[start:stop] = contacts.sum(axis=(1, 2))
+            num_overlaps[start:stop] = ((squared_distances == 0) & self._pair_mask).sum(
+                axis=(1, 2)
+            )
+        return energies, num_contacts, num_overlaps
+
+    @staticmethod
+    def _turns_from_steps(steps: np.ndarray) -> np.ndarray:
+        matches = np.einsum("fbk,tk->fbt", steps, _TURN_VECTORS) == 3
+        if not matches.any(axis=2).all():
+            raise ValueError("The coordinates are not on the tetrahedral lattice.")
+        return matches.argmax(axis=2)
+
+    @staticmethod
+    def _infer_num_qubits(bitstrings: Bitstrings) -> int:
+        if isinstance(bitstrings, np.ndarray) and bitstrings.ndim == 2:
+            return bitstrings.shape[1]
+        if isinstance(bitstrings, str):
+            return len(bitstrings)
+        first = next(iter(bitstrings), "")
+        if isinstance(first, str):
+            return len(first)
+        raise ValueError("The number of qubits of packed integers cannot be inferred.")
@@ -0,0 +1,172 @@
+# This code is licensed under the Apache License, Version 2.0.
+# You may obtain a copy of this license at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""Geometry of the tetrahedral lattice, the contact model of the Hamiltonian and the turn encoding
+used by ProteinShapeDecoder."""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# A bead is identified by the index (starting at 0) of its main bead and 1 for a side bead, 0 for
+# the main bead itself.
+Bead = Tuple[int, int]
+
+# ProteinShapeFileGen.COORDINATES scaled by sqrt(3), so that lattice sites have integer
+# coordinates. Two sites are nearest neighbors if their squared distance is 3.
+TURN_VECTORS: Tuple[Tuple[int, int, int], ...] = (
+    (-1, 1, 1),
+    (1, 1, -1),
+    (-1, -1, -1),
+    (1, -1, 1),
+)
+
+# The first two turns of the main chain are fixed by symmetry, see ProteinShapeDecoder.
+FIXED_MAIN_TURNS: Tuple[int, int] = (1, 0)
+
+# Side turns imposed by the chirality term of the Hamiltonian, in the labels of the Hamiltonian.
+# For a side bead with turn a, the triple (b, c, d) lists the cyclic order of the turns of the
+# neighboring main beads that requires a, see QubitOpBuilder._create_h_chiral.
+_CHIRAL_TRIPLES = {0: (1, 2, 3), 1: (0, 3, 2), 2: (0, 1, 3), 3: (0, 2, 1)}
+
+
+def _build_chiral_table() -> List[List[List[Optional[int]]]]:
+    table: List[List[List[Optional[int]]]] = [
+        [[None] * 4 for _ in range(4)] for _ in range(2)
+    ]
+    for side_turn, (turn_b, turn_c, turn_d) in _CHIRAL_TRIPLES.items():
+        for lower, upper in ((turn_b, turn_c), (turn_c, turn_d), (turn_d, turn_b)):
+            table[0][lower][upper] = side_turn
+        for lower, upper in ((turn_c, turn_b), (turn_d, turn_c), (turn_b, turn_d)):
+            table[1][lower][upper] = side_turn
+    return table
+
+
+_CHIRAL_TABLE = _build_chiral_table()
+
+
+def chiral_side_turn(main_bead_index: int, lower_turn: int, upper_turn: int) -> int:
+    """
+    Returns the only side turn that satisfies the chirality constraint.
+
+    Turn qubits of the Hamiltonian are projectors (I + Z) / 2, so a turn t of ProteinShapeDecoder
+    is the turn 3 - t of the Hamiltonian. The relabeling is a rotation of the lattice and
+    preserves chirality.
+
+    Args:
+        main_bead_index: Index (starting at 0) of the main bead hosting the side bead.
+        lower_turn: Turn of the main chain arriving at the main bead.
+        upper_turn: Turn of the main chain leaving the main bead.
+
+    Returns:
+        The side turn, different from both main turns.
+    """
+    turn_coeff = 1 if main_bead_index % 2 == 0 else 0
+    return 3 - _CHIRAL_TABLE[turn_coeff][3 - lower_turn][3 - upper_turn]
+
+
+def add_sites(
+    site: Tuple[int, int, int], turn: int, sign: int
+) -> Tuple[int, int, int]:
+    """Returns the lattice site reached from a site along a signed turn vector."""
+    vector = TURN_VECTORS[turn]
+    return (
+        site[0] + sign * vector[0],
+        site[1] + sign * vector[1],
+        site[2] + sign * vector[2],
+    )
+
+
+def neighbor_sites(site: Tuple[int, int, int]) -> List[Tuple[int, int, int]]:
+    """Returns all sites at unit distance from a site."""
+    return [add_sites(site, turn, sign) for sign in (1, -1) for turn in range(4)]
+
+
+def fold_positions(
+    main_turns: Sequence[int], side_turns: Sequence[Optional[int]]
+) -> Tuple[List[Tuple[int, int, int]], List[Optional[Tuple[int, int, int]]]]:
+    """
+    Computes integer lattice coordinates of a fold. Main bead k + 1 is reached from main bead k
+    along (-1)^k times the vector of turn k, as in ProteinShapeFileGen. A side bead is placed
+    along the same signed direction from its main bead, which keeps it on the lattice as in the
+    distance operators of the Hamiltonian.
+
+    Args:
+        main_turns: Turns of the main chain, one per bond.
+        side_turns: Turn of the side bead of every main bead, or None without a side bead.
+
+    Returns:
+        Lists of coordinates of main beads and of side beads (None without a side bead).
+    """
+    main_positions = [(0, 0, 0)]
+    for index, turn in enumerate(main_turns):
+        main_positions.append(add_sites(main_positions[-1], turn, (-1) ** index))
+    side_positions: List[Optional[Tuple[int, int, int]]] = []
+    for index, turn in enumerate(side_turns):
+        if turn is None:
+            side_positions.append(None)
+        else:
+            side_positions.append(add_sites(main_positions[index], turn, (-1) ** index))
+    return main_positions, side_positions
+
+
+def are_bonded(first: Bead, second: Bead) -> bool:
+    """Returns True if two beads are bonded, i.e. neighbors in the chain."""
+    if first[1] and second[1]:
+        return False
+    if first[1] or second[1]:
+        return first[0] == second[0]
+    return abs(first[0] - second[0]) == 1
+
+
+def contact_energy(pair_energies: np.ndarray, first: Bead, second: Bead) -> float:
+    """
+    Returns the interaction energy of two beads in contact, indexed as in
+    :meth:`~Protein_Folding.bead_distances.distance_map.DistanceMap.first_neighbor`.
+
+    Args:
+        pair_energies: Pair energies of shape (N + 1, 2, N + 1, 2) from an interaction.
+        first: A bead.
+        second: Another bead.
+
+    Returns:
+        The pair energy of both beads.
+    """
+    (lower_index, lower_side), (upper_index, upper_side) = sorted((first, second))
+    return float(pair_energies[lower_index + 1][upper_side][upper_index + 1][lower_side])
+
+
+def conformation_unused_qubits(side_chain_hot_vector: Sequence[bool]) -> List[int]:
+    """Returns the indices of conformation qubits that are fixed by symmetry and therefore absent
+    from the compressed qubit operator."""
+    unused_qubits = [0, 1, 2, 3]
+    if len(side_chain_hot_vector) < 2 or not side_chain_hot_vector[1]:
+        unused_qubits.append(5)
+    return unused_qubits
+
+
+def turns_to_bitstring(
+    main_turns: Sequence[int],
+    side_turns: Sequence[Optional[int]],
+    side_chain_hot_vector: Sequence[bool],
+) -> str:
+    """
+    Encodes a fold into the conformation part of a bitstring, as read by ProteinShapeDecoder.
+
+    Args:
+        main_turns: Turns of the main chain, starting with the fixed turns (1, 0).
+        side_turns: Turn of the side bead of every main bead, or None without a side bead.
+        side_chain_hot_vector: A list of booleans indicating the presence of side chains.
+
+    Returns:
+        A bitstring in Qiskit order holding the side turns followed (to the right) by the main
+        turns that are not fixed by symmetry.
+    """
+    reversed_main = "".join(f"{turn >> 1}{turn & 1}" for turn in main_turns)
+    if 5 in conformation_unused_qubits(side_chain_hot_vector):
+        reversed_main = reversed_main[:5] + reversed_main[6:]
+    reversed_side = "".join(
+        f"{turn >> 1}{turn & 1}"
+        for turn, has_side in zip(side_turns, side_chain_hot_vector)
+        if has_side
+    )
+    return reversed_side[::-1] + reversed_main[4:][::-1]
@@ -0,0 +1,336 @@
+# This code is licensed under the Apache License, Version 2.0.
+# You may obtain a copy of this license at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""Parallel tempering and simulated annealing over a Hamiltonian that is diagonal in the Z basis."""
+import collections
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from qiskit.quantum_info import Pauli, SparsePauliOp
+
+from ..qubit_utils.diagonal_energy import Bitstrings, DiagonalEnergyEvaluator, bitstrings_to_array
+
+
+def geometric_betas(beta_min: float, beta_max: float, num_temperatures: int) -> np.ndarray:
+    """
+    Returns a ladder of inverse temperatures in geometric progression, which gives roughly
+    uniform swap acceptance when the heat capacity is constant.
+
+    Args:
+        beta_min: Inverse temperature of the hottest replica.
+        beta_max: Inverse temperature of the coldest replica.
+        num_temperatures: Number of temperatures of the ladder.
+
+    Returns:
+        An increasing array of inverse temperatures.
+    """
+    if num_temperatures == 1:
+        return np.array([beta_max], dtype=float)
+    return np.geomspace(beta_min, beta_max, num_temperatures)
+
+
+class ParallelTemperingResult:
+    """Samples and best bitstrings found by a :class:`ParallelTemperingSolver`."""
+
+    def __init__(
+        self,
+        counts: Dict[str, int],
+        best_bitstrings: List[str],
+        best_energies: np.ndarray,
+        swap_acceptance: np.ndarray,
+    ):
+        """
+        Args:
+            counts: Final states of the coldest replicas, counted by bitstring.
+            best_bitstrings: The distinct bitstrings of lowest energy that were visited.
+            best_energies: Energies of best_bitstrings in ascending order.
+            swap_acceptance: Acceptance rate of replica exchanges between neighboring
+                             temperatures of the ladder.
+        """
+        self._counts = counts
+        self._best_bitstrings = best_bitstrings
+        self._best_energies = best_energies
+        self._swap_acceptance = swap_acceptance
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        """Returns the final states of the coldest replicas in the format of
+        :class:`~Qiskit_VQE.StateCalculator`, so that they can be passed to
+        :meth:`~Protein_Folding.ProteinFoldingProblem.interpret`."""
+        return self._counts
+
+    @property
+    def best_bitstrings(self) -> List[str]:
+        """Returns the distinct visited bitstrings of lowest energy, in Qiskit order."""
+        return self._best_bitstrings
+
+    @property
+    def best_energies(self) -> np.ndarray:
+        """Returns the energies of :attr:`best_bitstrings` in ascending order."""
+        return self._best_energies
+
+    @property
+    def best_counts(self) -> Dict[str, int]:
+        """Returns the best bitstrings as counts, ranked so that the lowest energy has the highest
+        count. :meth:`~Protein_Folding.ProteinFoldingProblem.interpret` then picks the best
+        bitstring."""
+        num_best = len(self._best_bitstrings)
+        return {
+            bitstring: num_best - rank for rank, bitstring in enumerate(self._best_bitstrings)
+        }
+
+    @property
+    def swap_acceptance(self) -> np.ndarray:
+        """Returns the acceptance rate of exchanges between neighboring temperatures."""
+        return self._swap_acceptance
+
+
+class ParallelTemperingSolver:
+    """Minimizes a diagonal Hamiltonian with many replicas of a Metropolis chain that are updated
+    together as array operations. A sweep proposes to flip every qubit once. The energy change of
+    a flip only involves the terms whose Z mask contains the flipped qubit, which are looked up in
+    a precomputed term index, and the signs of all terms are kept up to date for every replica.
+    After each sweep, replicas at neighboring temperatures of the ladder exchange their
+    temperatures with the usual Metropolis criterion."""
+
+    def __init__(
+        self,
+        hamiltonian: Union[SparsePauliOp, Pauli, DiagonalEnergyEvaluator],
+        betas: Optional[Sequence[float]] = None,
+        replicas_per_temperature: int = 64,
+        num_sweeps: int = 1000,
+        num_best: int = 16,
+    ):
+        """
+        Args:
+            hamiltonian: A diagonal qubit operator, e.g. from
+                         :meth:`~Protein_Folding.ProteinFoldingProblem.qubit_op`, or an evaluator
+                         of its energies.
+            betas: Increasing inverse temperatures of the ladder. By default, 16 temperatures in
+                   geometric progression from 0.1 to 10 divided by the median absolute
+                   coefficient of the Hamiltonian.
+            replicas_per_temperature: Number of independent replicas at every temperature.
+            num_sweeps: Number of sweeps of every run.
+            num_best: Number of distinct lowest-energy bitstrings that are kept.
+        """
+        if isinstance(hamiltonian, DiagonalEnergyEvaluator):
+            self._evaluator = hamiltonian
+        else:
+            self._evaluator = DiagonalEnergyEvaluator(hamiltonian)
+        coeffs = self._evaluator.coeffs
+        if betas is None:
+            scale = float(np.median(np.abs(coeffs))) if len(coeffs) else 1.0
+            betas = geometric_betas(0.1, 10.0, 16) / scale
+        self._betas = np.sort(np.asarray(betas, dtype=float))
+        self._replicas_per_temperature = replicas_per_temperature
+        self._num_sweeps = num_sweeps
+        self._num_best = num_best
+        self._mask_matrix = np.ascontiguousarray(self._evaluator.masks.T, dtype=float)
+        # Term index: the non-identity terms acting on each qubit.
+        self._qubit_terms = [
+            np.flatnonzero(self._evaluator.masks[:, qubit])
+            for qubit in range(self._evaluator.num_qubits)
+        ]
+        self._qubit_coeffs = [coeffs[terms] for terms in self._qubit_terms]
+
+    @property
+    def betas(self) -> np.ndarray:
+        """Returns the inverse temperatures of the ladder."""
+        return self._betas
+
+    @property
+    def num_replicas(self) -> int:
+        """Returns the total number of replicas."""
+        return len(self._betas) * self._replicas_per_temperature
+
+    def run(
+        self,
+        seed: Optional[Union[int, np.random.SeedSequence]] = None,
+        initial_bitstrings: Optional[Bitstrings] = None,
+    ) -> ParallelTemperingResult:
+        """
+        Runs parallel tempering.
+
+        Args:
+            seed: Seed of the random number generator.
+            initial_bitstrings: Initial states of the replicas, repeated as needed. Random by
+                                default.
+
+        Returns:
+            The final states of the coldest replicas and the best bitstrings visited.
+        """
+        rng = np.random.default_rng(seed)
+        num_temperatures = len(self._betas)
+        bits = self._initial_bits(rng, initial_bitstrings)
+        signs, energies = self._init_signs(bits)
+        # replica_at[c, t] is the replica of copy c that currently has temperature t.
+        replica_at = np.arange(self.num_replicas).reshape(-1, num_temperatures)
+        replica_betas = np.empty(self.num_replicas)
+        replica_betas[replica_at] = self._betas
+        swaps_accepted = np.zeros(max(num_temperatures - 1, 0))
+        swaps_proposed = np.zeros(max(num_temperatures - 1, 0))
+        best: Dict[bytes, float] = {}
+
+        for sweep in range(self._num_sweeps):
+            self._sweep(rng, bits, signs, energies, replica_betas)
+            self._record_best(best, bits, energies)
+            if num_temperatures > 1:
+                pairs = np.arange(sweep % 2, num_temperatures - 1, 2)
+                lower = replica_at[:, pairs]
+                upper = replica_at[:, pairs + 1]
+                log_acceptance = (self._betas[pairs] - self._betas[pairs + 1]) * (
+                    energies[lower] - energies[upper]
+                )
+                accept = np.log(rng.random(lower.shape)) < log_acceptance
+                replica_at[:, pairs] = np.where(accept, upper, lower)
+                replica_at[:, pairs + 1] = np.where(accept, lower, upper)
+                replica_betas[replica_at] = self._betas
+                swaps_accepted[pairs] += accept.sum(axis=0)
+                swaps_proposed[pairs] += accept.shape[0]
+
+        swap_acceptance = np.divide(
+            swaps_accepted,
+            swaps_proposed,
+            out=np.zeros_like(swaps_accepted),
+            where=swaps_proposed > 0,
+        )
+        return self._make_result(best, bits[replica_at[:, -1]], swap_acceptance)
+
+    def anneal(
+        self,
+        beta_schedule: Sequence[float],
+        seed: Optional[Union[int, np.random.SeedSequence]] = None,
+        initial_bitstrings: Optional[Bitstrings] = None,
+    ) -> ParallelTemperingResult:
+        """
+        Runs simulated annealing on all replicas independently.
+
+        Args:
+            beta_schedule: Inverse temperature of every sweep.
+            seed: Seed of the random number generator.
+            initial_bitstrings: Initial states of the replicas, repeated as needed. Random by
+                                default.
+
+        Returns:
+            The final states of all replicas and the best bitstrings visited.
+        """
+        rng = np.random.default_rng(seed)
+        bits = self._initial_bits(rng, initial_bitstrings)
+        signs, energies = self._init_signs(bits)
+        replica_betas = np.empty(self.num_replicas)
+        best: Dict[bytes, float] = {}
+        for beta in beta_schedule:
+            replica_betas.fill(beta)
+            self._sweep(rng, bits, signs, energies, replica_betas)
+            self._record_best(best, bits, energies)
+        return self._make_result(best, bits, np.zeros(0))
+
+    def run_chains(
+        self,
+        num_chains: int,
+        seed: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ) -> ParallelTemperingResult:
+        """
+        Runs independent parallel tempering chains in separate processes and merges their results.
+
+        Args:
+            num_chains: Number of independent runs.
+            seed: Seed from which the seeds of all runs are derived.
+            max_workers: Maximal number of processes. By default, the number of processors.
+
+        Returns:
+            The merged counts and best bitstrings of all runs. Swap acceptance rates are averaged.
+        """
+        seeds = np.random.SeedSequence(seed).spawn(num_chains)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(self.run, seeds))
+
+        counts: collections.Counter = collections.Counter()
+        best: Dict[str, float] = {}
+        for result in results:
+            counts.update(result.counts)
+            best.update(zip(result.best_bitstrings, result.best_energies))
+        ranked = sorted(best.items(), key=lambda item: item[1])[: self._num_best]
+        return ParallelTemperingResult(
+            counts=dict(counts),
+            best_bitstrings=[bitstring for bitstring, _ in ranked],
+            best_energies=np.array([energy for _, energy in ranked]),
+            swap_acceptance=np.mean([result.swap_acceptance for result in results], axis=0),
+        )
+
+    def _initial_bits(
+        self, rng: np.random.Generator, initial_bitstrings: Optional[Bitstrings]
+    ) -> np.ndarray:
+        num_qubits = self._evaluator.num_qubits
+        if initial_bitstrings is None:
+            return rng.integers(0, 2, size=(self.num_replicas, num_qubits), dtype=np.uint8)
+        initial = bitstrings_to_array(initial_bitstrings, num_qubits)
+        repeats = -(-self.num_replicas // len(initial))
+        return np.tile(initial, (repeats, 1))[: self.num_replicas].copy()
+
+    def _init_signs(self, bits: np.ndarray):
+        """Returns the sign of every term for every replica and the energies of the replicas."""
+        parities = bits.astype(float) @ self._mask_matrix
+        np.fmod(parities, 2.0, out=parities)
+        signs = 1.0 - 2.0 * parities
+        energies = self._evaluator.offset + signs @ self._evaluator.coeffs
+        return signs, energies
+
+    def _sweep(
+        self,
+        rng: np.random.Generator,
+        bits: np.ndarray,
+        signs: np.ndarray,
+        energies: np.ndarray,
+        replica_betas: np.ndarray,
+    ) -> None:
+        for qubit in rng.permutation(len(self._qubit_terms)):
+            terms = self._qubit_terms[qubit]
+            if len(terms) == 0:
+                continue
+            # Flipping the qubit flips the sign of every term acting on it.
+            delta = -2.0 * (signs[:, terms] @ self._qubit_coeffs[qubit])
+            accept = rng.random(len(delta)) < np.exp(-replica_betas * np.maximum(delta, 0.0))
+            flipped = np.flatnonzero(accept)
+            if len(flipped) == 0:
+                continue
+            signs[np.ix_(flipped, terms)] *= -1.0
+            bits[flipped, qubit] ^= 1
+            energies[flipped] += delta[flipped]
+
+    def _record_best(
+        self, best: Dict[bytes, float], bits: np.ndarray, energies: np.ndarray
+    ) -> None:
+        threshold = max(best.values()) if len(best) >= self._num_best else np.inf
+        for replica in np.flatnonzero(energies < threshold):
+            best[np.packbits(bits[replica]).tobytes()] = float(energies[replica])
+        if len(best) > self._num_best:
+            kept = sorted(best.items(), key=lambda item: item[1])[: self._num_best]
+            best.clear()
+            best.update(kept)
+
+    def _make_result(
+        self, best: Dict[bytes, float], final_bits: np.ndarray, swap_acceptance: np.ndarray
+    ) -> ParallelTemperingResult:
+        num_qubits = self._evaluator.num_qubits
+        counts = collections.Counter(self._to_bitstrings(final_bits))
+        best_bits = np.array(
+            [np.unpackbits(np.frombuffer(key, dtype=np.uint8), count=num_qubits) for key in best],
+            dtype=np.uint8,
+        ).reshape(-1, num_qubits)
+        # Energies updated incrementally may drift, so the best bitstrings are re-evaluated.
+        best_energies = self._evaluator.energies(best_bits)
+        order = np.argsort(best_energies, kind="stable")
+        best_bitstrings = self._to_bitstrings(best_bits[order])
+        return ParallelTemperingResult(
+            counts=dict(counts),
+            best_bitstrings=best_bitstrings,
+            best_energies=best_energies[order],
+            swap_acceptance=swap_acceptance,
+        )
+
+    @staticmethod
+    def _to_bitstrings(bits: np.ndarray) -> List[str]:
+        return ["".join(map(str, row[::-1])) for row in bits]
@@ -0,0 +1,361 @@
+# This code is licensed under the Apache License, Version 2.0.
+# You may obtain a copy of this license at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""A replica-exchange Monte Carlo solver of the lattice protein folding problem with pull moves."""
+import itertools
+import math
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..peptide.Peptide import Peptide
+from .classical_folding_result import ClassicalFoldingResult
+from .lattice import (
+    TURN_VECTORS,
+    add_sites,
+    are_bonded,
+    chiral_side_turn,
+    contact_energy,
+    fold_positions,
+)
+from .parallel_tempering import geometric_betas
+
+Site = Tuple[int, int, int]
+
+_STEP_TURNS = {vector: turn for turn, vector in enumerate(TURN_VECTORS)}
+
+# Relabels turns by the reflection that swaps turns 2 and 3, as ProteinShapeDecoder assumes when
+# the third turn is encoded with a single bit.
+_MIRROR = (0, 1, 3, 2)
+
+
+def _build_canonical_permutations() -> Dict[Tuple[int, int], Tuple[int, ...]]:
+    """Returns, for every pair of distinct first turns, the even permutation of turn labels that
+    maps them to the fixed turns (1, 0). Even permutations are rotations of the lattice, which
+    preserve contacts as well as chirality."""
+    permutations = {}
+    for permutation in itertools.permutations(range(4)):
+        inversions = sum(
+            permutation[i] > permutation[j] for i in range(4) for j in range(i + 1, 4)
+        )
+        if inversions % 2 == 0:
+            first, second = permutation.index(1), permutation.index(0)
+            permutations[(first, second)] = permutation
+    return permutations
+
+
+_CANONICAL_PERMUTATIONS = _build_canonical_permutations()
+
+
+class PullMoveSolver:
+    """Folds a peptide by Monte Carlo sampling in coordinate space. Every replica holds the
+    lattice sites of the main chain; side beads follow from the main turns by chirality. Moves
+    keep the chain connected and on its sublattices:
+
+    * end moves place a terminal bead on another site next to its neighbor in the chain,
+    * crankshaft moves rebuild two consecutive interior beads between fixed neighbors,
+    * pull moves place a bead next to one of its chain neighbors, place up to two further beads
+      on free sites and let the rest of the chain slide two sites along its own path until it is
+      connected again.
+
+    Replicas at neighboring temperatures of a ladder exchange their conformations after every
+    sweep. The best conformations are rotated into the encoding of
+    :class:`~Protein_Folding.utils.ProteinShapeDecoder` and returned as bitstrings.
+    """
+
+    def __init__(
+        self,
+        peptide: Peptide,
+        pair_energies: np.ndarray,
+        betas: Optional[Sequence[float]] = None,
+        num_sweeps: int = 1000,
+        num_best: int = 8,
+    ):
+        """
+        Args:
+            peptide: The peptide to be folded.
+            pair_energies: Pair energies of shape (N + 1, 2, N + 1, 2), e.g.
+                           :attr:`~Protein_Folding.ProteinFoldingProblem.pair_energies`.
+            betas: Increasing inverse temperatures of the replicas. By default, 8 temperatures in
+                   geometric progression from 0.2 to 5 divided by the mean absolute pair energy.
+            num_sweeps: Number of sweeps. A sweep proposes N moves to every replica.
+            num_best: Number of distinct best conformations that are returned.
+        """
+        self._peptide = peptide
+        self._side_chain_hot_vector = peptide.get_side_chain_hot_vector()
+        self._main_chain_len = len(self._side_chain_hot_vector)
+        self._side_indices = [
+            index for index, has_side in enumerate(self._side_chain_hot_vector) if has_side
+        ]
+        num_beads = 2 * self._main_chain_len
+        # Bead ids: k for main bead k and N + k for the side bead of main bead k.
+        self._contact_table = [[0.0] * num_beads for _ in range(num_beads)]
+        for first, second in itertools.combinations(range(num_beads), 2):
+            first_bead = (first % self._main_chain_len, first // self._main_chain_len)
+            second_bead = (second % self._main_chain_len, second // self._main_chain_len)
+            if not are_bonded(first_bead, second_bead):
+                energy = contact_energy(pair_energies, first_bead, second_bead)
+                self._contact_table[first][second] = energy
+                self._contact_table[second][first] = energy
+        if betas is None:
+            nonzero = np.abs(pair_energies[pair_energies != 0])
+            scale = float(nonzero.mean()) if len(nonzero) else 1.0
+            betas = geometric_betas(0.2, 5.0, 8) / scale
+        self._betas = np.sort(np.asarray(betas, dtype=float))
+        self._num_sweeps = num_sweeps
+        self._num_best = num_best
+        self.swap_acceptance: Optional[np.ndarray] = None
+
+    def solve(
+        self, seed: Optional[Union[int, np.random.SeedSequence]] = None
+    ) -> List[ClassicalFoldingResult]:
+        """
+        Runs replica-exchange Monte Carlo.
+
+        Args:
+            seed: Seed of the random number generator.
+
+        Returns:
+            The distinct best conformations found, in ascending order of energy. Their
+            ``bitstring`` holds the conformation qubits read by
+            :class:`~Protein_Folding.ProteinFoldingResult`.
+        """
+        rng = np.random.default_rng(seed)
+        num_replicas = len(self._betas)
+        states = [self._random_chain(rng) for _ in range(num_replicas)]
+        energies = [self._energy(state) for state in states]
+        best: Dict[str, Tuple[float, List[int], List[Optional[int]]]] = {}
+        for state, energy in zip(states, energies):
+            self._record(best, state, energy)
+        swaps_accepted = np.zeros(max(num_replicas - 1, 0))
+
+        for sweep in range(self._num_sweeps):
+            for replica in range(num_replicas):
+                for _ in range(self._main_chain_len):
+                    candidate = self._propose(rng, states[replica])
+                    if candidate is None:
+                        continue
+                    energy = self._energy(candidate)
+                    if energy is None:
+                        continue
+                    delta = energy - energies[replica]
+                    if delta <= 0 or rng.random() < math.exp(-self._betas[replica] * delta):
+                        states[replica], energies[replica] = candidate, energy
+                        self._record(best, candidate, energy)
+
+            for lower in range(sweep % 2, num_replicas - 1, 2):
+                upper = lower + 1
+                log_acceptance = (self._betas[lower] - self._betas[upper]) * (
+                    energies[lower] - energies[upper]
+                )
+                if log_acceptance >= 0 or rng.random() < math.exp(log_acceptance):
+                    states[lower], states[upper] = states[upper], states[lower]
+                    energies[lower], energies[upper] = energies[upper], energies[lower]
+                    swaps_accepted[lower] += 1
+
+        self.swap_acceptance = swaps_accepted / max(1, self._num_sweeps // 2)
+        ranked = sorted(best.values(), key=lambda item: item[0])
+        return [
+            ClassicalFoldingResult(self._peptide, energy, main_turns, side_turns)
+            for energy, main_turns, side_turns in ranked
+        ]
+
+    def _energy(self, sites: Sequence[Site]) -> Optional[float]:
+        """Returns the contact energy of a main chain with its side beads, or None if beads
+        overlap."""
+        occupied: Dict[Site, int] = {}
+        for index, site in enumerate(sites):
+            if site in occupied:
+                return None
+            occupied[site] = index
+        turns = self._turns(sites)
+        for index in self._side_indices:
+            side_turn = chiral_side_turn(index, turns[index - 1], turns[index])
+            site = add_sites(sites[index], side_turn, (-1) ** index)
+            if site in occupied:
+                return None
+            occupied[site] = self._main_chain_len + index
+
+        energy = 0.0
+        for site, bead in occupied.items():
+            # The side bead of main bead k lies on the sublattice of main bead k + 1.
+            is_side, index = divmod(bead, self._main_chain_len)
+            sign = (-1) ** (index + is_side)
+            table = self._contact_table[bead]
+            for turn in range(4):
+                other = occupied.get(add_sites(site, turn, sign))
+                if other is not None and other > bead:
+                    energy += table[other]
+        return energy
+
+    def _turns(self, sites: Sequence[Site]) -> List[int]:
+        turns = []
+        for index in range(len(sites) - 1):
+            sign = (-1) ** index
+            step = tuple(
+                sign * (upper - lower) for lower, upper in zip(sites[index], sites[index + 1])
+            )
+            turns.append(_STEP_TURNS[step])
+        return turns
+
+    def _neighbors(self, site: Site, index: int) -> List[Site]:
+        """Returns the lattice neighbors of the site of main bead ``index``."""
+        return [add_sites(site, turn, (-1) ** index) for turn in range(4)]
+
+    @staticmethod
+    def _adjacent(first: Site, second: Site) -> bool:
+        return sum((a - b) ** 2 for a, b in zip(first, second)) == 3
+
+    def _propose(self, rng: np.random.Generator, sites: List[Site]) -> Optional[List[Site]]:
+        move = rng.integers(3)
+        if move == 0:
+            return self._end_move(rng, sites)
+        if move == 1:
+            return self._crankshaft_move(rng, sites)
+        index = int(rng.integers(self._main_chain_len))
+        direction = 1 if rng.random() < 0.5 else -1
+        return self._pull_move(rng, sites, index, direction)
+
+    def _end_move(self, rng: np.random.Generator, sites: List[Site]) -> Optional[List[Site]]:
+        end, anchor = (0, 1) if rng.random() < 0.5 else (len(sites) - 1, len(sites) - 2)
+        occupied = set(sites)
+        candidates = [
+            site for site in self._neighbors(sites[anchor], anchor) if site not in occupied
+        ]
+        if not candidates:
+            return None
+        new_sites = list(sites)
+        new_sites[end] = candidates[rng.integers(len(candidates))]
+        return new_sites
+
+    def _crankshaft_move(
+        self, rng: np.random.Generator, sites: List[Site]
+    ) -> Optional[List[Site]]:
+        if self._main_chain_len < 4:
+            return None
+        index = int(rng.integers(1, self._main_chain_len - 2))
+        occupied = set(sites) - {sites[index], sites[index + 1]}
+        candidates = []
+        for first in self._neighbors(sites[index - 1], index - 1):
+            if first in occupied:
+                continue
+            for second in self._neighbors(first, index):
+                if (
+                    second not in occupied
+                    and self._adjacent(second, sites[index + 2])
+                    and (first, second) != (sites[index], sites[index + 1])
+                ):
+                    candidates.append((first, second))
+        if not candidates:
+            return None
+        new_sites = list(sites)
+        new_sites[index], new_sites[index + 1] = candidates[rng.integers(len(candidates))]
+        return new_sites
+
+    def _pull_move(
+        self, rng: np.random.Generator, sites: List[Site], index: int, direction: int
+    ) -> Optional[List[Site]]:
+        """Moves bead ``index`` next to bead ``index - direction`` and pulls the beads
+        ``index + direction``, ``index + 2 * direction``, ... after it."""
+        anchor = index - direction
+        if not 0 <= anchor < len(sites):
+            return None
+        occupied = set(sites)
+        new_sites = list(sites)
+        previous, previous_index = sites[anchor], anchor
+        for offset in range(3):
+            bead = index + offset * direction
+            following = bead + direction
+            candidates = [
+                site
+                for site in self._neighbors(previous, previous_index)
+                if site not in occupied
+            ]
+            if offset == 2 and 0 <= following < len(sites):
+                # The rest of the chain slides two sites, so bead ``following`` moves to the old
+                # site of bead ``index + direction`` unless it is already connected.
+                candidates = [
+                    site
+                    for site in candidates
+                    if self._adjacent(site, sites[bead - direction])
+                    or self._adjacent(site, sites[following])
+                ]
+            if not candidates:
+                return None
+            site = candidates[rng.integers(len(candidates))]
+            new_sites[bead] = site
+            occupied.add(site)
+            if not 0 <= following < len(sites) or self._adjacent(sites[following], site):
+                return new_sites
+            previous, previous_index = site, bead
+
+        bead = index + 3 * direction
+        while 0 <= bead < len(sites):
+            if self._adjacent(sites[bead], new_sites[bead - direction]):
+                break
+            new_sites[bead] = sites[bead - 2 * direction]
+            bead += direction
+        return new_sites
+
+    def _random_chain(self, rng: np.random.Generator) -> List[Site]:
+        """Grows a random conformation without overlaps by depth-first search."""
+        sites: List[Site] = [(0, 0, 0)]
+
+        def grow() -> bool:
+            if len(sites) == self._main_chain_len:
+                return self._energy(sites) is not None
+            index = len(sites) - 1
+            for turn in rng.permutation(4):
+                site = add_sites(sites[-1], int(turn), (-1) ** index)
+                if site in sites:
+                    continue
+                sites.append(site)
+                if grow():
+                    return True
+                sites.pop()
+            return False
+
+        grow()
+        return sites
+
+    def _record(
+        self,
+        best: Dict[str, Tuple[float, List[int], List[Optional[int]]]],
+        sites: List[Site],
+        energy: float,
+    ) -> None:
+        if len(best) >= self._num_best and energy >= max(item[0] for item in best.values()):
+            return
+        encoded = self._encode(sites, energy)
+        if encoded is None:
+            return
+        result = ClassicalFoldingResult(self._peptide, *encoded)
+        best[result.bitstring] = encoded
+        if len(best) > self._num_best:
+            worst = max(best, key=lambda bitstring: best[bitstring][0])
+            del best[worst]
+
+    def _encode(
+        self, sites: List[Site], energy: float
+    ) -> Optional[Tuple[float, List[int], List[Optional[int]]]]:
+        """Rotates a conformation so that its first turns are the fixed turns of the encoding."""
+        turns = self._turns(sites)
+        permutation = _CANONICAL_PERMUTATIONS[(turns[0], turns[1])]
+        main_turns = [permutation[turn] for turn in turns]
+        if (
+            len(main_turns) > 2
+            and not self._side_chain_hot_vector[1]
+            and main_turns[2] == 2
+        ):
+            # The mirror image is encoded instead. It has the same main chain contacts, but side
+            # beads are placed by chirality again, so its energy is recomputed.
+            main_turns = [_MIRROR[turn] for turn in main_turns]
+            if self._side_indices:
+                main_sites, _ = fold_positions(main_turns, [None] * self._main_chain_len)
+                energy = self._energy(main_sites)
+                if energy is None:
+                    return None
+        side_turns: List[Optional[int]] = [None] * self._main_chain_len
+        for index in self._side_indices:
+            side_turns[index] = chiral_side_turn(index, main_turns[index - 1], main_turns[index])
+        return energy, main_turns, side_turns
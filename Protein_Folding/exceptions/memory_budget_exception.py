@@ -0,0 +1,8 @@
+# This code is licensed under the Apache License, Version 2.0.
+# You may obtain a copy of this license at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""An exception for a memory budget that cannot hold a qubit operator."""
+
+
+class MemoryBudgetException(Exception):
+    """An exception for a memory budget that cannot hold a qubit operator."""
@@ -4,6 +4,7 @@
 # You may obtain a copy of this license at http://www.apache.org/licenses/LICENSE-2.0.
 
 """A class defining a random interaction between beads of a peptide."""
+from typing import Optional
 
 import numpy as np
 from qiskit_algorithms.utils import algorithm_globals
@@ -16,6 +17,14 @@ from .interaction import Interaction
 class RandomInteraction(Interaction):
     """A class defining a random interaction between beads of a peptide."""
 
+    def __init__(self, seed: Optional[int] = None):
+        """
+        Args:
+            seed: Optional seed of the energies. If None, they are drawn from the global
+                ``algorithm_globals.random`` generator.
+        """
+        self._seed = seed
+
     def calculate_energy_matrix(self, residue_sequence: str) -> np.ndarray:
         """
         Calculates an energy matrix for a random interaction.
@@ -27,7 +36,8 @@ class RandomInteraction(Interaction):
             Numpy array of pair energies for amino acids.
         """
         chain_len = len(residue_sequence)
-        pair_energies = -1 - 4 * algorithm_globals.random.random(
+        rng = algorithm_globals.random if self._seed is None else np.random.default_rng(self._seed)
+        pair_energies = -1 - 4 * rng.random(
             (chain_len + 1, 2, chain_len + 1, 2)
         )
         return pair_energies
@@ -5,17 +5,22 @@
 
 """Defines a protein folding problem that can be passed to algorithms."""
 from __future__ import annotations
-from typing import TYPE_CHECKING, List, Union
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
+
+import numpy as np
 from qiskit.quantum_info import Pauli, SparsePauliOp
 from .interactions.interaction import Interaction
 from .penalty_parameters import PenaltyParameters
 from .peptide.Peptide import Peptide
 from .qubit_op_builder import QubitOpBuilder
 from .qubit_utils import qubit_number_reducer
+from .qubit_utils.diagonal_energy import Bitstrings, DiagonalEnergyEvaluator
 from .sampling_problem import SamplingProblem
 
 
 if TYPE_CHECKING:
+    from .classical_solvers.classical_folding_result import ClassicalFoldingResult
+    from .classical_solvers.fold_energy import FoldEvaluation
     from .protein_folding_result import ProteinFoldingResult
 
 
@@ -56,35 +61,162 @@ class ProteinFoldingProblem(SamplingProblem):
             self._peptide, self._pair_energies, self._penalty_parameters
         )
         self._unused_qubits: List[int] = []
+        self._qubit_op: Optional[SparsePauliOp] = None
+        self._energy_evaluator: Optional[DiagonalEnergyEvaluator] = None
 
-    def qubit_op(self) -> Union[SparsePauliOp, Pauli]:
+    def qubit_op(
+        self, memory_budget: Optional[int] = None, spill_dir: Optional[str] = None
+    ) -> Union[SparsePauliOp, Pauli]:
         """
         Builds a qubit operator for the Hamiltonian encoding a protein folding problem. The
         number of qubits needed for optimization is optimized (compressed), if possible.
         To obtain the full qubit operator for a Hamiltonian, use the method `qubit_op_full`.
 
+        Args:
+            memory_budget: If given, the Hamiltonian is built in streaming mode that holds at
+                           most this number of bytes of Pauli terms in memory and flushes the
+                           rest to disk. See :meth:`QubitOpBuilder.build_qubit_op`.
+            spill_dir: Directory used for terms flushed to disk in streaming mode.
+
         Returns:
             A qubit operator for the Hamiltonian encoding a protein folding problem on an
             optimized number of qubits.
+
+        Raises:
+            MemoryBudgetException: if the Hamiltonian does not fit in memory_budget.
         """
         qubit_operator, unused_qubits = qubit_number_reducer.remove_unused_qubits(
-            self._qubit_op_full()
+            self._qubit_op_full(memory_budget, spill_dir)
         )
         self._unused_qubits = unused_qubits
+        self._qubit_op = qubit_operator
+        self._energy_evaluator = None
         return qubit_operator
 
-    def _qubit_op_full(self) -> Union[Pauli, SparsePauliOp]:
+    def _qubit_op_full(
+        self, memory_budget: Optional[int] = None, spill_dir: Optional[str] = None
+    ) -> Union[Pauli, SparsePauliOp]:
         """
         Builds a full qubit operator for the Hamiltonian encoding a protein folding problem. Full
         means that the number of qubits needed for optimization is not optimized and may be
         larger that necessary. To ensure the optimal number of qubits, use the method `qubit_op`.
 
+        Args:
+            memory_budget: Memory budget in bytes for streaming mode, or ``None``.
+            spill_dir: Directory used for terms flushed to disk in streaming mode.
+
         Returns:
             A qubit operator for the Hamiltonian encoding a protein folding problem.
         """
-        qubit_operator = self._qubit_op_builder.build_qubit_op()
+        qubit_operator = self._qubit_op_builder.build_qubit_op(memory_budget, spill_dir)
         return qubit_operator
 
+    @property
+    def energy_evaluator(self) -> DiagonalEnergyEvaluator:
+        """Returns an evaluator of bitstring energies for the compressed qubit operator. The
+        operator built by the last call of :meth:`qubit_op` is used; it is built first if
+        necessary."""
+        if self._energy_evaluator is None:
+            if self._qubit_op is None:
+                self.qubit_op()
+            self._energy_evaluator = DiagonalEnergyEvaluator(self._qubit_op)
+        return self._energy_evaluator
+
+    def evaluate_energies(self, bitstrings: Bitstrings) -> np.ndarray:
+        """
+        Evaluates the energies of a batch of bitstrings measured on the compressed qubit operator.
+        Since the Hamiltonian is diagonal, the energy of a bitstring is a signed sum of its
+        coefficients, which is computed for the whole batch with vectorized parity computations.
+
+        Args:
+            bitstrings: A dictionary of counts keyed by bitstrings (e.g. from
+                        :class:`~Qiskit_VQE.StateCalculator`), an iterable of bitstrings, an
+                        iterable of packed integers (bit i is qubit i) or a uint8 matrix whose
+                        column i holds qubit i.
+
+        Returns:
+            An array of energies, one per bitstring. For a dictionary the energies follow the
+            order of its keys.
+        """
+        return self.energy_evaluator.energies(bitstrings)
+
+    def energy_spectrum(
+        self, dtype: np.dtype = np.float64, filename: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Computes the energies of all basis states of the compressed qubit operator with a fast
+        Walsh-Hadamard transform over its Z-term coefficients, in O(n * 2^n) time. This is
+        feasible for up to roughly 30 compressed qubits.
+
+        Args:
+            dtype: Floating point type of the result, ``np.float64`` or ``np.float32``.
+            filename: If given, the energies are written to a memory-mapped ``.npy`` file at this
+                      path instead of being held in memory.
+
+        Returns:
+            An array of length 2^n whose entry x is the energy of the basis state x, in the
+            ordering of a Qiskit statevector.
+        """
+        return self.energy_evaluator.full_diagonal(dtype=dtype, filename=filename)
+
+    def lowest_energy_states(
+        self,
+        k: int = 1,
+        dtype: np.dtype = np.float64,
+        filename: Optional[str] = None,
+    ) -> Tuple[np.ndarray, List[str]]:
+        """
+        Finds the exact k lowest energies of the compressed qubit operator and their bitstrings,
+        e.g. to obtain the ground state and the energy gap.
+
+        Args:
+            k: Number of states to return.
+            dtype: Floating point type of the energy spectrum.
+            filename: If given, the energy spectrum is memory-mapped to a file at this path.
+
+        Returns:
+            A tuple of the k lowest energies in ascending order and the corresponding bitstrings,
+            which can be passed to :meth:`interpret`.
+        """
+        diagonal = self.energy_spectrum(dtype=dtype, filename=filename)
+        return self.energy_evaluator.lowest_energies(k, diagonal)
+
+    def solve_exactly(self) -> "ClassicalFoldingResult":
+        """
+        Finds a fold of minimal contact energy with the branch-and-bound search of
+        :class:`~Protein_Folding.classical_solvers.ExactFoldingSolver`, without building the
+        qubit operator. This is practical for main chains of up to about 14 residues.
+
+        Returns:
+            The optimal fold, whose ``bitstring`` holds its conformation qubits and whose
+            ``to_protein_folding_result`` method returns a
+            :class:`~Protein_Folding.ProteinFoldingResult`.
+        """
+        # pylint: disable=import-outside-toplevel
+        from .classical_solvers.exact_solver import ExactFoldingSolver
+
+        return ExactFoldingSolver(self._peptide, self._pair_energies).solve()
+
+    def evaluate_folds(self, bitstrings: Bitstrings) -> "FoldEvaluation":
+        """
+        Decodes a batch of bitstrings into folds and re-scores them from their lattice coordinates,
+        independently of the qubit operator. Comparing the result with :meth:`evaluate_energies`
+        checks what the Hamiltonian encodes.
+
+        Args:
+            bitstrings: A dictionary of counts keyed by bitstrings, an iterable of bitstrings or a
+                        uint8 matrix whose column i holds qubit i.
+
+        Returns:
+            The contact energies, overlaps and chirality violations of all folds, see
+            :class:`~Protein_Folding.classical_solvers.FoldEnergyEvaluator`.
+        """
+        # pylint: disable=import-outside-toplevel
+        from .classical_solvers.fold_energy import FoldEnergyEvaluator
+
+        evaluator = FoldEnergyEvaluator(self._peptide, self._pair_energies, self._unused_qubits)
+        return evaluator.evaluate(bitstrings)
+
     def interpret(self, binary_probs: dict) -> "ProteinFoldingResult":
         """
         Interprets a binary string probability distribution, in the context of this problem,
@@ -122,3 +254,8 @@ class ProteinFoldingProblem(SamplingProblem):
     def peptide(self) -> Peptide:
         """Returns the peptide defining the protein subject to the folding problem."""
         return self._peptide
+
+    @property
+    def pair_energies(self) -> np.ndarray:
+        """Returns the pair energies of shape (N + 1, 2, N + 1, 2) computed by the interaction."""
+        return self._pair_energies
@@ -4,7 +4,8 @@
 # You may obtain a copy of this license at http://www.apache.org/licenses/LICENSE-2.0.
 
 """Builds qubit operators for all Hamiltonian terms in the protein folding problem."""
-from typing import Union
+import collections
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
 import numpy as np
 
 from qiskit.quantum_info import Operator, SparsePauliOp, Pauli
@@ -17,7 +18,8 @@ from .exceptions.invalid_side_chain_exception import (
 from .exceptions.invalid_size_exception import InvalidSizeException
 from .penalty_parameters import PenaltyParameters
 from .peptide.pauli_ops_builder import _build_full_identity
-from .qubit_utils.qubit_fixing import _fix_qubits
+from .qubit_utils.qubit_fixing import _BlockQubitFixer, _fix_qubits
+from .qubit_utils.term_accumulator import TermAccumulator, estimate_operator_bytes
 from .peptide.beads.base_bead import BaseBead
 from .peptide.Peptide import Peptide
 
@@ -49,18 +51,42 @@ class QubitOpBuilder:
         self._has_side_chain_second_bead = (
             _side_chain_hot_vector[1] if len(_side_chain_hot_vector) > 1 else False
         )
-
-    def build_qubit_op(self) -> Union[SparsePauliOp, Pauli]:
+        self._indicator_functions: Dict[BaseBead, Tuple[SparsePauliOp, ...]] = {}
+        self._indicator_products: Dict[Tuple, SparsePauliOp] = {}
+        self._turn_operators: Dict[Tuple[BaseBead, BaseBead], SparsePauliOp] = {}
+        self._cache_stats: collections.Counter = collections.Counter()
+
+    @property
+    def cache_stats(self) -> Dict[str, int]:
+        """Returns hit and miss counters of the caches of indicator functions, pairwise indicator
+        products and turn operators kept by this builder."""
+        return dict(self._cache_stats)
+
+    def build_qubit_op(
+        self, memory_budget: Optional[int] = None, spill_dir: Optional[str] = None
+    ) -> Union[SparsePauliOp, Pauli]:
         """
         Builds a qubit operator for a total Hamiltonian for a protein folding problem. It includes
         8 terms responsible for chirality, geometry and nearest neighbors interactions.
 
+        Args:
+            memory_budget: If given, the operator is built in streaming mode: Hamiltonian terms
+                           are summed by a :class:`~.TermAccumulator`, which flushes terms to disk
+                           instead of holding more than this number of bytes in memory. Most
+                           terms are generated in blocks; the chirality and 1st neighbor (bbbb)
+                           terms are built whole and are not bounded by the budget (see
+                           :meth:`_build_qubit_op_streaming`).
+            spill_dir: Directory used for terms flushed to disk in streaming mode. Defaults to
+                       the temporary directory of the system.
+
         Returns:
             A total Hamiltonian for the protein folding problem.
 
         Raises:
             InvalidSizeException: if chains of invalid/incompatible sizes provided.
             InvalidSideChainException: if side chains on forbidden indices provided.
+            MemoryBudgetException: if a summed term or the final operator does not fit in
+                memory_budget.
         """
         side_chain = self._peptide.get_side_chain_hot_vector()
         main_chain_len = len(self._peptide.get_main_chain)
@@ -76,6 +102,9 @@ class QubitOpBuilder:
         num_qubits = 4 * pow(main_chain_len - 1, 2)
         full_id = _build_full_identity(num_qubits)
 
+        if memory_budget is not None:
+            return self._build_qubit_op_streaming(full_id, memory_budget, spill_dir)
+
         # 1. Chiral Constraint
         h_chiral = self._create_h_chiral()
         if h_chiral != 0:
@@ -109,12 +138,124 @@ class QubitOpBuilder:
 
         return h_total.simplify()
 
+    def _build_qubit_op_streaming(
+        self, full_id: SparsePauliOp, memory_budget: int, spill_dir: Optional[str]
+    ) -> SparsePauliOp:
+        """
+        Builds the total Hamiltonian under a memory budget, with the same result as
+        :meth:`build_qubit_op`. Qubits are fixed at the same aggregation points and on the same
+        (unpadded) operators as there:
+
+        - terms whose qubits are fixed once on their sum (back, short, scsc, bbsc and scbb) are
+          streamed block by block through a :class:`_BlockQubitFixer`;
+        - terms whose running sum is fixed after every block (chiral and bbbb) are built as a
+          whole, one at a time. Every fix there clears terms at the start of the running sum and
+          pulls later terms forward, so the result depends on the whole ordered running sum, and
+          these terms are not bounded by the memory budget. The accumulator checks the budget as
+          they are added, so a bbbb term that cannot fit fails before the remaining terms are
+          built. The chirality term is padded and added in slices, so that its padded copy is
+          never held as a whole.
+
+        Terms acting on conformation qubits only are then tensored with the identity on contact
+        qubits.
+
+        Args:
+            full_id: The identity on all contact qubits.
+            memory_budget: Memory budget in bytes.
+            spill_dir: Directory used for terms flushed to disk.
+
+        Returns:
+            A total Hamiltonian for the protein folding problem.
+        """
+        num_conformation_qubits = 4 * (len(self._peptide.get_main_chain) - 1)
+        num_qubits = full_id.num_qubits + num_conformation_qubits
+        # Terms per padded slice, a quarter of the budget as for the buffer of the accumulator.
+        slice_len = max(1, memory_budget // (4 * estimate_operator_bytes(1, num_qubits)))
+
+        with TermAccumulator(num_qubits, memory_budget, spill_dir) as accumulator:
+
+            def add(operator, pad=False):
+                if isinstance(operator, int):
+                    return
+                if not pad:
+                    accumulator.add(operator)
+                    return
+                for start in range(0, len(operator), slice_len):
+                    accumulator.add(full_id ^ operator[start : start + slice_len])
+
+            def add_fixed_blocks(blocks, pad=False):
+                fixer = _BlockQubitFixer(self._has_side_chain_second_bead)
+                for block in blocks:
+                    add(fixer.fix(block), pad)
+
+            add(self._create_h_chiral(), pad=True)
+            add_fixed_blocks(self._iter_h_back(), pad=True)
+            add_fixed_blocks(self._iter_h_short(), pad=True)
+            if self._penalty_parameters.penalty_1:
+                add_fixed_blocks(self._iter_h_scsc())
+                add(self._create_h_bbbb())
+                bbsc_fixer = _BlockQubitFixer(self._has_side_chain_second_bead)
+                scbb_fixer = _BlockQubitFixer(self._has_side_chain_second_bead)
+                for h_bbsc, h_scbb in self._iter_h_bbsc_and_h_scbb():
+                    add(bbsc_fixer.fix(h_bbsc))
+                    add(scbb_fixer.fix(h_scbb))
+            return accumulator.to_operator()
+
+
+    def _get_indicator_functions(self, bead: BaseBead) -> Tuple[SparsePauliOp, ...]:
+        """
+        Returns the turn indicator functions of a bead, building them once per bead.
+
+        Args:
+            bead: A bead of the peptide.
+
+        Returns:
+            A tuple of all turn indicator functions for the bead.
+        """
+        indicator_functions = self._indicator_functions.get(bead)
+        if indicator_functions is None:
+            self._cache_stats["indicator_function_misses"] += 1
+            indicator_functions = bead.indicator_functions
+            self._indicator_functions[bead] = indicator_functions
+        else:
+            self._cache_stats["indicator_function_hits"] += 1
+        return indicator_functions
+
+    def _get_indicator_product(
+        self, lower_bead: BaseBead, lower_turn: int, upper_bead: BaseBead, upper_turn: int
+    ) -> SparsePauliOp:
+        """
+        Returns the product of two turn indicator functions, cached per ordered pair of factors.
+        The product is always built as ``lower @ upper``: both orders give the same operator, but
+        list its terms differently, which matters to :func:`_fix_qubits`.
+
+        Args:
+            lower_bead: A bead with a smaller index in the chain.
+            lower_turn: Turn index of the indicator function of the lower bead.
+            upper_bead: A bead with a bigger index in the chain.
+            upper_turn: Turn index of the indicator function of the upper bead.
+
+        Returns:
+            A product of the two indicator functions.
+        """
+        key = (lower_bead, lower_turn, upper_bead, upper_turn)
+        product = self._indicator_products.get(key)
+        if product is None:
+            self._cache_stats["indicator_product_misses"] += 1
+            product = (
+                self._get_indicator_functions(lower_bead)[lower_turn]
+                @ self._get_indicator_functions(upper_bead)[upper_turn]
+            )
+            self._indicator_products[key] = product
+        else:
+            self._cache_stats["indicator_product_hits"] += 1
+        return product
 
     def _create_turn_operators(
         self, lower_bead: BaseBead, upper_bead: BaseBead
     ) -> Operator:
         """
-        Creates a qubit operator for consecutive turns.
+        Creates a qubit operator for consecutive turns. Operators are cached per pair of beads.
 
         Args:
             lower_bead: A bead with a smaller index in the chain.
@@ -123,27 +264,20 @@ class QubitOpBuilder:
         Returns:
             A qubit operator for consecutive turns.
         """
-        (
-            lower_bead_indic_0,
-            lower_bead_indic_1,
-            lower_bead_indic_2,
-            lower_bead_indic_3,
-        ) = lower_bead.indicator_functions
-
-        (
-            upper_bead_indic_0,
-            upper_bead_indic_1,
-            upper_bead_indic_2,
-            upper_bead_indic_3,
-        ) = upper_bead.indicator_functions
+        turns_operator = self._turn_operators.get((lower_bead, upper_bead))
+        if turns_operator is not None:
+            self._cache_stats["turn_operator_hits"] += 1
+            return turns_operator
+        self._cache_stats["turn_operator_misses"] += 1
 
         turns_operator = _fix_qubits(
-            lower_bead_indic_0 @ upper_bead_indic_0
-            + lower_bead_indic_1 @ upper_bead_indic_1
-            + lower_bead_indic_2 @ upper_bead_indic_2
-            + lower_bead_indic_3 @ upper_bead_indic_3,
+            self._get_indicator_product(lower_bead, 0, upper_bead, 0)
+            + self._get_indicator_product(lower_bead, 1, upper_bead, 1)
+            + self._get_indicator_product(lower_bead, 2, upper_bead, 2)
+            + self._get_indicator_product(lower_bead, 3, upper_bead, 3),
             self._has_side_chain_second_bead,
         ) #create operator
+        self._turn_operators[(lower_bead, upper_bead)] = turns_operator
 
         return turns_operator
 
@@ -157,17 +291,16 @@ class QubitOpBuilder:
             Contribution to Hamiltonian in symbolic notation that penalizes consecutive turns
             along the same axis.
         """
+        return self._sum_blocks(self._iter_h_back())
 
+    def _iter_h_back(self) -> Iterator[Union[SparsePauliOp, Pauli]]:
+        """Yields the terms of the Hamiltonian created by :meth:`_create_h_back`, one pair of
+        consecutive turns at a time."""
         main_chain = self._peptide.get_main_chain
         penalty_back = self._penalty_parameters.penalty_back
 
-        h_back = 0
-
         for i in range(len(main_chain) - 2):
-            h_back += penalty_back * self._create_turn_operators(main_chain[i], main_chain[i + 1])
-
-        h_back = _fix_qubits(h_back, self._has_side_chain_second_bead)
-        return h_back
+            yield penalty_back * self._create_turn_operators(main_chain[i], main_chain[i + 1])
 
     def _create_h_chiral(self) -> Union[SparsePauliOp, Pauli]:
         """
@@ -179,10 +312,13 @@ class QubitOpBuilder:
         Returns:
             Hamiltonian term that imposes the right chirality.
         """
+        return self._sum_blocks(self._iter_h_chiral(), fix_each_block=True)
 
+    def _iter_h_chiral(self) -> Iterator[Union[SparsePauliOp, Pauli]]:
+        """Yields the terms of the Hamiltonian created by :meth:`_create_h_chiral`, one side bead
+        at a time."""
         main_chain = self._peptide.get_main_chain
         main_chain_len = len(main_chain)
-        h_chiral = 0
         # 2 stands for 2 qubits per turn, another 2 stands for main and side qubit register
         full_id = _build_full_identity(2 * 2 * (main_chain_len - 1)) # creating I Op
         for i in range(1, len(main_chain) + 1):
@@ -195,104 +331,79 @@ class QubitOpBuilder:
 
             lower_main_bead = main_chain[i - 2]
 
-            (
-                lower_main_bead_indic_0,
-                lower_main_bead_indic_1,
-                lower_main_bead_indic_2,
-                lower_main_bead_indic_3,
-            ) = lower_main_bead.indicator_functions
-
-            (
-                upper_main_bead_indic_0,
-                upper_main_bead_indic_1,
-                upper_main_bead_indic_2,
-                upper_main_bead_indic_3,
-            ) = upper_main_bead.indicator_functions
-
             (
                 upper_side_bead_indic_0,
                 upper_side_bead_indic_1,
                 upper_side_bead_indic_2,
                 upper_side_bead_indic_3,
-            ) = upper_side_bead.indicator_functions
+            ) = self._get_indicator_functions(upper_side_bead)
 
             turn_coeff = int((1 - (-1) ** i) / 2)
 
-            h_chiral += self._build_chiral_term(
+            h_chiral = self._build_chiral_term(
                 full_id,
-                lower_main_bead_indic_1,
-                lower_main_bead_indic_2,
-                lower_main_bead_indic_3,
+                lower_main_bead,
+                upper_main_bead,
+                (1, 2, 3),
                 turn_coeff,
-                upper_main_bead_indic_1,
-                upper_main_bead_indic_2,
-                upper_main_bead_indic_3,
                 upper_side_bead_indic_0,
             )
             h_chiral += self._build_chiral_term(
                 full_id,
-                lower_main_bead_indic_0,
-                lower_main_bead_indic_3,
-                lower_main_bead_indic_2,
+                lower_main_bead,
+                upper_main_bead,
+                (0, 3, 2),
                 turn_coeff,
-                upper_main_bead_indic_0,
-                upper_main_bead_indic_3,
-                upper_main_bead_indic_2,
                 upper_side_bead_indic_1,
             )
             h_chiral += self._build_chiral_term(
                 full_id,
-                lower_main_bead_indic_0,
-                lower_main_bead_indic_1,
-                lower_main_bead_indic_3,
+                lower_main_bead,
+                upper_main_bead,
+                (0, 1, 3),
                 turn_coeff,
-                upper_main_bead_indic_0,
-                upper_main_bead_indic_1,
-                upper_main_bead_indic_3,
                 upper_side_bead_indic_2,
             )
             h_chiral += self._build_chiral_term(
                 full_id,
-                lower_main_bead_indic_0,
-                lower_main_bead_indic_2,
-                lower_main_bead_indic_1,
+                lower_main_bead,
+                upper_main_bead,
+                (0, 2, 1),
                 turn_coeff,
-                upper_main_bead_indic_0,
-                upper_main_bead_indic_2,
-                upper_main_bead_indic_1,
                 upper_side_bead_indic_3,
             )
-            h_chiral = _fix_qubits(h_chiral, self._has_side_chain_second_bead)
-        return h_chiral
+            yield h_chiral
 
     def _build_chiral_term(
         self,
         full_id,
-        lower_main_bead_indic_b,
-        lower_main_bead_indic_c,
-        lower_main_bead_indic_d,
+        lower_main_bead,
+        upper_main_bead,
+        turn_indices,
         turn_coeff,
-        upper_main_bead_indic_b,
-        upper_main_bead_indic_c,
-        upper_main_bead_indic_d,
         upper_side_bead_indic_a,
     ):
+        """
+        Builds a chirality penalty for one side bead turn. The turn indices (b, c, d) select the
+        indicator functions of the lower and upper main beads. Both product sums are built, also
+        the one whose weight turn_coeff makes 0: their zero terms are listed like any other, and
+        :func:`_fix_qubits` selects terms by their position.
+        """
+        turn_b, turn_c, turn_d = turn_indices
+
+        def product(lower_turn, upper_turn):
+            return self._get_indicator_product(
+                lower_main_bead, lower_turn, upper_main_bead, upper_turn
+            )
+
         return (
             self._penalty_parameters.penalty_chiral
             * (full_id - upper_side_bead_indic_a)
             @ (
                 (1 - turn_coeff)
-                * (
-                    lower_main_bead_indic_b @ upper_main_bead_indic_c
-                    + lower_main_bead_indic_c @ upper_main_bead_indic_d
-                    + lower_main_bead_indic_d @ upper_main_bead_indic_b
-                )
+                * (product(turn_b, turn_c) + product(turn_c, turn_d) + product(turn_d, turn_b))
                 + turn_coeff
-                * (
-                    lower_main_bead_indic_c @ upper_main_bead_indic_b
-                    + lower_main_bead_indic_d @ upper_main_bead_indic_c
-                    + lower_main_bead_indic_b @ upper_main_bead_indic_d
-                )
+                * (product(turn_c, turn_b) + product(turn_d, turn_c) + product(turn_b, turn_d))
             )
         )
 
@@ -305,14 +416,18 @@ class QubitOpBuilder:
             Hamiltonian term corresponding to a 1st neighbor interaction between main/backbone (
             BB) beads.
         """
+        return self._sum_blocks(self._iter_h_bbbb(), fix_each_block=True)
+
+    def _iter_h_bbbb(self) -> Iterator[Union[SparsePauliOp, Pauli]]:
+        """Yields the terms of the Hamiltonian created by :meth:`_create_h_bbbb`, one pair of
+        main beads at a time."""
         penalty_1 = self._penalty_parameters.penalty_1
-        h_bbbb = 0
         main_chain_len = len(self._peptide.get_main_chain)
         for i in range(1, main_chain_len - 3):
             for j in range(i + 5, main_chain_len + 1):
                 if (j - i) % 2 == 0:
                     continue
-                h_bbbb += (self._contact_map.lower_main_upper_main[i][j]) ^ (
+                h_bbbb = (self._contact_map.lower_main_upper_main[i][j]) ^ (
                     self._distance_map.first_neighbor(
                         self._peptide, i, 0, j, 0, penalty_1, self._pair_energies
                     )
@@ -374,8 +489,7 @@ class QubitOpBuilder:
                     )
                 except (IndexError, KeyError):
                     pass
-                h_bbbb = _fix_qubits(h_bbbb, self._has_side_chain_second_bead)
-        return h_bbbb
+                yield h_bbbb
 
     def _create_h_bbsc_and_h_scbb(self) -> Union[SparsePauliOp, Pauli]:
         """
@@ -386,9 +500,23 @@ class QubitOpBuilder:
         Returns:
             Tuple of Hamiltonian terms consisting of backbone and side chain interactions.
         """
-        penalty_1 = self._penalty_parameters.penalty_1
         h_bbsc = 0
         h_scbb = 0
+        for h_bbsc_block, h_scbb_block in self._iter_h_bbsc_and_h_scbb():
+            h_bbsc += h_bbsc_block
+            h_scbb += h_scbb_block
+
+        h_bbsc = _fix_qubits(h_bbsc, self._has_side_chain_second_bead)
+        h_scbb = _fix_qubits(h_scbb, self._has_side_chain_second_bead)
+        return h_bbsc, h_scbb
+
+    def _iter_h_bbsc_and_h_scbb(
+        self,
+    ) -> Iterator[Tuple[Union[int, SparsePauliOp], Union[int, SparsePauliOp]]]:
+        """Yields pairs of terms of the Hamiltonians created by
+        :meth:`_create_h_bbsc_and_h_scbb`, one pair of beads at a time. A term is 0 if the
+        corresponding side bead does not exist."""
+        penalty_1 = self._penalty_parameters.penalty_1
         main_chain_len = len(self._peptide.get_main_chain)
         side_chain = self._peptide.get_side_chain_hot_vector()
         for i in range(1, main_chain_len - 3):
@@ -396,6 +524,8 @@ class QubitOpBuilder:
                 if (j - i) % 2 == 1:
                     continue
 
+                h_bbsc = 0
+                h_scbb = 0
                 if side_chain[j - 1] == 1:
                     h_bbsc += self._contact_map.lower_main_upper_side[i][j] ^ (
                         self._distance_map.first_neighbor(
@@ -486,10 +616,8 @@ class QubitOpBuilder:
                         )
                     except (IndexError, KeyError, TypeError):
                         pass
-
-        h_bbsc = _fix_qubits(h_bbsc, self._has_side_chain_second_bead)
-        h_scbb = _fix_qubits(h_scbb, self._has_side_chain_second_bead)
-        return h_bbsc, h_scbb
+                if side_chain[j - 1] == 1 or side_chain[i - 1] == 1:
+                    yield h_bbsc, h_scbb
 
     def _create_h_scsc(self) -> Union[SparsePauliOp, Pauli]:
         """
@@ -500,8 +628,12 @@ class QubitOpBuilder:
         Returns:
             Hamiltonian term consisting of side chain pairwise interactions
         """
+        return self._sum_blocks(self._iter_h_scsc())
+
+    def _iter_h_scsc(self) -> Iterator[Union[SparsePauliOp, Pauli]]:
+        """Yields the terms of the Hamiltonian created by :meth:`_create_h_scsc`, one pair of side
+        beads at a time."""
         penalty_1 = self._penalty_parameters.penalty_1
-        h_scsc = 0
         main_chain_len = len(self._peptide.get_main_chain)
         side_chain = self._peptide.get_side_chain_hot_vector()
         for i in range(1, main_chain_len - 3):
@@ -510,7 +642,7 @@ class QubitOpBuilder:
                     continue
                 if side_chain[i - 1] == 0 or side_chain[j - 1] == 0:
                     continue
-                h_scsc += self._contact_map.lower_side_upper_side[i][j] ^ (
+                yield self._contact_map.lower_side_upper_side[i][j] ^ (
                     self._distance_map.first_neighbor(
                         self._peptide, i, 1, j, 1, penalty_1, self._pair_energies
                     )
@@ -521,7 +653,6 @@ class QubitOpBuilder:
                         self._peptide, i, 0, j, 1, penalty_1, self._pair_energies
                     )
                 )
-        return _fix_qubits(h_scsc, self._has_side_chain_second_bead)
 
     def _create_h_short(self) -> Union[SparsePauliOp, Pauli]:
         """
@@ -532,9 +663,13 @@ class QubitOpBuilder:
             Contribution to energetic Hamiltonian for interactions between beads that are no more
             than 4 beads apart.
         """
+        return self._sum_blocks(self._iter_h_short())
+
+    def _iter_h_short(self) -> Iterator[Union[SparsePauliOp, Pauli]]:
+        """Yields the terms of the Hamiltonian created by :meth:`_create_h_short`, one pair of
+        side beads at a time."""
         main_chain_len = len(self._peptide.get_main_chain)
         side_chain = self._peptide.get_side_chain_hot_vector()
-        h_short = 0
         for i in range(1, main_chain_len - 2):
             # checks interactions between beads no more than 4 beads apart
             if side_chain[i - 1] == 1 and side_chain[i + 2] == 1:
@@ -555,8 +690,30 @@ class QubitOpBuilder:
                     )
                 )
                 composed = op1 @ op2
-                h_short += (coeff * composed).reduce()
-        h_short = _fix_qubits(h_short, self._has_side_chain_second_bead)
+                yield (coeff * composed).reduce()
 
-        return h_short
+    def _sum_blocks(
+        self,
+        blocks: Iterable[Union[SparsePauliOp, Pauli]],
+        fix_each_block: bool = False,
+    ) -> Union[int, SparsePauliOp, Pauli]:
+        """
+        Sums blocks of a Hamiltonian term and fixes qubits of the sum.
+
+        Args:
+            blocks: Blocks of a Hamiltonian term.
+            fix_each_block: If ``True``, qubits are fixed after every block is added, which keeps
+                            the running sum simplified.
+
+        Returns:
+            The sum of all blocks with relevant qubits fixed, or 0 if there are no blocks.
+        """
+        total = 0
+        for block in blocks:
+            total += block
+            if fix_each_block:
+                total = _fix_qubits(total, self._has_side_chain_second_bead)
+        if not fix_each_block:
+            total = _fix_qubits(total, self._has_side_chain_second_bead)
+        return total
 
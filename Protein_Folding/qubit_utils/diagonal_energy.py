@@ -0,0 +1,275 @@
+# This code is licensed under the Apache License, Version 2.0.
+# You may obtain a copy of this license at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""Evaluates energies of bitstrings for a Hamiltonian that is diagonal in the Z basis."""
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from qiskit.quantum_info import Pauli, SparsePauliOp
+
+Bitstrings = Union[Dict[str, float], Iterable[str], Iterable[int], np.ndarray]
+
+# Number of entries transformed at once before the transform moves on to larger strides.
+_WHT_BLOCK_SIZE = 2**16
+
+
+def walsh_hadamard_transform(vector: np.ndarray, block_size: int = _WHT_BLOCK_SIZE) -> np.ndarray:
+    """
+    Applies an unnormalized fast Walsh-Hadamard transform in place, in O(n * 2^n) time for a vector
+    of length 2^n. Strides smaller than block_size are applied block by block, so that each block
+    stays in cache (or in memory, for memory-mapped vectors) while it is transformed.
+
+    Args:
+        vector: A one-dimensional array whose length is a power of 2. It may be memory-mapped.
+        block_size: Length of the blocks transformed independently, a power of 2.
+
+    Returns:
+        The transformed vector (the same object as the input).
+    """
+    size = len(vector)
+    if size & (size - 1):
+        raise ValueError(f"The length of the vector must be a power of 2, got {size}.")
+    block_size = min(block_size, size)
+    for start in range(0, size, block_size):
+        _butterflies(vector[start : start + block_size], 1, block_size)
+    _butterflies(vector, block_size, size)
+    return vector
+
+
+def _butterflies(vector: np.ndarray, first_stride: int, last_stride: int) -> None:
+    stride = first_stride
+    while stride < last_stride:
+        pairs = vector.reshape(-1, 2, stride)
+        lower = pairs[:, 0, :]
+        upper = pairs[:, 1, :]
+        lower += upper
+        upper *= -2
+        upper += lower
+        stride *= 2
+
+
+def bitstrings_to_array(bitstrings: Bitstrings, num_qubits: int) -> np.ndarray:
+    """
+    Converts a batch of bitstrings to a matrix of bits.
+
+    Args:
+        bitstrings: Either a dictionary of counts or probabilities keyed by bitstrings, an
+                    iterable of bitstrings in Qiskit order (the rightmost character is qubit 0), an
+                    iterable of packed integers (bit i is qubit i) or a uint8 matrix of shape
+                    (number of bitstrings, num_qubits) whose column i holds qubit i.
+        num_qubits: Number of qubits encoded in every bitstring.
+
+    Returns:
+        A uint8 matrix of shape (number of bitstrings, num_qubits) whose column i holds qubit i.
+
+    Raises:
+        ValueError: If bitstrings do not encode num_qubits qubits.
+    """
+    if isinstance(bitstrings, np.ndarray) and bitstrings.ndim == 2:
+        if bitstrings.shape[1] != num_qubits:
+            raise ValueError(
+                f"Expected bit matrices with {num_qubits} columns, got {bitstrings.shape[1]}."
+            )
+        return bitstrings.astype(np.uint8, copy=False)
+    if isinstance(bitstrings, str):
+        bitstrings = [bitstrings]
+    bitstrings = list(bitstrings)
+    if not bitstrings:
+        return np.zeros((0, num_qubits), dtype=np.uint8)
+
+    if isinstance(bitstrings[0], str):
+        raw = np.frombuffer("".join(bitstrings).encode("ascii"), dtype=np.uint8)
+        if raw.size != len(bitstrings) * num_qubits:
+            raise ValueError(f"All bitstrings must have length {num_qubits}.")
+        bits = raw.reshape(-1, num_qubits)[:, ::-1] - ord("0")
+        if (bits > 1).any():
+            raise ValueError("Bitstrings may only contain the characters '0' and '1'.")
+        return np.ascontiguousarray(bits, dtype=np.uint8)
+
+    if num_qubits <= 64:
+        values = np.asarray(bitstrings, dtype=np.uint64)
+        shifts = np.arange(num_qubits, dtype=np.uint64)
+        return ((values[:, None] >> shifts) & np.uint64(1)).astype(np.uint8)
+    return bitstrings_to_array(
+        [format(int(value), f"0{num_qubits}b") for value in bitstrings], num_qubits
+    )
+
+
+class DiagonalEnergyEvaluator:
+    """Evaluates energies of batches of bitstrings for a Hamiltonian built only from Z and
+    identity operators. The eigenvalue of a Z term on a bitstring is the sign given by the parity
+    of the bits selected by the term's Z mask, so the energies of a batch are obtained from one
+    matrix product of bits and masks followed by a signed sum of coefficients."""
+
+    def __init__(
+        self, hamiltonian: Union[SparsePauliOp, Pauli], chunk_size: int = 2**22
+    ):
+        """
+        Args:
+            hamiltonian: A diagonal qubit operator, e.g. from
+                         :meth:`~Protein_Folding.ProteinFoldingProblem.qubit_op`.
+            chunk_size: Maximal number of (bitstring, term) pairs evaluated at once. It bounds
+                        the memory used for intermediate results.
+
+        Raises:
+            ValueError: If the Hamiltonian contains X or Y operators.
+        """
+        if not isinstance(hamiltonian, SparsePauliOp):
+            hamiltonian = SparsePauliOp(hamiltonian)
+        if hamiltonian.paulis.x.any():
+            raise ValueError("The Hamiltonian is not diagonal in the Z basis.")
+        table_z = hamiltonian.paulis.z
+        coeffs = np.real(hamiltonian.coeffs)
+        identity_terms = ~table_z.any(axis=1)
+
+        self._num_qubits = hamiltonian.num_qubits
+        self._offset = float(coeffs[identity_terms].sum())
+        self._masks = table_z[~identity_terms]
+        self._coeffs = np.ascontiguousarray(coeffs[~identity_terms], dtype=float)
+        self._mask_matrix = np.ascontiguousarray(self._masks.T, dtype=float)
+        self._chunk_size = chunk_size
+
+    @property
+    def num_qubits(self) -> int:
+        """Returns the number of qubits of the Hamiltonian."""
+        return self._num_qubits
+
+    @property
+    def masks(self) -> np.ndarray:
+        """Returns a boolean matrix of shape (number of terms, number of qubits) with the Z masks
+        of all non-identity terms."""
+        return self._masks
+
+    @property
+    def coeffs(self) -> np.ndarray:
+        """Returns the real coefficients of all non-identity terms."""
+        return self._coeffs
+
+    @property
+    def offset(self) -> float:
+        """Returns the coefficient of the identity term."""
+        return self._offset
+
+    def energies(self, bitstrings: Bitstrings) -> np.ndarray:
+        """
+        Evaluates the energy of every bitstring of a batch.
+
+        Args:
+            bitstrings: A batch of bitstrings in any format accepted by
+                        :func:`bitstrings_to_array`. For a dictionary the energies follow the order
+                        of its keys.
+
+        Returns:
+            An array of energies, one per bitstring.
+        """
+        bits = bitstrings_to_array(bitstrings, self._num_qubits)
+        energies = np.full(len(bits), self._offset)
+        if len(self._coeffs) == 0:
+            return energies
+        rows_per_chunk = max(1, self._chunk_size // len(self._coeffs))
+        for start in range(0, len(bits), rows_per_chunk):
+            stop = start + rows_per_chunk
+            # Number of set bits selected by each mask, turned into the sign (-1) ** count.
+            signs = bits[start:stop].astype(float) @ self._mask_matrix
+            np.fmod(signs, 2.0, out=signs)
+            signs *= -2.0
+            signs += 1.0
+            energies[start:stop] += signs @ self._coeffs
+        return energies
+
+    def full_diagonal(
+        self, dtype: np.dtype = np.float64, filename: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Computes the energies of all 2^n basis states. The energy of basis state x is
+        sum_m c_m (-1)^popcount(x & m), i.e. the Walsh-Hadamard transform of the vector of
+        coefficients indexed by Z masks, which is computed in O(n * 2^n) time.
+
+        Args:
+            dtype: Floating point type of the result. ``np.float32`` halves the memory at the cost
+                   of about 7 significant digits.
+            filename: If given, the result is written to a memory-mapped file at this path
+                      instead of being held in memory.
+
+        Returns:
+            An array of length 2^n whose entry x is the energy of the basis state x (bit i of x is
+            qubit i, as in a Qiskit statevector).
+        """
+        size = 2**self._num_qubits
+        if filename is None:
+            diagonal = np.zeros(size, dtype=dtype)
+        else:
+            diagonal = np.lib.format.open_memmap(filename, mode="w+", dtype=dtype, shape=(size,))
+            diagonal[:] = 0
+        weights = np.left_shift(1, np.arange(self._num_qubits, dtype=np.int64))
+        mask_indices = self._masks.astype(np.int64) @ weights
+        np.add.at(diagonal, mask_indices, self._coeffs.astype(dtype))
+        diagonal[0] += self._offset
+        walsh_hadamard_transform(diagonal)
+        if filename is not None:
+            diagonal.flush()
+        return diagonal
+
+    def lowest_energies(
+        self, k: int = 1, diagonal: Optional[np.ndarray] = None, chunk_size: int = 2**24
+    ) -> Tuple[np.ndarray, List[str]]:
+        """
+        Finds the k basis states with the lowest energies.
+
+        Args:
+            k: Number of states to return.
+            diagonal: Energies of all basis states from :meth:`full_diagonal`. Computed if not
+                      given.
+            chunk_size: Number of entries of the diagonal searched at once, which bounds the
+                        memory used for memory-mapped diagonals.
+
+        Returns:
+            A tuple of the k lowest energies in ascending order and the corresponding bitstrings
+            in Qiskit order.
+        """
+        if diagonal is None:
+            diagonal = self.full_diagonal()
+        k = min(k, len(diagonal))
+        best_indices = np.zeros(0, dtype=np.int64)
+        best_energies = np.zeros(0, dtype=float)
+        for start in range(0, len(diagonal), chunk_size):
+            chunk = np.asarray(diagonal[start : start + chunk_size], dtype=float)
+            if len(chunk) > k:
+                candidates = np.argpartition(chunk, k - 1)[:k]
+            else:
+                candidates = np.arange(len(chunk))
+            best_indices = np.concatenate([best_indices, candidates + start])
+            best_energies = np.concatenate([best_energies, chunk[candidates]])
+            keep = np.argsort(best_energies, kind="stable")[:k]
+            best_indices, best_energies = best_indices[keep], best_energies[keep]
+        bitstrings = [format(int(index), f"0{self._num_qubits}b") for index in best_indices]
+        return best_energies, bitstrings
+
+    @staticmethod
+    def statevector_expectation(statevector: np.ndarray, diagonal: np.ndarray) -> float:
+        """
+        Computes the exact expectation value of the Hamiltonian for a statevector.
+
+        Args:
+            statevector: Amplitudes of a state, e.g. ``Statevector(circuit).data``.
+            diagonal: Energies of all basis states from :meth:`full_diagonal`.
+
+        Returns:
+            The expectation value.
+        """
+        probabilities = np.abs(np.asarray(statevector)) ** 2
+        return float(np.dot(probabilities, diagonal))
+
+    def expectation_value(self, counts: Dict[str, float]) -> float:
+        """
+        Evaluates the energy averaged over a distribution of bitstrings.
+
+        Args:
+            counts: A dictionary of counts or probabilities keyed by bitstrings, e.g. from
+                    :class:`~Qiskit_VQE.StateCalculator`.
+
+        Returns:
+            The weighted mean energy.
+        """
+        weights = np.fromiter(counts.values(), dtype=float, count=len(counts))
+        return float(np.dot(self.energies(counts), weights) / weights.sum())
@@ -71,6 +71,42 @@ def _fix_qubits(
 
     return operator_updated
 
+class _BlockQubitFixer:
+    """
+    Fixes qubits of a sum of blocks block by block, with the same result as :func:`_fix_qubits`
+    applied once to the sum of all blocks. :func:`_fix_qubits` clears the Z part of the terms at
+    positions 0, 1, 2, 3 (and 5) of the summed term list and rebuilds every label in reversed
+    qubit order; both are linear in the blocks once the position of a block in the sum is known,
+    so the sum never has to be held in memory. Blocks must be passed in the order of the sum.
+    """
+
+    def __init__(self, has_side_chain_second_bead: bool = False):
+        """
+        Args:
+            has_side_chain_second_bead: As for :func:`_fix_qubits`.
+        """
+        self._fixed_rows = [0, 1, 2, 3] if has_side_chain_second_bead else [0, 1, 2, 3, 5]
+        self._offset = 0
+
+    def fix(self, block: Union[int, SparsePauliOp]) -> Union[int, SparsePauliOp]:
+        """
+        Args:
+            block: The next block of the sum, or 0.
+
+        Returns:
+            The contribution of the block to the fixed sum, or 0.
+        """
+        if isinstance(block, int):
+            return block
+        table_z = np.copy(block.paulis.z)
+        for row in self._fixed_rows:
+            if self._offset <= row < self._offset + len(table_z):
+                table_z[row - self._offset] = np.bool_(False)
+        self._offset += len(table_z)
+        paulis = PauliList.from_symplectic(table_z[:, ::-1], block.paulis.x[:, ::-1])
+        return SparsePauliOp(paulis, coeffs=block.coeffs)
+
+
 def _calc_updated_coeffs(
     hamiltonian: Union[SparsePauliOp, Pauli], table_z, has_side_chain_second_bead: bool
 ) -> np.ndarray:
@@ -0,0 +1,225 @@
+# This code is licensed under the Apache License, Version 2.0.
+# You may obtain a copy of this license at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""Accumulates Pauli terms of a qubit operator within a memory budget."""
+import os
+import shutil
+import tempfile
+from typing import List, Optional, Tuple
+
+import numpy as np
+from qiskit.quantum_info import PauliList, SparsePauliOp
+
+from ..exceptions.memory_budget_exception import MemoryBudgetException
+
+# A complex128 coefficient per term.
+_COEFF_BYTES = 16
+
+
+def estimate_operator_bytes(num_terms: int, num_qubits: int) -> int:
+    """
+    Estimates the memory held by a SparsePauliOp, which stores a boolean Z and X table and a
+    complex coefficient for each term.
+
+    Args:
+        num_terms: Number of Pauli terms of the operator.
+        num_qubits: Number of qubits of the operator.
+
+    Returns:
+        Estimated number of bytes.
+    """
+    return num_terms * (2 * num_qubits + _COEFF_BYTES)
+
+
+class TermAccumulator:
+    """Sums Pauli terms of a qubit operator under a memory budget. Terms are kept as bit-packed
+    symplectic rows. When the in-memory buffer outgrows its share of the budget, duplicate terms
+    are merged and, if that is not enough, the buffer is flushed to disk. Flushed terms are
+    partitioned by a hash of their Pauli label, so every partition can be reduced on its own
+    when the final operator is assembled. The budget is checked as operators are added, and while
+    the partitions are reduced, so that an operator that cannot fit fails early."""
+
+    def __init__(
+        self,
+        num_qubits: int,
+        memory_budget: int,
+        spill_dir: Optional[str] = None,
+        num_buckets: int = 64,
+        atol: float = 1e-8,
+    ):
+        """
+        Args:
+            num_qubits: Number of qubits of the accumulated operator.
+            memory_budget: Memory budget in bytes. A quarter of it is used for the in-memory
+                           buffer of terms, the final operator must fit in the whole budget.
+            spill_dir: Directory in which a temporary directory for flushed terms is created. If
+                       ``None``, the default temporary directory of the system is used.
+            num_buckets: Number of hash partitions of flushed terms.
+            atol: Terms whose summed coefficient is below this tolerance are dropped from the
+                  final operator, as in ``SparsePauliOp.simplify``.
+        """
+        self._num_qubits = num_qubits
+        self._memory_budget = memory_budget
+        self._buffer_budget = memory_budget // 4
+        self._spill_dir = spill_dir
+        self._num_buckets = num_buckets
+        self._atol = atol
+        self._row_bytes = 2 * ((num_qubits + 7) // 8)
+        self._hash_weights = np.random.default_rng(0).integers(
+            1, 2**63, size=self._row_bytes, dtype=np.uint64
+        )
+        self._rows: List[np.ndarray] = []
+        self._coeffs: List[np.ndarray] = []
+        self._num_buffered_terms = 0
+        self._tmp_dir: Optional[str] = None
+        self.num_spills = 0
+
+    def __enter__(self) -> "TermAccumulator":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add(self, operator: SparsePauliOp) -> None:
+        """
+        Adds the terms of an operator to the accumulated sum.
+
+        Args:
+            operator: An operator on ``num_qubits`` qubits.
+
+        Raises:
+            MemoryBudgetException: If the operator alone does not fit in the memory budget.
+        """
+        self._check_budget(len(operator), "An added operator")
+        rows = self._pack(operator.paulis.z, operator.paulis.x)
+        self._rows.append(rows)
+        self._coeffs.append(np.asarray(operator.coeffs, dtype=complex))
+        self._num_buffered_terms += len(rows)
+        if self._buffered_bytes() > self._buffer_budget:
+            self._compact()
+            if self._buffered_bytes() > self._buffer_budget:
+                self._spill()
+
+    def to_operator(self) -> SparsePauliOp:
+        """
+        Returns the simplified sum of all added terms.
+
+        Raises:
+            MemoryBudgetException: If the final operator does not fit in the memory budget.
+        """
+        if self._tmp_dir is None:
+            self._compact()
+            rows, coeffs = self._drop_small(*self._take_buffer())
+            self._check_budget(len(rows), "The final operator")
+        else:
+            self._spill()
+            num_terms = 0
+            for bucket in range(self._num_buckets):
+                rows, coeffs = self._drop_small(*self._reduce(*self._load_bucket(bucket)))
+                self._write_bucket(bucket, rows, coeffs, mode="wb")
+                num_terms += len(rows)
+                self._check_budget(num_terms, "The final operator")
+            loaded = [self._load_bucket(bucket) for bucket in range(self._num_buckets)]
+            rows = np.concatenate([bucket_rows for bucket_rows, _ in loaded])
+            coeffs = np.concatenate([bucket_coeffs for _, bucket_coeffs in loaded])
+        if len(rows) == 0:
+            return SparsePauliOp.from_list([("I" * self._num_qubits, 0)])
+        table_z, table_x = self._unpack(rows)
+        return SparsePauliOp(PauliList.from_symplectic(table_z, table_x), coeffs=coeffs)
+
+    def close(self) -> None:
+        """Removes terms flushed to disk."""
+        if self._tmp_dir is not None:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            self._tmp_dir = None
+
+    def _check_budget(self, num_terms: int, name: str) -> None:
+        required = estimate_operator_bytes(num_terms, self._num_qubits)
+        if required > self._memory_budget:
+            raise MemoryBudgetException(
+                f"{name} has {num_terms} terms on {self._num_qubits} qubits and "
+                f"needs about {required / 2**20:.1f} MiB, which exceeds the memory budget of "
+                f"{self._memory_budget / 2**20:.1f} MiB."
+            )
+
+    def _buffered_bytes(self) -> int:
+        return self._num_buffered_terms * (self._row_bytes + _COEFF_BYTES)
+
+    def _take_buffer(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._rows:
+            rows = np.concatenate(self._rows)
+            coeffs = np.concatenate(self._coeffs)
+        else:
+            rows = np.zeros((0, self._row_bytes), dtype=np.uint8)
+            coeffs = np.zeros(0, dtype=complex)
+        self._rows, self._coeffs = [], []
+        self._num_buffered_terms = 0
+        return rows, coeffs
+
+    def _compact(self) -> None:
+        rows, coeffs = self._reduce(*self._take_buffer())
+        nonzero = coeffs != 0
+        self._rows, self._coeffs = [rows[nonzero]], [coeffs[nonzero]]
+        self._num_buffered_terms = int(nonzero.sum())
+
+    def _spill(self) -> None:
+        rows, coeffs = self._take_buffer()
+        if self._tmp_dir is None:
+            self._tmp_dir = tempfile.mkdtemp(prefix="qubit_op_", dir=self._spill_dir)
+        buckets = (rows.astype(np.uint64) @ self._hash_weights) % np.uint64(self._num_buckets)
+        for bucket in range(self._num_buckets):
+            mask = buckets == bucket
+            self._write_bucket(bucket, rows[mask], coeffs[mask], mode="ab")
+        self.num_spills += 1
+
+    def _bucket_paths(self, bucket: int) -> Tuple[str, str]:
+        return (
+            os.path.join(self._tmp_dir, f"bucket_{bucket}.rows"),
+            os.path.join(self._tmp_dir, f"bucket_{bucket}.coeffs"),
+        )
+
+    def _write_bucket(self, bucket: int, rows: np.ndarray, coeffs: np.ndarray, mode: str):
+        rows_path, coeffs_path = self._bucket_paths(bucket)
+        with open(rows_path, mode) as rows_file, open(coeffs_path, mode) as coeffs_file:
+            np.ascontiguousarray(rows, dtype=np.uint8).tofile(rows_file)
+            np.ascontiguousarray(coeffs, dtype=complex).tofile(coeffs_file)
+
+    def _load_bucket(self, bucket: int) -> Tuple[np.ndarray, np.ndarray]:
+        rows_path, coeffs_path = self._bucket_paths(bucket)
+        if not os.path.exists(rows_path):
+            return (
+                np.zeros((0, self._row_bytes), dtype=np.uint8),
+                np.zeros(0, dtype=complex),
+            )
+        rows = np.fromfile(rows_path, dtype=np.uint8).reshape(-1, self._row_bytes)
+        coeffs = np.fromfile(coeffs_path, dtype=complex)
+        return rows, coeffs
+
+    @staticmethod
+    def _reduce(rows: np.ndarray, coeffs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Merges duplicate rows by summing their coefficients."""
+        if len(rows) == 0:
+            return rows, coeffs
+        unique_rows, inverse = np.unique(rows, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        summed = np.bincount(
+            inverse, weights=coeffs.real, minlength=len(unique_rows)
+        ) + 1j * np.bincount(inverse, weights=coeffs.imag, minlength=len(unique_rows))
+        return unique_rows, summed
+
+    def _drop_small(
+        self, rows: np.ndarray, coeffs: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        keep = np.abs(coeffs) > self._atol
+        return rows[keep], coeffs[keep]
+
+    def _pack(self, table_z: np.ndarray, table_x: np.ndarray) -> np.ndarray:
+        return np.hstack(
+            [np.packbits(table_z, axis=1), np.packbits(table_x, axis=1)]
+        ).astype(np.uint8)
+
+    def _unpack(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        half = self._row_bytes // 2
+        table_z = np.unpackbits(rows[:, :half], axis=1, count=self._num_qubits)
+        table_x = np.unpackbits(rows[:, half:], axis=1, count=self._num_qubits)
+        return table_z.astype(bool), table_x.astype(bool)
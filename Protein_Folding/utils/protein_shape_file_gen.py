@@ -58,7 +58,9 @@ class ProteinShapeFileGen:
             A list of arrays with the cartesian coordinates of the side chain.
         """
         side_positions: List[Optional[np.ndarray]] = []
-        counter = 1
+        # A side bead lies along the same signed direction as the bond leaving its main bead, as
+        # in the distance operators of the Hamiltonian, so that it stays on the lattice.
+        counter = 0
         for mainpos, sideturn in zip(self.main_positions, self._side_chain_turns):
             if sideturn is None:
                 side_positions.append(None)
@@ -0,0 +1,257 @@
+# --*-- conding:utf-8 --*--
+# @Time : 10/19/26 3:50 PM
+# @File : ansatz_factory.py
+
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+from qiskit import QuantumCircuit, transpile
+from qiskit.circuit.library import EfficientSU2, QAOAAnsatz, RealAmplitudes, TwoLocal
+from qiskit.quantum_info import SparsePauliOp
+
+ANSATZ_FAMILIES = ("efficient_su2", "real_amplitudes", "ry", "qaoa")
+
+Entanglement = Union[str, List[Tuple[int, int]]]
+
+# Number of Hamiltonian terms accumulated into the interaction graph at once.
+_TERM_CHUNK_SIZE = 2**16
+
+
+def interaction_graph(hamiltonian: SparsePauliOp) -> np.ndarray:
+    """
+        Builds the weighted co-occurrence graph of the qubits of a Hamiltonian: the weight of a
+        qubit pair is the summed coefficient magnitude of all terms acting on both qubits.
+
+        Parameters:
+        - hamiltonian: A qubit operator, e.g. from ProteinFoldingProblem.qubit_op().
+
+        Returns:
+        - graph: Symmetric matrix of shape (num_qubits, num_qubits) with a zero diagonal.
+    """
+    support = hamiltonian.paulis.z | hamiltonian.paulis.x
+    weights = np.abs(hamiltonian.coeffs)
+    graph = np.zeros((hamiltonian.num_qubits, hamiltonian.num_qubits))
+    for start in range(0, len(weights), _TERM_CHUNK_SIZE):
+        chunk = support[start:start + _TERM_CHUNK_SIZE].astype(float)
+        graph += (chunk * weights[start:start + _TERM_CHUNK_SIZE, None]).T @ chunk
+    np.fill_diagonal(graph, 0.0)
+    return graph
+
+
+def interaction_entanglement(hamiltonian: SparsePauliOp, max_pairs: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+        Derives an entanglement map from the interaction graph of a Hamiltonian, so that
+        entangling gates are only spent on qubits that interact. The pairs of a maximum spanning
+        forest of the graph come first, so that every interacting group of qubits stays
+        connected, followed by the remaining pairs by decreasing weight, up to max_pairs. The
+        selected pairs are ordered in layers of disjoint pairs, which can be executed in parallel.
+
+        Parameters:
+        - hamiltonian: A qubit operator, e.g. from ProteinFoldingProblem.qubit_op().
+        - max_pairs: Budget of entangling pairs per repetition, the number of qubits if None.
+
+        Returns:
+        - entanglement: List of qubit pairs, accepted as entanglement by the Qiskit ansatz circuits.
+    """
+    graph = interaction_graph(hamiltonian)
+    num_qubits = len(graph)
+    max_pairs = num_qubits if max_pairs is None else max_pairs
+    rows, cols = np.triu_indices(num_qubits, k=1)
+    weights = graph[rows, cols]
+    order = np.argsort(-weights, kind="stable")
+    pairs = [(int(rows[i]), int(cols[i])) for i in order if weights[i] > 0]
+
+    # Kruskal's algorithm on the pairs sorted by decreasing weight.
+    parent = list(range(num_qubits))
+
+    def find(qubit):
+        while parent[qubit] != qubit:
+            parent[qubit] = parent[parent[qubit]]
+            qubit = parent[qubit]
+        return qubit
+
+    forest, remaining = [], []
+    for first, second in pairs:
+        root_first, root_second = find(first), find(second)
+        if root_first != root_second:
+            parent[root_first] = root_second
+            forest.append((first, second))
+        else:
+            remaining.append((first, second))
+    selected = (forest + remaining)[:max_pairs]
+
+    # Greedy edge coloring: every pair goes into the first layer in which both qubits are free.
+    layers, busy = [], []
+    for first, second in selected:
+        for layer, qubits in zip(layers, busy):
+            if first not in qubits and second not in qubits:
+                layer.append((first, second))
+                qubits.update((first, second))
+                break
+        else:
+            layers.append([(first, second)])
+            busy.append({first, second})
+    return [pair for layer in layers for pair in layer]
+
+
+class AnsatzCostReport:
+    """
+        Cost of an ansatz on the target backend, known before any job is submitted.
+    """
+    def __init__(self, family: str, reps: int, ansatz: QuantumCircuit, isa_circuit: QuantumCircuit,
+                 transpiled: bool):
+        """
+                Parameters:
+                - family: Ansatz family.
+                - reps: Number of repetitions of the ansatz.
+                - ansatz: The ansatz circuit.
+                - isa_circuit: The ansatz transpiled for the target, or decomposed into u and cx gates
+                  if there is no target.
+                - transpiled: True if isa_circuit was transpiled for a backend target.
+        """
+        self.family = family
+        self.reps = reps
+        self.num_qubits = ansatz.num_qubits
+        self.num_parameters = ansatz.num_parameters
+        self.isa_circuit = isa_circuit if transpiled else None
+        self.transpiled = transpiled
+        self.depth = isa_circuit.depth()
+        self.two_qubit_gates = sum(1 for instruction in isa_circuit.data if instruction.operation.num_qubits == 2)
+        self.two_qubit_depth = isa_circuit.depth(lambda instruction: instruction.operation.num_qubits == 2)
+
+    def within_budget(self, max_two_qubit_gates: Optional[int] = None, max_depth: Optional[int] = None) -> bool:
+        """
+                Returns:
+                - within_budget: True if the circuit respects the given two-qubit gate and depth budgets.
+        """
+        if max_two_qubit_gates is not None and self.two_qubit_gates > max_two_qubit_gates:
+            return False
+        return max_depth is None or self.depth <= max_depth
+
+    def __str__(self):
+        circuit = "transpiled" if self.transpiled else "logical (u, cx)"
+        return (f"Ansatz {self.family} (reps={self.reps}) on {self.num_qubits} qubits: "
+                f"{self.num_parameters} parameters, {circuit} depth {self.depth}, "
+                f"{self.two_qubit_gates} two-qubit gates, two-qubit depth {self.two_qubit_depth}")
+
+
+class AnsatzFactory:
+    """
+        Builds the ansatz of a VQE run from a selectable family:
+
+        - "efficient_su2": EfficientSU2 with RY and RZ rotations (the previous fixed ansatz);
+        - "real_amplitudes": RealAmplitudes, RY rotations with real amplitudes;
+        - "ry": a TwoLocal circuit of RY rotations and CZ entanglers;
+        - "qaoa": the problem-structured QAOA ansatz of the (diagonal) Hamiltonian itself.
+
+        Given a two-qubit gate and/or depth budget, the number of repetitions is lowered until the
+        circuit transpiled for the target backend fits into it.
+    """
+    def __init__(self, family: str = "efficient_su2", reps: int = 3,
+                 entanglement: Entanglement = "reverse_linear",
+                 max_two_qubit_gates: Optional[int] = None, max_depth: Optional[int] = None,
+                 max_entangling_pairs: Optional[int] = None):
+        """
+                Parameters:
+                - family: One of ANSATZ_FAMILIES.
+                - reps: Number of repetitions, the maximum one if a budget is given.
+                - entanglement: Entanglement of the hardware-efficient families, a Qiskit entanglement
+                  strategy ("full", "linear", "reverse_linear", "circular", ...), a list of qubit pairs,
+                  or "interaction" for pairs derived from the interaction graph of the Hamiltonian
+                  (see :func:`interaction_entanglement`).
+                - max_two_qubit_gates: Optional budget of two-qubit gates of the transpiled circuit.
+                - max_depth: Optional budget of the depth of the transpiled circuit.
+                - max_entangling_pairs: Budget of entangling pairs per repetition of the "interaction"
+                  entanglement, the number of qubits if None.
+        """
+        if family not in ANSATZ_FAMILIES:
+            raise ValueError(f"Unknown ansatz family {family}, expected one of {ANSATZ_FAMILIES}.")
+        self.family = family
+        self.reps = reps
+        self.entanglement = entanglement
+        self.max_two_qubit_gates = max_two_qubit_gates
+        self.max_depth = max_depth
+        self.max_entangling_pairs = max_entangling_pairs
+
+    def config_key(self, reps: Optional[int] = None) -> str:
+        """
+                Returns a key of the ansatz configuration, e.g. for a ParameterLibrary. Unlike a
+                fingerprint of the circuit, it does not depend on the Hamiltonian the ansatz is
+                built for, which shapes the "qaoa" family and the "interaction" entanglement.
+
+                Parameters:
+                - reps: Number of repetitions; the factory's reps if None.
+
+                Returns:
+                - key: The family, repetitions and entanglement specification.
+        """
+        reps = self.reps if reps is None else reps
+        entanglement = self.entanglement
+        if entanglement == "interaction":
+            entanglement = f"interaction:{self.max_entangling_pairs}"
+        return f"family={self.family}|reps={reps}|entanglement={entanglement}"
+
+    def build(self, hamiltonian: SparsePauliOp, reps: Optional[int] = None) -> QuantumCircuit:
+        """
+                Builds the ansatz for a Hamiltonian.
+
+                Parameters:
+                - hamiltonian: The Hamiltonian of the VQE run.
+                - reps: Number of repetitions; the factory's reps if None.
+
+                Returns:
+                - ansatz: The parametrized ansatz circuit.
+        """
+        reps = self.reps if reps is None else reps
+        num_qubits = hamiltonian.num_qubits
+        entanglement = self.entanglement
+        if entanglement == "interaction":
+            entanglement = interaction_entanglement(hamiltonian, self.max_entangling_pairs)
+        if self.family == "efficient_su2":
+            return EfficientSU2(num_qubits, reps=reps, entanglement=entanglement)
+        if self.family == "real_amplitudes":
+            return RealAmplitudes(num_qubits, reps=reps, entanglement=entanglement)
+        if self.family == "ry":
+            return TwoLocal(num_qubits, "ry", "cz", entanglement=entanglement, reps=reps)
+        return QAOAAnsatz(cost_operator=hamiltonian, reps=reps)
+
+    def create(self, hamiltonian: SparsePauliOp, provider=None,
+               optimization_level: int = 3) -> Tuple[QuantumCircuit, AnsatzCostReport]:
+        """
+                Builds the ansatz with the largest number of repetitions up to reps that fits into the
+                budget and reports its cost. Circuits are transpiled with the provider, so the
+                transpile cache is used if the provider has one.
+
+                Parameters:
+                - hamiltonian: The Hamiltonian of the VQE run.
+                - provider: Optional PrimitiveProvider whose backend target the cost is reported for.
+                - optimization_level: Optimization level of the transpilation.
+
+                Returns:
+                - ansatz: The ansatz circuit.
+                - report: Its cost report.
+
+                Raises:
+                - ValueError: If even a single repetition exceeds the budget.
+        """
+        for reps in range(self.reps, 0, -1):
+            ansatz = self.build(hamiltonian, reps)
+            report = self.report(ansatz, reps, provider, optimization_level)
+            if report.within_budget(self.max_two_qubit_gates, self.max_depth):
+                return ansatz, report
+            print(f"{report} exceeds the budget")
+        raise ValueError(
+            f"The {self.family} ansatz exceeds the budget of {self.max_two_qubit_gates} two-qubit gates "
+            f"and depth {self.max_depth} with a single repetition."
+        )
+
+    def report(self, ansatz: QuantumCircuit, reps: int, provider=None,
+               optimization_level: int = 3) -> AnsatzCostReport:
+        """
+                Transpiles an ansatz for the provider's target, or decomposes it into u and cx gates
+                without a target, and reports its cost.
+        """
+        if provider is not None and provider.target is not None:
+            return AnsatzCostReport(self.family, reps, ansatz, provider.transpile(ansatz, optimization_level), True)
+        logical = transpile(ansatz, basis_gates=["u", "cx"], optimization_level=0)
+        return AnsatzCostReport(self.family, reps, ansatz, logical, False)
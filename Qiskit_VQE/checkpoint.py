@@ -0,0 +1,60 @@
+# --*-- conding:utf-8 --*--
+# @Time : 10/19/26 11:20 AM
+# @File : checkpoint.py
+
+import os
+import pickle
+from typing import Any, Dict, Optional
+
+CHECKPOINT_VERSION = 1
+
+
+class Checkpointer:
+    """
+        Periodically writes the state of a VQE optimization to local disk, so that a run that died
+        from a session expiry or a crash can be resumed from its last checkpoint. Checkpoints are
+        pickled dictionaries written atomically: a checkpoint file is always complete.
+    """
+    def __init__(self, path: str, interval: int = 10):
+        """
+                Parameters:
+                - path: File path of the checkpoint.
+                - interval: A checkpoint is written every interval iterations.
+        """
+        self.path = path
+        self.interval = interval
+
+    def is_due(self, iteration: int) -> bool:
+        """
+                Returns:
+                - due: True if a checkpoint should be written after the given iteration.
+        """
+        return self.interval > 0 and iteration % self.interval == 0
+
+    def save(self, state: Dict[str, Any]) -> None:
+        """
+                Writes a checkpoint, replacing the previous one.
+
+                Parameters:
+                - state: The optimization state.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "wb") as file:
+            pickle.dump({"version": CHECKPOINT_VERSION, "state": state}, file)
+        os.replace(temporary_path, self.path)
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+                Returns:
+                - state: The state of the last checkpoint, or None if there is none.
+        """
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb") as file:
+            checkpoint = pickle.load(file)
+        if checkpoint.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version in {self.path}.")
+        return checkpoint["state"]
@@ -0,0 +1,174 @@
+# --*-- conding:utf-8 --*--
+# @Time : 10/19/26 1:15 PM
+# @File : history.py
+
+import math
+import os
+from collections import deque
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+LOG_MAGIC = b"VQEHIST1"
+_HEADER_SIZE = len(LOG_MAGIC) + 8
+_LOG_DTYPE = np.dtype("<f8")
+
+
+class OptimizationHistory:
+    """
+        Records the evaluations of a VQE optimization in bounded memory:
+
+        - the top_k lowest energies and their parameters, in a max-heap of preallocated arrays;
+        - the energies of all evaluations, or only of the last retention ones;
+        - optionally every (energy, parameters) record, streamed to an append-only binary log
+          that can be read back with :func:`read_history_log`.
+
+        The log consists of a header (magic bytes and the number of parameters as a little-endian
+        int64) followed by one little-endian float64 record of [energy, *parameters] per evaluation.
+    """
+    def __init__(self, num_parameters: int, top_k: int = 6, log_path: Optional[str] = None,
+                 retention: Optional[int] = None):
+        """
+                Parameters:
+                - num_parameters: Number of ansatz parameters.
+                - top_k: Number of best parameter sets to keep.
+                - log_path: Optional path of the binary log of all evaluations. It is opened with the
+                  first record, which overwrites an existing log unless the history was restored
+                  from a checkpoint.
+                - retention: Number of most recent energies kept in memory; all if None.
+        """
+        self.num_parameters = num_parameters
+        self.top_k = top_k
+        self.log_path = log_path
+        self.retention = retention
+        self.energies = deque(maxlen=retention) if retention is not None else []
+        self.num_records = 0
+        self._heap_energies = np.empty(top_k)
+        self._heap_params = np.empty((top_k, num_parameters))
+        self._heap_size = 0
+        self._log = None
+
+    def record(self, energy: float, params: np.ndarray) -> None:
+        """
+                Records an evaluated parameter vector and its energy.
+        """
+        energy = float(energy)
+        self.energies.append(energy)
+        self._push(energy, params)
+        if self.log_path is not None:
+            if self._log is None:
+                self._open_log(self.num_records)
+            record = np.empty(self.num_parameters + 1, dtype=_LOG_DTYPE)
+            record[0] = energy
+            record[1:] = params
+            self._log.write(record.tobytes())
+        self.num_records += 1
+
+    def top(self) -> List[Tuple[float, np.ndarray]]:
+        """
+                Returns:
+                - results: The kept (energy, params) pairs, sorted by increasing energy.
+        """
+        order = np.argsort(self._heap_energies[:self._heap_size], kind="stable")
+        return [(float(self._heap_energies[i]), self._heap_params[i].copy()) for i in order]
+
+    @property
+    def best_energy(self) -> float:
+        """
+                Returns the lowest recorded energy, or infinity if nothing was recorded.
+        """
+        if self._heap_size == 0:
+            return math.inf
+        return float(self._heap_energies[:self._heap_size].min())
+
+    @property
+    def best_params(self) -> Optional[np.ndarray]:
+        """
+                Returns the parameters of the lowest recorded energy, or None if nothing was recorded.
+        """
+        if self._heap_size == 0:
+            return None
+        return self._heap_params[int(np.argmin(self._heap_energies[:self._heap_size]))].copy()
+
+    def flush(self) -> None:
+        """
+                Flushes the binary log to disk.
+        """
+        if self._log is not None:
+            self._log.flush()
+
+    def close(self) -> None:
+        """
+                Closes the binary log.
+        """
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _open_log(self, num_records: int) -> None:
+        if num_records == 0 or not os.path.exists(self.log_path):
+            self._log = open(self.log_path, "wb")
+            self._log.write(LOG_MAGIC + self.num_parameters.to_bytes(8, "little"))
+            return
+        # Records written after a checkpoint are dropped, since a resumed run evaluates them again.
+        self._log = open(self.log_path, "r+b")
+        self._log.truncate(_HEADER_SIZE + num_records * (self.num_parameters + 1) * _LOG_DTYPE.itemsize)
+        self._log.seek(0, 2)
+
+    def _push(self, energy: float, params: np.ndarray) -> None:
+        if self._heap_size < self.top_k:
+            index = self._heap_size
+            self._heap_size += 1
+            self._heap_energies[index] = energy
+            self._heap_params[index] = params
+            while index > 0 and self._heap_energies[(index - 1) // 2] < self._heap_energies[index]:
+                self._swap(index, (index - 1) // 2)
+                index = (index - 1) // 2
+        elif self.top_k > 0 and energy < self._heap_energies[0]:
+            self._heap_energies[0] = energy
+            self._heap_params[0] = params
+            index = 0
+            while True:
+                largest = index
+                for child in (2 * index + 1, 2 * index + 2):
+                    if child < self._heap_size and self._heap_energies[child] > self._heap_energies[largest]:
+                        largest = child
+                if largest == index:
+                    break
+                self._swap(index, largest)
+                index = largest
+
+    def _swap(self, i: int, j: int) -> None:
+        energies = self._heap_energies
+        energies[i], energies[j] = energies[j], energies[i]
+        self._heap_params[[i, j]] = self._heap_params[[j, i]]
+
+    def __getstate__(self):
+        # The log is reopened with the next record and truncated to the pickled number of records.
+        self.flush()
+        state = self.__dict__.copy()
+        state["_log"] = None
+        return state
+
+
+def read_history_log(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        Reads a binary log written by :class:`OptimizationHistory`. An incomplete last record, e.g.
+        from a crash while writing, is ignored.
+
+        Parameters:
+        - path: Path of the log.
+
+        Returns:
+        - energies: Array of the energies of all evaluations.
+        - params: Array of their parameters, of shape (number of evaluations, number of parameters).
+    """
+    with open(path, "rb") as file:
+        header = file.read(_HEADER_SIZE)
+    if header[:len(LOG_MAGIC)] != LOG_MAGIC:
+        raise ValueError(f"{path} is not an optimization history log.")
+    num_parameters = int.from_bytes(header[len(LOG_MAGIC):], "little")
+    data = np.fromfile(path, dtype=_LOG_DTYPE, offset=_HEADER_SIZE)
+    num_records = len(data) // (num_parameters + 1)
+    data = data[:num_records * (num_parameters + 1)].reshape(num_records, num_parameters + 1)
+    return data[:, 0], data[:, 1:]
@@ -1,34 +1,41 @@
 # --*-- conding:utf-8 --*--
-# @Time : 11/13/24 12:08 PM
+# @Time : 11/13/24 12:08 PM
 # @Author : Yuqi Zhang
 # @Email : yzhan135@kent.edu
 # @File : measure.py
 
 from qiskit import QuantumCircuit
-from qiskit_ibm_runtime import SamplerV2 as Sampler
-from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager
 from typing import Dict
 
+from .primitives import PrimitiveProvider
+from .transpile_cache import TranspileCache
+
 class StateCalculator:
-    def __init__(self,service ,min_qubit_num, ansatz: QuantumCircuit):
+    def __init__(self, service, min_qubit_num, ansatz: QuantumCircuit, backend=None, sampler=None,
+                 shots=100000, transpile_cache_dir=None, session_manager=None):
         """
         Initialize the ProbabilityDistributionCalculator with a predefined ansatz circuit.
+
+        Parameters:
+        service: QiskitRuntimeService to select the least busy backend from. It may be None if a
+                 backend or a sampler is given.
+        min_qubit_num: Minimum number of qubits of the selected backend.
+        ansatz: The ansatz circuit.
+        backend: Optional BackendV2 to run on, e.g. an AerSimulator or a fake backend.
+        sampler: Optional SamplerV2 primitive to run with, e.g. a StatevectorSampler.
+        shots: Number of shots of every measurement, also with an injected sampler.
+        transpile_cache_dir: Optional directory of an on-disk cache of transpiled circuits.
+        session_manager: Optional SessionManager, so that measurements run in the session of the VQE
+                         runs on the same backend instead of outside any session.
         """
         self.service = service
         self.ansatz = ansatz
-        # self.backend = self._select_backend(min_quits=min_qubit_num)
         self.min_qubits = min_qubit_num
-
-    # def _select_backend(self, min_quits):
-    #     """
-    #             Selects the least busy IBM Quantum backend with enough qubits and returns it.
-    #             This ensures that the quantum job is processed faster by using a backend with fewer queued jobs.
-    #
-    #             Returns:
-    #             - backend: The IBM Quantum backend with the least busy queue.
-    #     """
-    #     backend = self.service.least_busy(simulator=False, operational=True, min_num_qubits=min_quits)
-    #     return backend
+        self.shots = shots
+        self._backend = backend
+        self._sampler = sampler
+        self._session_manager = session_manager
+        self._transpile_cache = TranspileCache(transpile_cache_dir) if transpile_cache_dir else None
 
     def get_probability_distribution(self, optimized_params) -> Dict:
         """
@@ -41,17 +48,21 @@ class StateCalculator:
         Returns:
         Dict: A dictionary with binary strings as keys and their probabilities as values.
         """
-        circuit = self.ansatz.assign_parameters(optimized_params)
-        circuit.measure_all()
-
-        backend = self.service.least_busy(simulator=False, operational=True, min_num_qubits=self.min_qubits)
+        # The parametrized circuit is transpiled, so that it is transpiled once for all parameters
+        # when a transpile cache is used.
+        circuit = self.ansatz.measure_all(inplace=False)
 
-        pm = generate_preset_pass_manager(optimization_level=1, backend=backend)
-        isa_circuit = pm.run(circuit)
+        # Without an injected backend or a session manager, the least busy backend is looked up
+        # again for every call.
+        provider = PrimitiveProvider(service=self.service, backend=self._backend,
+                                     sampler=self._sampler, min_qubit_num=self.min_qubits,
+                                     transpile_cache=self._transpile_cache,
+                                     session_manager=self._session_manager, needs=("sampler",))
+        isa_circuit = provider.transpile(circuit, optimization_level=1)
 
-        sampler = Sampler(backend,options={"default_shots": 100000})
-        job = sampler.run([isa_circuit])
-        result = job.result()
+        with provider.sampler(self.shots) as sampler:
+            job = sampler.run([(isa_circuit, optimized_params)], shots=self.shots)
+            result = job.result()
 
         threshold = 0 #
 
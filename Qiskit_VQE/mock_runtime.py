@@ -0,0 +1,142 @@
+# --*-- conding:utf-8 --*--
+# @Time : 10/19/26 7:30 PM
+# @File : mock_runtime.py
+
+import math
+import time
+from typing import List, Optional
+
+from qiskit.primitives import BackendEstimatorV2, BackendSamplerV2
+from qiskit.providers import BackendV2
+from qiskit.providers.fake_provider import GenericBackendV2
+
+
+class MockSessionExpiredError(RuntimeError):
+    """
+        Raised by jobs submitted to an expired MockSession.
+    """
+
+
+class MockRuntimeService:
+    """
+        A local stand-in for QiskitRuntimeService to exercise the SessionManager without an IBM
+        Quantum account. Backends are local (a GenericBackendV2 by default) and sessions run jobs
+        with the backend primitives, after a simulated queue delay, until they expire:
+
+            service = MockRuntimeService(queue_delay=0.5, session_ttl=10)
+            manager = SessionManager(service, session_factory=service.open_session)
+
+        The service counts its backend lookups, sessions and jobs, so that their reuse can be checked.
+    """
+    def __init__(self, backend: Optional[BackendV2] = None, queue_delay: float = 0.0,
+                 session_ttl: float = 300.0, seed: Optional[int] = None):
+        """
+                Parameters:
+                - backend: Optional backend returned by least_busy; a GenericBackendV2 with the
+                  requested number of qubits if None.
+                - queue_delay: Seconds every job waits in the simulated queue.
+                - session_ttl: Seconds after which a session expires.
+                - seed: Seed of generated backends.
+        """
+        self.backend = backend
+        self.queue_delay = queue_delay
+        self.session_ttl = session_ttl
+        self.seed = seed
+        self.least_busy_calls = 0
+        self.sessions: List["MockSession"] = []
+        self.num_jobs = 0
+
+    def least_busy(self, simulator: bool = False, operational: bool = True,
+                   min_num_qubits: Optional[int] = None) -> BackendV2:
+        """
+                Returns the backend of the service, with the signature of QiskitRuntimeService.least_busy.
+        """
+        self.least_busy_calls += 1
+        if self.backend is None:
+            return GenericBackendV2(num_qubits=min_num_qubits or 5, seed=self.seed)
+        if min_num_qubits is not None and self.backend.num_qubits < min_num_qubits:
+            raise ValueError(f"No backend with at least {min_num_qubits} qubits.")
+        return self.backend
+
+    def open_session(self, backend: BackendV2) -> "MockSession":
+        """
+                Opens a session on a backend; a session factory of the SessionManager.
+        """
+        session = MockSession(self, backend)
+        self.sessions.append(session)
+        return session
+
+    def expire_sessions(self) -> None:
+        """
+                Expires all open sessions immediately, as if their time limit was reached.
+        """
+        for session in self.sessions:
+            session.expire()
+
+
+class MockSession:
+    """
+        A session of a MockRuntimeService that expires session_ttl seconds after it was opened.
+    """
+    def __init__(self, service: MockRuntimeService, backend: BackendV2):
+        self.service = service
+        self.backend = backend
+        self.opened_at = time.monotonic()
+        self.closed = False
+
+    @property
+    def expired(self) -> bool:
+        """
+                Returns True if the session was closed or reached its time limit.
+        """
+        return self.closed or time.monotonic() - self.opened_at >= self.service.session_ttl
+
+    def expire(self) -> None:
+        """
+                Lets the session reach its time limit.
+        """
+        self.opened_at = -math.inf
+
+    def status(self) -> str:
+        return "Closed" if self.expired else "In progress, accepting new jobs"
+
+    def close(self) -> None:
+        self.closed = True
+
+    def estimator(self, shots: Optional[int] = None) -> "MockPrimitive":
+        estimator = BackendEstimatorV2(backend=self.backend)
+        if shots is not None:
+            estimator.options.default_precision = 1 / math.sqrt(shots)
+        return MockPrimitive(self, estimator)
+
+    def sampler(self, shots: Optional[int] = None) -> "MockPrimitive":
+        options = {"default_shots": shots} if shots is not None else None
+        return MockPrimitive(self, BackendSamplerV2(backend=self.backend, options=options))
+
+    def submit(self, primitive, pubs, **kwargs):
+        """
+                Runs pubs with a backend primitive after the queue delay, unless the session expired
+                before or while the job was queued.
+
+                Raises:
+                - MockSessionExpiredError: If the session expired.
+        """
+        if self.expired:
+            raise MockSessionExpiredError("The session is closed.")
+        time.sleep(self.service.queue_delay)
+        if self.expired:
+            raise MockSessionExpiredError("The session expired while the job was queued.")
+        self.service.num_jobs += 1
+        return primitive.run(pubs, **kwargs)
+
+
+class MockPrimitive:
+    """
+        An Estimator or Sampler bound to a MockSession.
+    """
+    def __init__(self, session: MockSession, primitive):
+        self.session = session
+        self.primitive = primitive
+
+    def run(self, pubs, **kwargs):
+        return self.session.submit(self.primitive, pubs, **kwargs)
@@ -0,0 +1,222 @@
+# --*-- conding:utf-8 --*--
+# @Time : 10/19/26 4:40 PM
+# @File : multistart.py
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.primitives import StatevectorEstimator, StatevectorSampler
+from qiskit.quantum_info import PauliList, SparsePauliOp
+
+from .vqe_top5 import VQE5
+from .warm_start import ParameterLibrary
+
+# VQE options that are set per start by MultiStartVQE, or would be shared by concurrent starts.
+_PER_START_OPTIONS = ("service", "estimator", "sampler", "seed", "checkpoint_path", "history_log_path",
+                      "parameter_library_dir", "sequence", "warm_start")
+
+
+class SharedHamiltonian:
+    """
+        A Hamiltonian written once to .npy files (its Z and X tables, the phases of its Paulis and
+        its coefficients) that worker processes memory-map, so that the starts of a multi-start run share one load of the
+        Hamiltonian instead of each receiving a pickled copy. Instances pickle as the directory only.
+    """
+    def __init__(self, hamiltonian: SparsePauliOp, directory: Optional[str] = None):
+        """
+                Parameters:
+                - hamiltonian: The Hamiltonian to share.
+                - directory: Parent directory of the temporary files; the system default if None.
+        """
+        self.directory = tempfile.mkdtemp(prefix="vqe_hamiltonian_", dir=directory)
+        np.save(os.path.join(self.directory, "z.npy"), hamiltonian.paulis.z)
+        np.save(os.path.join(self.directory, "x.npy"), hamiltonian.paulis.x)
+        np.save(os.path.join(self.directory, "phase.npy"), hamiltonian.paulis.phase)
+        np.save(os.path.join(self.directory, "coeffs.npy"), hamiltonian.coeffs)
+
+    def load(self) -> SparsePauliOp:
+        """
+                Returns:
+                - hamiltonian: The Hamiltonian, whose Z and X tables and coefficients are the
+                  memory-mapped arrays. The stored phases are those of the Paulis with their phase
+                  absorbed into the coefficients, so SparsePauliOp neither copies the arrays nor
+                  rescales the coefficients into a new array. Only a phase per term is allocated.
+        """
+        z, x, phase, coeffs = (np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode="r")
+                               for name in ("z", "x", "phase", "coeffs"))
+        paulis = PauliList.from_symplectic(z, x, np.asarray(phase))
+        return SparsePauliOp(paulis, coeffs, ignore_pauli_phase=True, copy=False)
+
+    def close(self) -> None:
+        """
+                Removes the files of the Hamiltonian.
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class MultiStartRun:
+    """
+        Result of one start of a multi-start VQE.
+    """
+    def __init__(self, seed: int, energy_list: List[float], params: np.ndarray, ansatz: QuantumCircuit,
+                 top_results: List[Tuple[float, np.ndarray]], best_energy: float, ansatz_key: str = ""):
+        """
+                Parameters:
+                - seed: Seed of the start.
+                - energy_list: Its trajectory, the energies of all its evaluations.
+                - params: The parameters returned by its optimizer.
+                - ansatz: The ansatz circuit.
+                - top_results: Its best (energy, params) results, sorted by increasing energy.
+                - best_energy: Its lowest evaluated energy.
+                - ansatz_key: Key of its ansatz configuration in the parameter library.
+        """
+        self.seed = seed
+        self.energy_list = energy_list
+        self.params = params
+        self.ansatz = ansatz
+        self.top_results = top_results
+        self.best_energy = best_energy
+        self.ansatz_key = ansatz_key
+
+
+class MultiStartResult:
+    """
+        Results of all starts of a multi-start VQE.
+    """
+    def __init__(self, runs: List[MultiStartRun], top_k: int = 6):
+        """
+                Parameters:
+                - runs: The results of the starts, in the order of their seeds.
+                - top_k: Number of best results kept across all starts.
+        """
+        self.runs = runs
+        self.best = min(runs, key=lambda run: run.best_energy)
+        self.top_results = sorted((result for run in runs for result in run.top_results),
+                                  key=lambda result: result[0])[:top_k]
+
+    @property
+    def trajectories(self) -> List[List[float]]:
+        """
+                Returns the energy trajectories of all starts.
+        """
+        return [run.energy_list for run in self.runs]
+
+    def vqe_result(self):
+        """
+                Returns:
+                - The result of the best start in the format of VQE5.run_vqe: energy_list, params,
+                  ansatz and the top results across all starts.
+        """
+        return self.best.energy_list, self.best.params, self.best.ansatz, self.top_results
+
+
+def _run_start(shared_hamiltonian: SharedHamiltonian, seed: int, vqe_options: Dict[str, Any],
+               estimator_factory: Optional[Callable[[int], Any]],
+               sampler_factory: Optional[Callable[[int], Any]]) -> MultiStartRun:
+    """
+        Runs one start in a worker process, with its own VQE instance and primitives.
+    """
+    estimator = estimator_factory(seed) if estimator_factory is not None else None
+    sampler = sampler_factory(seed) if sampler_factory is not None else None
+    if estimator is None and sampler is None and vqe_options.get("backend") is None:
+        estimator, sampler = StatevectorEstimator(seed=seed), StatevectorSampler(seed=seed)
+    vqe = VQE5(None, shared_hamiltonian.load(), estimator=estimator, sampler=sampler, seed=seed, **vqe_options)
+    energy_list, params, ansatz, top_results = vqe.run_vqe()
+    return MultiStartRun(seed, list(energy_list), params, ansatz, top_results, vqe.best_energy, vqe.ansatz_key)
+
+
+class MultiStartVQE:
+    """
+        Runs independent VQE optimizations from different seeds in a process pool, so that random
+        restarts of local simulations use all cores. Every start runs its own VQE5 instance with
+        its own primitives, while the Hamiltonian is written once and memory-mapped by the workers
+        (see :class:`SharedHamiltonian`). Starts are meant for local simulators; a runtime service
+        is not shared between processes.
+    """
+    def __init__(self, hamiltonian: SparsePauliOp, num_starts: int = 4, seeds: Optional[Sequence[int]] = None,
+                 processes: Optional[int] = None, estimator_factory: Optional[Callable[[int], Any]] = None,
+                 sampler_factory: Optional[Callable[[int], Any]] = None, parameter_library_dir: Optional[str] = None,
+                 sequence: Optional[str] = None, warm_start: bool = True, mp_context: str = "spawn",
+                 **vqe_options):
+        """
+                Parameters:
+                - hamiltonian: Pauli terms defining the Hamiltonian.
+                - num_starts: Number of starts, if no seeds are given.
+                - seeds: Seeds of the starts; 0 to num_starts - 1 if None.
+                - processes: Number of worker processes; the number of CPUs if None.
+                - estimator_factory: Optional picklable callable creating the Estimator of a start from
+                  its seed, e.g. an Aer Estimator. Without factories and a backend, every start uses
+                  seeded statevector primitives.
+                - sampler_factory: Optional picklable callable creating the Sampler of a start from its seed.
+                - parameter_library_dir: Optional directory of a ParameterLibrary. The first start warm
+                  starts from it if warm_start is True, and the best parameters of all starts are
+                  written back to it.
+                - sequence: Main chain sequence of the folded peptide, which indexes the library.
+                - warm_start: If True, the first start begins from the library parameters of the most
+                  similar peptide and the others from random parameters.
+                - mp_context: Start method of the worker processes.
+                - vqe_options: Further keyword arguments of VQE5, e.g. maxiter, optimizer, backend or
+                  ansatz_factory, shared by all starts.
+        """
+        per_start = [option for option in _PER_START_OPTIONS if option in vqe_options]
+        if per_start:
+            raise ValueError(f"The options {per_start} are set per start and cannot be shared by all starts.")
+        self.hamiltonian = hamiltonian
+        self.seeds = list(seeds) if seeds is not None else list(range(num_starts))
+        self.processes = processes
+        self.estimator_factory = estimator_factory
+        self.sampler_factory = sampler_factory
+        self.parameter_library_dir = parameter_library_dir
+        self.sequence = sequence
+        self.warm_start = warm_start
+        self.mp_context = mp_context
+        self.vqe_options = vqe_options
+
+    def _start_options(self, index: int) -> Dict[str, Any]:
+        """
+                Returns:
+                - options: The VQE5 options of a start. Only the first start uses the parameter
+                  library, so that the library is written by one process at a time.
+        """
+        if index > 0 or self.parameter_library_dir is None or not self.warm_start:
+            return self.vqe_options
+        return dict(self.vqe_options, parameter_library_dir=self.parameter_library_dir,
+                    sequence=self.sequence, warm_start=True)
+
+    def run(self) -> MultiStartResult:
+        """
+                Runs all starts and waits for them.
+
+                Returns:
+                - result: The best start and the trajectories and results of all starts.
+        """
+        with SharedHamiltonian(self.hamiltonian) as shared_hamiltonian:
+            context = multiprocessing.get_context(self.mp_context)
+            with ProcessPoolExecutor(max_workers=self.processes, mp_context=context) as pool:
+                futures = [
+                    pool.submit(_run_start, shared_hamiltonian, seed, self._start_options(index),
+                                self.estimator_factory, self.sampler_factory)
+                    for index, seed in enumerate(self.seeds)
+                ]
+                runs = [future.result() for future in futures]
+
+        result = MultiStartResult(runs, top_k=self.vqe_options.get("top_k", 6))
+        for run in runs:
+            print(f"Start with seed {run.seed}: best energy {run.best_energy}")
+        if self.parameter_library_dir is not None and result.top_results:
+            energy, params = result.top_results[0]
+            ParameterLibrary(self.parameter_library_dir).add(self.sequence or "", self.hamiltonian.num_qubits,
+                                                             result.best.ansatz_key, params, energy)
+        return result
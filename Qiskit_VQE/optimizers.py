@@ -0,0 +1,321 @@
+# --*-- conding:utf-8 --*--
+# @Time : 10/19/26 10:02 AM
+# @File : optimizers.py
+
+import math
+from typing import Callable, Optional
+
+import numpy as np
+from scipy.optimize import OptimizeResult
+
+
+class PopulationOptimizer:
+    """
+        Base class of optimizers that evaluate a batch of parameter vectors per iteration, such as
+        the population of an evolution strategy or the shifted points of a gradient. A batch is
+        evaluated by a single call of a batched objective, which VQE submits as one Estimator pub,
+        so an iteration costs one round trip instead of one per parameter vector.
+
+        Optimizers follow an ask/tell interface: :meth:`ask` returns the batch of the next
+        iteration and :meth:`tell` updates the optimizer with its energies. The best evaluated
+        parameter vector is returned as the result.
+    """
+    def __init__(self, population_size: Optional[int] = None, seed=None):
+        """
+                Parameters:
+                - population_size: Number of parameter vectors evaluated per iteration. A default
+                  depending on the number of parameters is used if None.
+                - seed: Seed of the random number generator of the optimizer.
+        """
+        self.population_size = population_size
+        self.rng = np.random.default_rng(seed)
+        self.best_x = None
+        self.best_fun = math.inf
+        self.nit = 0
+        self.nfev = 0
+
+    def initialize(self, x0: np.ndarray) -> None:
+        """
+                Initializes the search around a starting point.
+
+                Parameters:
+                - x0: The starting parameter vector.
+        """
+        raise NotImplementedError
+
+    def ask(self) -> np.ndarray:
+        """
+                Returns:
+                - population: The parameter vectors to evaluate next, of shape (population size, number of parameters).
+        """
+        raise NotImplementedError
+
+    def tell(self, population: np.ndarray, energies: np.ndarray) -> None:
+        """
+                Updates the optimizer with the energies of the population returned by :meth:`ask`.
+
+                Parameters:
+                - population: The evaluated parameter vectors.
+                - energies: The energy of every parameter vector.
+        """
+        best = int(np.argmin(energies))
+        if energies[best] < self.best_fun:
+            self.best_fun = float(energies[best])
+            self.best_x = np.array(population[best])
+        self.nit += 1
+
+    def minimize(self, batch_fun: Callable[[np.ndarray], np.ndarray], x0: np.ndarray, maxiter: int,
+                 callback: Optional[Callable[["PopulationOptimizer"], None]] = None,
+                 resume: bool = False) -> OptimizeResult:
+        """
+                Minimizes a batched objective.
+
+                Parameters:
+                - batch_fun: Maps an array of parameter vectors of shape (P, n) to their P energies.
+                - x0: The starting parameter vector. It is ignored if resume is True.
+                - maxiter: Total number of iterations, i.e. of evaluated batches.
+                - callback: Called with the optimizer after every iteration.
+                - resume: If True, the optimizer continues from its current state, e.g. after it was
+                  restored from a checkpoint, instead of being initialized at x0.
+
+                Returns:
+                - res: The best parameters found in res.x and their energy in res.fun.
+        """
+        if not resume:
+            self.initialize(np.asarray(x0, dtype=float))
+            self.best_x = None
+            self.best_fun = math.inf
+            self.nit = 0
+            self.nfev = 0
+        while self.nit < maxiter:
+            population = self.ask()
+            energies = np.asarray(batch_fun(population), dtype=float)
+            self.nfev += len(population)
+            self.tell(population, energies)
+            if callback is not None:
+                callback(self)
+        return OptimizeResult(x=self.best_x, fun=self.best_fun, nit=self.nit, nfev=self.nfev, success=True)
+
+
+class CMAES(PopulationOptimizer):
+    """
+        Covariance matrix adaptation evolution strategy, (mu/mu_w, lambda)-CMA-ES with cumulative
+        step-size adaptation as described by Hansen, "The CMA Evolution Strategy: A Tutorial".
+    """
+    def __init__(self, population_size: Optional[int] = None, sigma0: float = 0.5, seed=None):
+        """
+                Parameters:
+                - population_size: Number of samples per generation, 4 + 3 ln(n) if None.
+                - sigma0: Initial step size in radians.
+                - seed: Seed of the random number generator.
+        """
+        super().__init__(population_size, seed)
+        self.sigma0 = sigma0
+
+    def initialize(self, x0: np.ndarray) -> None:
+        n = len(x0)
+        self.lam = self.population_size or 4 + int(3 * math.log(n))
+        self.mu = self.lam // 2
+        weights = math.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+        self.weights = weights / weights.sum()
+        self.mueff = 1 / np.sum(self.weights ** 2)
+
+        self.cc = (4 + self.mueff / n) / (n + 4 + 2 * self.mueff / n)
+        self.cs = (self.mueff + 2) / (n + self.mueff + 5)
+        self.c1 = 2 / ((n + 1.3) ** 2 + self.mueff)
+        self.cmu = min(1 - self.c1, 2 * (self.mueff - 2 + 1 / self.mueff) / ((n + 2) ** 2 + self.mueff))
+        self.damps = 1 + 2 * max(0.0, math.sqrt((self.mueff - 1) / (n + 1)) - 1) + self.cs
+        self.chi_n = math.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))
+
+        self.mean = np.array(x0)
+        self.sigma = self.sigma0
+        self.pc = np.zeros(n)
+        self.ps = np.zeros(n)
+        self.cov = np.eye(n)
+        self.eigenbasis = np.eye(n)
+        self.eigenvalues = np.ones(n)
+
+    def ask(self) -> np.ndarray:
+        z = self.rng.standard_normal((self.lam, len(self.mean)))
+        return self.mean + self.sigma * (z * self.eigenvalues) @ self.eigenbasis.T
+
+    def tell(self, population: np.ndarray, energies: np.ndarray) -> None:
+        super().tell(population, energies)
+        n = len(self.mean)
+        selected = population[np.argsort(energies)[:self.mu]]
+        mean_old = self.mean
+        self.mean = self.weights @ selected
+        y_w = (self.mean - mean_old) / self.sigma
+
+        inv_sqrt_cov = self.eigenbasis @ np.diag(1 / self.eigenvalues) @ self.eigenbasis.T
+        self.ps = (1 - self.cs) * self.ps + math.sqrt(self.cs * (2 - self.cs) * self.mueff) * inv_sqrt_cov @ y_w
+        ps_norm = np.linalg.norm(self.ps)
+        h_sigma = ps_norm / math.sqrt(1 - (1 - self.cs) ** (2 * self.nit)) / self.chi_n < 1.4 + 2 / (n + 1)
+        self.pc = (1 - self.cc) * self.pc + h_sigma * math.sqrt(self.cc * (2 - self.cc) * self.mueff) * y_w
+
+        steps = (selected - mean_old) / self.sigma
+        rank_one = np.outer(self.pc, self.pc) + (1 - h_sigma) * self.cc * (2 - self.cc) * self.cov
+        rank_mu = steps.T @ (self.weights[:, None] * steps)
+        self.cov = (1 - self.c1 - self.cmu) * self.cov + self.c1 * rank_one + self.cmu * rank_mu
+        self.sigma *= math.exp(self.cs / self.damps * (ps_norm / self.chi_n - 1))
+
+        self.cov = (self.cov + self.cov.T) / 2
+        eigenvalues, self.eigenbasis = np.linalg.eigh(self.cov)
+        self.eigenvalues = np.sqrt(np.maximum(eigenvalues, 1e-20))
+
+
+class DifferentialEvolution(PopulationOptimizer):
+    """
+        Differential evolution with the rand/1/bin strategy. The trial vectors of all members are
+        generated at once, so that a generation is evaluated in a single batch.
+    """
+    def __init__(self, population_size: Optional[int] = 20, mutation: float = 0.8,
+                 crossover: float = 0.9, init_range: float = math.pi, seed=None):
+        """
+                Parameters:
+                - population_size: Number of members of the population.
+                - mutation: Differential weight F.
+                - crossover: Crossover probability CR.
+                - init_range: Members are initialized uniformly within this distance of x0.
+                - seed: Seed of the random number generator.
+        """
+        super().__init__(population_size, seed)
+        self.mutation = mutation
+        self.crossover = crossover
+        self.init_range = init_range
+
+    def initialize(self, x0: np.ndarray) -> None:
+        size = max(self.population_size or 20, 4)
+        self.population = x0 + self.rng.uniform(-self.init_range, self.init_range, (size, len(x0)))
+        self.population[0] = x0
+        self.energies = None
+
+    def ask(self) -> np.ndarray:
+        if self.energies is None:
+            return self.population
+        size, n = self.population.shape
+        # Three distinct members other than the target member for every trial vector.
+        choices = np.argsort(self.rng.random((size, size - 1)), axis=1)[:, :3]
+        choices += choices >= np.arange(size)[:, None]
+        a, b, c = (self.population[choices[:, i]] for i in range(3))
+        mutants = a + self.mutation * (b - c)
+        cross = self.rng.random((size, n)) < self.crossover
+        cross[np.arange(size), self.rng.integers(n, size=size)] = True
+        return np.where(cross, mutants, self.population)
+
+    def tell(self, population: np.ndarray, energies: np.ndarray) -> None:
+        super().tell(population, energies)
+        if self.energies is None:
+            self.energies = np.array(energies)
+            return
+        improved = energies <= self.energies
+        self.population[improved] = population[improved]
+        self.energies[improved] = energies[improved]
+
+
+class SPSA(PopulationOptimizer):
+    """
+        Simultaneous perturbation stochastic approximation. Every iteration estimates the gradient
+        from the two energies at x + c_k * delta and x - c_k * delta for a random direction delta
+        of +-1 entries, which are evaluated together in one batch. The gains follow Spall's
+        a_k = a / (A + k + 1)^alpha and c_k = c / (k + 1)^gamma.
+    """
+    def __init__(self, learning_rate: float = 0.2, perturbation: float = 0.1, alpha: float = 0.602,
+                 gamma: float = 0.101, stability: float = 0.0, seed=None):
+        """
+                Parameters:
+                - learning_rate: Gain a of the step size.
+                - perturbation: Gain c of the perturbation size.
+                - alpha: Decay exponent of the step size.
+                - gamma: Decay exponent of the perturbation size.
+                - stability: Stability constant A of the step size.
+                - seed: Seed of the random number generator.
+        """
+        super().__init__(2, seed)
+        self.learning_rate = learning_rate
+        self.perturbation = perturbation
+        self.alpha = alpha
+        self.gamma = gamma
+        self.stability = stability
+
+    def initialize(self, x0: np.ndarray) -> None:
+        self.x = np.array(x0)
+
+    def ask(self) -> np.ndarray:
+        self.delta = self.rng.choice([-1.0, 1.0], size=len(self.x))
+        self.c_k = self.perturbation / (self.nit + 1) ** self.gamma
+        return np.array([self.x + self.c_k * self.delta, self.x - self.c_k * self.delta])
+
+    def tell(self, population: np.ndarray, energies: np.ndarray) -> None:
+        a_k = self.learning_rate / (self.stability + self.nit + 1) ** self.alpha
+        super().tell(population, energies)
+        gradient = (energies[0] - energies[1]) / (2 * self.c_k) * self.delta
+        self.x = self.x - a_k * gradient
+
+
+class ParameterShiftGradientDescent(PopulationOptimizer):
+    """
+        Gradient descent with exact gradients from the parameter-shift rule,
+        dE/dtheta_i = (E(theta + s e_i) - E(theta - s e_i)) / (2 sin s). The current point and all
+        2n shifted points of an iteration are evaluated together in one batch. The rule assumes
+        that every parameter enters a single Pauli rotation, as in EfficientSU2 and RealAmplitudes.
+    """
+    def __init__(self, learning_rate: float = 0.1, shift: float = math.pi / 2, seed=None):
+        """
+                Parameters:
+                - learning_rate: Step size.
+                - shift: Parameter shift s.
+                - seed: Seed of the random number generator.
+        """
+        super().__init__(None, seed)
+        self.learning_rate = learning_rate
+        self.shift = shift
+
+    def initialize(self, x0: np.ndarray) -> None:
+        self.x = np.array(x0)
+
+    def ask(self) -> np.ndarray:
+        shifts = self.shift * np.eye(len(self.x))
+        return np.vstack([self.x[None, :], self.x + shifts, self.x - shifts])
+
+    def tell(self, population: np.ndarray, energies: np.ndarray) -> None:
+        super().tell(population, energies)
+        n = len(self.x)
+        gradient = (energies[1:n + 1] - energies[n + 1:]) / (2 * math.sin(self.shift))
+        self.x = self.x - self._step(gradient)
+
+    def _step(self, gradient: np.ndarray) -> np.ndarray:
+        return self.learning_rate * gradient
+
+
+class Adam(ParameterShiftGradientDescent):
+    """
+        Adam (Kingma and Ba) on parameter-shift gradients, evaluated in one batch per iteration.
+    """
+    def __init__(self, learning_rate: float = 0.05, beta1: float = 0.9, beta2: float = 0.999,
+                 epsilon: float = 1e-8, shift: float = math.pi / 2, seed=None):
+        """
+                Parameters:
+                - learning_rate: Step size.
+                - beta1: Decay rate of the first moment estimate.
+                - beta2: Decay rate of the second moment estimate.
+                - epsilon: Regularization of the denominator.
+                - shift: Parameter shift s.
+                - seed: Seed of the random number generator.
+        """
+        super().__init__(learning_rate, shift, seed)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+
+    def initialize(self, x0: np.ndarray) -> None:
+        super().initialize(x0)
+        self.m = np.zeros(len(x0))
+        self.v = np.zeros(len(x0))
+
+    def _step(self, gradient: np.ndarray) -> np.ndarray:
+        self.m = self.beta1 * self.m + (1 - self.beta1) * gradient
+        self.v = self.beta2 * self.v + (1 - self.beta2) * gradient ** 2
+        m_hat = self.m / (1 - self.beta1 ** self.nit)
+        v_hat = self.v / (1 - self.beta2 ** self.nit)
+        return self.learning_rate * m_hat / (np.sqrt(v_hat) + self.epsilon)
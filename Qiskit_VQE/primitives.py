@@ -0,0 +1,190 @@
+# --*-- conding:utf-8 --*--
+# @Time : 10/19/26 9:10 AM
+# @File : primitives.py
+
+import math
+from contextlib import contextmanager
+from typing import Iterator, Optional, Sequence
+
+from qiskit import QuantumCircuit
+from qiskit.primitives import (
+    BackendEstimatorV2,
+    BackendSamplerV2,
+    BaseEstimatorV2,
+    BaseSamplerV2,
+    StatevectorEstimator,
+    StatevectorSampler,
+)
+from qiskit.providers import BackendV2
+from qiskit.transpiler import Target
+from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager
+from qiskit_ibm_runtime import EstimatorV2 as RuntimeEstimator
+from qiskit_ibm_runtime import IBMBackend
+from qiskit_ibm_runtime import SamplerV2 as RuntimeSampler
+from qiskit_ibm_runtime import Session
+
+from .transpile_cache import TranspileCache
+
+
+class PrimitiveProvider:
+    """
+        Resolves the backend and the Estimator/Sampler primitives that VQE runs and measurements
+        are executed with, so that the IBM Quantum runtime is one option among local ones:
+
+        - Injected primitives (e.g. StatevectorEstimator, Aer primitives) are used as they are.
+          Their shots or precision are left as configured by the caller.
+        - IBM Quantum backends are used through runtime primitives in a Session.
+        - Any other BackendV2 (e.g. an AerSimulator or a fake backend with a noise model) is used
+          through BackendEstimatorV2/BackendSamplerV2.
+        - Without any backend, missing primitives fall back to the statevector reference
+          primitives.
+
+        If no backend is given and a primitive is missing, the least busy backend of the runtime
+        service is selected, as before. With a SessionManager, its backend and its long-lived
+        session are used instead, so that consecutive runs share them. Only the primitives the
+        caller needs count: if all of them are given, no backend is selected, so that injected
+        local primitives never trigger a backend lookup.
+    """
+    def __init__(self, service=None, backend: Optional[BackendV2] = None,
+                 estimator: Optional[BaseEstimatorV2] = None,
+                 sampler: Optional[BaseSamplerV2] = None, min_qubit_num=100,
+                 transpile_cache: Optional[TranspileCache] = None, session_manager=None,
+                 needs: Sequence[str] = ("estimator", "sampler")):
+        """
+                Parameters:
+                - service: QiskitRuntimeService object, only needed if no backend or primitives are given.
+                - backend: Backend to transpile for and, unless primitives are given, to run on.
+                - estimator: EstimatorV2 primitive to run energy estimations with.
+                - sampler: SamplerV2 primitive to run measurements with.
+                - min_qubit_num: Minimum number of qubits of a backend selected from the service.
+                - transpile_cache: Optional on-disk cache of transpiled circuits.
+                - session_manager: Optional SessionManager whose backend and session are used,
+                  unless a backend is given.
+                - needs: The primitives the caller uses, "estimator" and/or "sampler". A backend is
+                  only selected if one of them is not given.
+        """
+        if (service is None and backend is None and estimator is None and sampler is None
+                and session_manager is None):
+            raise ValueError("A runtime service, a backend, primitives or a session manager must be given.")
+        self.service = service
+        self.min_qubit_num = min_qubit_num
+        self.transpile_cache = transpile_cache
+        self._estimator = estimator
+        self._sampler = sampler
+        injected = {"estimator": estimator, "sampler": sampler}
+        primitive_missing = any(injected[kind] is None for kind in needs)
+        self.session_manager = session_manager if backend is None and primitive_missing else None
+        if self.session_manager is not None:
+            backend = self.session_manager.select_backend(min_qubit_num)
+        elif backend is None and service is not None and primitive_missing:
+            backend = self._select_backend(min_qubit_num)
+        self.backend = backend
+
+    def _select_backend(self, min_quits):
+        """
+                Selects the least busy IBM Quantum backend with enough qubits and returns it.
+                This ensures that the quantum job is processed faster by using a backend with fewer queued jobs.
+
+                Returns:
+                - backend: The IBM Quantum backend with the least busy queue.
+        """
+        backend = self.service.least_busy(simulator=False, operational=True, min_num_qubits=min_quits)
+        return backend
+
+    @property
+    def exact_sampling(self) -> bool:
+        """
+                Returns True if no sampler, backend or session manager is configured, i.e. if
+                measurements would fall back to the statevector reference sampler.
+        """
+        return self._sampler is None and self.backend is None and self.session_manager is None
+
+    @property
+    def target(self) -> Optional[Target]:
+        """
+                Returns the target circuits are transpiled for, or None if circuits are run as they are.
+        """
+        return self.backend.target if self.backend is not None else None
+
+    def transpile(self, circuit: QuantumCircuit, optimization_level: int) -> QuantumCircuit:
+        """
+                Transpiles a circuit to the instruction set of the backend, or loads it from the
+                transpile cache if it was transpiled for the same target before. Without a backend,
+                the circuit is returned unchanged, since the statevector primitives run any circuit.
+
+                Parameters:
+                - circuit: The circuit to transpile.
+                - optimization_level: Optimization level of the preset pass manager.
+
+                Returns:
+                - isa_circuit: The transpiled circuit, with its layout if it was transpiled.
+        """
+        if self.target is None:
+            return circuit
+        key = None
+        if self.transpile_cache is not None:
+            key = self.transpile_cache.key(circuit, self.target, optimization_level, self.backend.name)
+            isa_circuit = self.transpile_cache.get(key)
+            if isa_circuit is not None:
+                return isa_circuit
+        pm = generate_preset_pass_manager(target=self.target, optimization_level=optimization_level)
+        isa_circuit = pm.run(circuit)
+        if key is not None:
+            self.transpile_cache.put(key, isa_circuit)
+        return isa_circuit
+
+    @contextmanager
+    def estimator(self, shots: Optional[int] = None) -> Iterator[BaseEstimatorV2]:
+        """
+                Opens an Estimator for the duration of a run, in a Session on IBM Quantum backends.
+
+                Parameters:
+                - shots: Default number of shots of estimators created by the provider.
+
+                Yields:
+                - estimator: An EstimatorV2 primitive.
+        """
+        if self._estimator is not None:
+            yield self._estimator
+        elif self.session_manager is not None:
+            # The session stays open for later runs.
+            yield self.session_manager.estimator(shots)
+        elif isinstance(self.backend, IBMBackend):
+            with Session(backend=self.backend) as session:
+                estimator = RuntimeEstimator(mode=session)
+                if shots is not None:
+                    estimator.options.default_shots = shots
+                yield estimator
+        elif self.backend is not None:
+            estimator = BackendEstimatorV2(backend=self.backend)
+            if shots is not None:
+                # The standard error of an estimate with n shots scales as 1 / sqrt(n).
+                estimator.options.default_precision = 1 / math.sqrt(shots)
+            yield estimator
+        else:
+            yield StatevectorEstimator()
+
+    @contextmanager
+    def sampler(self, shots: Optional[int] = None) -> Iterator[BaseSamplerV2]:
+        """
+                Opens a Sampler for the duration of a run, in a Session on IBM Quantum backends.
+
+                Parameters:
+                - shots: Default number of shots of samplers created by the provider.
+
+                Yields:
+                - sampler: A SamplerV2 primitive.
+        """
+        if self._sampler is not None:
+            yield self._sampler
+        elif self.session_manager is not None:
+            yield self.session_manager.sampler(shots)
+        elif isinstance(self.backend, IBMBackend):
+            with Session(backend=self.backend) as session:
+                options = {"default_shots": shots} if shots is not None else None
+                yield RuntimeSampler(mode=session, options=options)
+        elif self.backend is not None:
+            options = {"default_shots": shots} if shots is not None else None
+            yield BackendSamplerV2(backend=self.backend, options=options)
+        else:
+            yield StatevectorSampler(default_shots=shots if shots is not None else 1024)
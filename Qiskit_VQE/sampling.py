@@ -0,0 +1,153 @@
+# --*-- conding:utf-8 --*--
+# @Time : 10/19/26 2:10 PM
+# @File : sampling.py
+
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+from qiskit.primitives import BitArray
+from qiskit.quantum_info import SparsePauliOp
+
+from Protein_Folding.qubit_utils.diagonal_energy import DiagonalEnergyEvaluator
+
+
+def unpack_bit_array(bit_array: BitArray) -> np.ndarray:
+    """
+        Unpacks the shots of a BitArray into bits.
+
+        Parameters:
+        - bit_array: Measurement results of a Sampler pub, e.g. pub_result.data.meas.
+
+        Returns:
+        - bits: uint8 array of shape (*bit_array.shape, shots, num_bits) whose column i holds clbit i.
+    """
+    return _unpack(bit_array.array, bit_array.num_bits)
+
+
+def _unpack(packed: np.ndarray, num_bits: int) -> np.ndarray:
+    # Bytes are big-endian, so reversing the unpacked bits puts clbit 0 first.
+    bits = np.unpackbits(packed, axis=-1)[..., ::-1]
+    return bits[..., :num_bits]
+
+
+def bits_to_bitstring(bits: np.ndarray) -> str:
+    """
+        Returns:
+        - bitstring: The bits of one shot in Qiskit order, with clbit 0 rightmost.
+    """
+    return "".join("1" if bit else "0" for bit in bits[::-1])
+
+
+def conditional_value_at_risk(shot_energies: np.ndarray, alpha: float) -> np.ndarray:
+    """
+        Computes the Conditional Value-at-Risk of sampled energies, the mean of the lowest alpha
+        fraction of the shots. The shot at the boundary is weighted by the remaining fraction, so
+        that the CVaR is continuous in alpha; alpha = 1 gives the mean energy.
+
+        Parameters:
+        - shot_energies: Array of shape (P, shots) with the energies of the shots of P parameter sets.
+        - alpha: Fraction of the shots in (0, 1].
+
+        Returns:
+        - cvar: Array of the P CVaR values.
+    """
+    if not 0 < alpha <= 1:
+        raise ValueError(f"alpha must be in (0, 1], got {alpha}.")
+    shots = shot_energies.shape[1]
+    tail = alpha * shots
+    num_full = int(math.floor(tail))
+    sorted_energies = np.sort(shot_energies, axis=1)
+    cvar = sorted_energies[:, :num_full].sum(axis=1)
+    if num_full < shots:
+        cvar += (tail - num_full) * sorted_energies[:, num_full]
+    return cvar / tail
+
+
+def standard_errors(shot_energies: np.ndarray, alpha: Optional[float] = None) -> np.ndarray:
+    """
+        Estimates the standard errors of the mean, or of the CVaR, of sampled energies from the
+        spread of the shots that enter it.
+
+        Parameters:
+        - shot_energies: Array of shape (P, shots) with the energies of the shots of P parameter sets.
+        - alpha: If given, the errors of the CVaR at this alpha, estimated from its tail of shots.
+
+        Returns:
+        - errors: Array of the P standard errors.
+    """
+    if alpha is not None:
+        tail = max(int(math.ceil(alpha * shot_energies.shape[1])), 1)
+        shot_energies = np.sort(shot_energies, axis=1)[:, :tail]
+    return shot_energies.std(axis=1) / math.sqrt(shot_energies.shape[1])
+
+
+class SampledEnergyEstimator:
+    """
+        Estimates energies of a Hamiltonian that is diagonal in the Z basis, such as the protein
+        folding Hamiltonian, from the shots of a Sampler. Every shot is a basis state whose energy
+        is evaluated exactly over the Z masks of the Hamiltonian, so one measured circuit gives
+        the energy estimate and the best observed bitstring at once. Repeated shots are evaluated
+        once, which matters once the sampled distribution concentrates on a few states.
+    """
+    def __init__(self, hamiltonian: SparsePauliOp):
+        """
+                Parameters:
+                - hamiltonian: A Hamiltonian of Z and identity terms on the measured qubits.
+        """
+        self.evaluator = DiagonalEnergyEvaluator(hamiltonian)
+
+    def shot_energies(self, bit_array: BitArray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+                Evaluates the energy of every shot.
+
+                Parameters:
+                - bit_array: Measurement results of a pub with parameter values of shape (P,).
+
+                Returns:
+                - energies: Array of shape (P, shots) with the energy of every shot.
+                - states: Array of shape (P, shots) with the row of bits of every shot.
+                - bits: Array of shape (number of distinct shots, num_qubits) with the measured states.
+        """
+        packed = bit_array.array.reshape(-1, bit_array.array.shape[-2], bit_array.array.shape[-1])
+        num_sets, shots, num_bytes = packed.shape
+        unique_packed, states = np.unique(packed.reshape(-1, num_bytes), axis=0, return_inverse=True)
+        bits = _unpack(unique_packed, bit_array.num_bits)
+        states = states.reshape(num_sets, shots)
+        return self.evaluator.energies(bits)[states], states, bits
+
+    def evaluate(self, bit_array: BitArray,
+                 cvar_alpha: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, List[Tuple[float, str]]]:
+        """
+                Estimates the objective of every parameter set of a pub from the energies of its shots.
+
+                Parameters:
+                - bit_array: Measurement results of a pub with parameter values of shape (P,).
+                - cvar_alpha: If given, the objective is the CVaR of the shot energies at this alpha
+                  instead of their mean.
+
+                Returns:
+                - energies: Array of the P objective values.
+                - errors: Array of their estimated standard errors.
+                - best_samples: The lowest-energy (energy, bitstring) shot of every parameter set.
+        """
+        shot_energies, states, bits = self.shot_energies(bit_array)
+        if cvar_alpha is None:
+            objective = shot_energies.mean(axis=1)
+        else:
+            objective = conditional_value_at_risk(shot_energies, cvar_alpha)
+        errors = standard_errors(shot_energies, cvar_alpha)
+        return objective, errors, self.best_samples(shot_energies, states, bits)
+
+    @staticmethod
+    def best_samples(shot_energies: np.ndarray, states: np.ndarray,
+                     bits: np.ndarray) -> List[Tuple[float, str]]:
+        """
+                Returns:
+                - best_samples: The lowest-energy (energy, bitstring) shot of every parameter set.
+        """
+        best = np.argmin(shot_energies, axis=1)
+        return [
+            (float(shot_energies[i, shot]), bits_to_bitstring(bits[states[i, shot]]))
+            for i, shot in enumerate(best)
+        ]
@@ -0,0 +1,257 @@
+# --*-- conding:utf-8 --*--
+# @Time : 10/19/26 7:00 PM
+# @File : session.py
+
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from qiskit.providers import BackendV2
+from qiskit_ibm_runtime import EstimatorV2 as RuntimeEstimator
+from qiskit_ibm_runtime import SamplerV2 as RuntimeSampler
+from qiskit_ibm_runtime import Session
+
+# Session statuses in which no further jobs are accepted, e.g. after the session expired.
+CLOSED_STATUSES = ("Closed", "In progress, not accepting new jobs")
+
+
+class RuntimeSession:
+    """
+        A Qiskit Runtime Session with the interface the SessionManager expects of sessions:
+        estimator(shots), sampler(shots), status() and close().
+    """
+    def __init__(self, backend: BackendV2, max_time=None):
+        """
+                Parameters:
+                - backend: The IBM Quantum backend of the session.
+                - max_time: Optional maximum time of the session.
+        """
+        self.session = Session(backend=backend, max_time=max_time)
+
+    def estimator(self, shots: Optional[int] = None):
+        estimator = RuntimeEstimator(mode=self.session)
+        if shots is not None:
+            estimator.options.default_shots = shots
+        return estimator
+
+    def sampler(self, shots: Optional[int] = None):
+        options = {"default_shots": shots} if shots is not None else None
+        return RuntimeSampler(mode=self.session, options=options)
+
+    def status(self) -> Optional[str]:
+        return self.session.status()
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class SessionManager:
+    """
+        Keeps one backend and one session alive across consecutive VQE runs and sampling jobs,
+        e.g. for all proteins of a batch, instead of opening a session per run and looking up the
+        least busy backend for every measurement.
+
+        The session is opened with the first job. Jobs run through managed primitives: if a job
+        cannot be submitted or fails while the session is no longer active, e.g. because it
+        expired, the session is renewed and the job resubmitted, up to max_renewals times per job
+        across its submission and its result. Failures of an active session are raised as they are.
+
+        Sessions are created by session_factory from the backend, :class:`RuntimeSession` by
+        default; a :class:`MockRuntimeService` provides sessions that simulate queue delays and
+        expiry locally.
+    """
+    def __init__(self, service=None, backend: Optional[BackendV2] = None, min_qubit_num: int = 100,
+                 session_factory: Optional[Callable[[BackendV2], Any]] = None, max_renewals: int = 3):
+        """
+                Parameters:
+                - service: QiskitRuntimeService (or MockRuntimeService) to select the least busy backend from.
+                - backend: Optional fixed backend; the service is then not asked for one.
+                - min_qubit_num: Minimum number of qubits of a selected backend.
+                - session_factory: Creates a session for a backend; RuntimeSession if None.
+                - max_renewals: Maximum number of renewals for one job.
+        """
+        if service is None and backend is None:
+            raise ValueError("A runtime service or a backend must be given.")
+        self.service = service
+        self.min_qubit_num = min_qubit_num
+        self.session_factory = session_factory if session_factory is not None else RuntimeSession
+        self.max_renewals = max_renewals
+        self.backend = backend
+        self._fixed_backend = backend is not None
+        self._session = None
+        self._primitives: Dict[Tuple[str, Optional[int]], Any] = {}
+        self.num_sessions = 0
+
+    def select_backend(self, min_qubit_num: Optional[int] = None) -> BackendV2:
+        """
+                Returns the backend of the manager. The least busy backend is only looked up again
+                if the current one has fewer than min_qubit_num qubits, which also ends its session.
+
+                Parameters:
+                - min_qubit_num: Minimum number of qubits; the manager's minimum if None.
+
+                Returns:
+                - backend: The backend.
+        """
+        min_qubit_num = self.min_qubit_num if min_qubit_num is None else min_qubit_num
+        if self.backend is not None and (self._fixed_backend or self.backend.num_qubits >= min_qubit_num):
+            return self.backend
+        self.close()
+        self.backend = self.service.least_busy(simulator=False, operational=True, min_num_qubits=min_qubit_num)
+        print(f"Selected backend {self.backend.name}")
+        return self.backend
+
+    def session_active(self) -> bool:
+        """
+                Returns:
+                - active: True if a session is open and accepts jobs. A session whose status cannot
+                  be queried, e.g. because it expired, counts as inactive.
+        """
+        if self._session is None:
+            return False
+        try:
+            status = self._session.status()
+        except Exception as error:
+            print(f"Could not query the session status: {error}")
+            return False
+        return status not in CLOSED_STATUSES
+
+    @property
+    def session(self):
+        """
+                Returns the current session, opening a new one if there is none or it is no longer active.
+        """
+        if not self.session_active():
+            self.renew()
+        return self._session
+
+    def renew(self) -> None:
+        """
+                Closes the current session, if any, and opens a new one on the backend.
+        """
+        if self._session is not None:
+            print("Renewing the session")
+        self._close_session()
+        self._session = self.session_factory(self.select_backend())
+        self.num_sessions += 1
+
+    def estimator(self, shots: Optional[int] = None) -> "ManagedPrimitive":
+        """
+                Returns:
+                - estimator: An Estimator that runs in the managed session.
+        """
+        return ManagedPrimitive(self, "estimator", shots)
+
+    def sampler(self, shots: Optional[int] = None) -> "ManagedPrimitive":
+        """
+                Returns:
+                - sampler: A Sampler that runs in the managed session.
+        """
+        return ManagedPrimitive(self, "sampler", shots)
+
+    def _primitive(self, kind: str, shots: Optional[int]):
+        """
+                Returns the primitive of a kind and number of shots in the current session.
+        """
+        session = self.session
+        key = (kind, shots)
+        if key not in self._primitives:
+            self._primitives[key] = session.estimator(shots) if kind == "estimator" else session.sampler(shots)
+        return self._primitives[key]
+
+    def _close_session(self) -> None:
+        session, self._session = self._session, None
+        self._primitives = {}
+        if session is not None:
+            try:
+                session.close()
+            except Exception as error:
+                # An expired session may refuse to be closed; it is dropped either way.
+                print(f"Could not close the session: {error}")
+
+    def close(self) -> None:
+        """
+                Closes the current session. A later job opens a new one.
+        """
+        self._close_session()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ManagedPrimitive:
+    """
+        An Estimator or Sampler whose jobs run in the session of a SessionManager and are
+        resubmitted in a renewed session if the session expires.
+    """
+    def __init__(self, manager: SessionManager, kind: str, shots: Optional[int] = None):
+        """
+                Parameters:
+                - manager: The session manager.
+                - kind: "estimator" or "sampler".
+                - shots: Default number of shots of the primitive.
+        """
+        self.manager = manager
+        self.kind = kind
+        self.shots = shots
+
+    def run(self, pubs, **kwargs) -> "ManagedJob":
+        """
+                Submits pubs like the run method of EstimatorV2 and SamplerV2.
+
+                Returns:
+                - job: A job whose result is retried in a renewed session if the session expires.
+        """
+        return ManagedJob(self, pubs, kwargs)
+
+
+class ManagedJob:
+    """
+        A job submitted by a ManagedPrimitive. Its submission and its result share one budget of
+        max_renewals session renewals.
+    """
+    def __init__(self, primitive: ManagedPrimitive, pubs, kwargs):
+        self._primitive = primitive
+        self._pubs = pubs
+        self._kwargs = kwargs
+        self._renewals = 0
+        self._job = self._submit()
+
+    def job_id(self) -> str:
+        return self._job.job_id()
+
+    def _submit(self):
+        """
+                Submits the pubs in the current session, renewing the session and resubmitting them
+                if the submission fails because the session is no longer active.
+        """
+        manager = self._primitive.manager
+        while True:
+            try:
+                return manager._primitive(self._primitive.kind, self._primitive.shots).run(self._pubs, **self._kwargs)
+            except Exception as error:
+                self._renew(error)
+
+    def _renew(self, error: Exception) -> None:
+        """
+                Renews the session after a failure, or raises the failure if the session is still
+                active or the renewals of the job are used up.
+        """
+        manager = self._primitive.manager
+        if self._renewals >= manager.max_renewals or manager.session_active():
+            raise error
+        self._renewals += 1
+        manager.renew()
+
+    def result(self):
+        """
+                Returns the result of the job. If the job failed because its session expired, it is
+                resubmitted in a renewed session.
+        """
+        while True:
+            try:
+                return self._job.result()
+            except Exception as error:
+                self._renew(error)
+                self._job = self._submit()
@@ -0,0 +1,113 @@
+# --*-- conding:utf-8 --*--
+# @Time : 10/19/26 5:30 PM
+# @File : shots.py
+
+import math
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+
+class ShotSchedule:
+    """
+        Decides the number of shots per circuit of every VQE iteration and accounts for the shots
+        consumed, optionally within a total shot budget. This base schedule uses a fixed number of
+        shots; the last iterations before the budget is exhausted get the remaining shots.
+    """
+    def __init__(self, shots: int = 200, budget: Optional[int] = None):
+        """
+                Parameters:
+                - shots: Number of shots per circuit.
+                - budget: Optional total number of shots of a run.
+        """
+        self.initial_shots = shots
+        self.budget = budget
+        self.reset()
+
+    def reset(self) -> None:
+        """
+                Resets the schedule for a new run.
+        """
+        self.shots = self.initial_shots
+        self.total_shots = 0
+
+    @property
+    def remaining(self) -> Optional[int]:
+        """
+                Returns the number of shots left in the budget, or None without a budget.
+        """
+        return None if self.budget is None else max(self.budget - self.total_shots, 0)
+
+    def next_shots(self, num_circuits: int) -> int:
+        """
+                Parameters:
+                - num_circuits: Number of parameter vectors evaluated in the next iteration.
+
+                Returns:
+                - shots: Number of shots per circuit of the next iteration, 0 if the budget is exhausted.
+        """
+        if self.budget is None:
+            return self.shots
+        return min(self.shots, self.remaining // num_circuits)
+
+    def update(self, shots: int, energies: np.ndarray, standard_errors: np.ndarray) -> None:
+        """
+                Accounts for an evaluated iteration.
+
+                Parameters:
+                - shots: Number of shots per circuit of the iteration.
+                - energies: The estimated energies of its parameter vectors.
+                - standard_errors: Their estimated standard errors.
+        """
+        self.total_shots += shots * len(energies)
+
+
+class AdaptiveShotSchedule(ShotSchedule):
+    """
+        Starts with few shots and multiplies them by growth whenever the best energy improved by
+        less than its estimated statistical error (times threshold) over the last window
+        iterations, i.e. when the optimizer can no longer resolve its progress from shot noise.
+        Early iterations thereby run cheaply and late ones precisely, up to max_shots per circuit.
+    """
+    def __init__(self, initial_shots: int = 100, max_shots: int = 100000, growth: float = 2.0,
+                 window: int = 5, threshold: float = 1.0, budget: Optional[int] = None):
+        """
+                Parameters:
+                - initial_shots: Number of shots per circuit of the first iterations.
+                - max_shots: Maximum number of shots per circuit.
+                - growth: Factor the shots are multiplied by.
+                - window: Number of iterations the improvement is measured over.
+                - threshold: Multiple of the standard error an improvement must exceed.
+                - budget: Optional total number of shots of a run.
+        """
+        if growth <= 1:
+            raise ValueError(f"growth must be greater than 1, got {growth}.")
+        self.max_shots = max_shots
+        self.growth = growth
+        self.window = window
+        self.threshold = threshold
+        super().__init__(initial_shots, budget)
+
+    def reset(self) -> None:
+        super().reset()
+        self.best_energy = math.inf
+        self.best_error = 0.0
+        self._best_energies = deque(maxlen=self.window + 1)
+
+    def update(self, shots: int, energies: np.ndarray, standard_errors: np.ndarray) -> None:
+        super().update(shots, energies, standard_errors)
+        best = int(np.argmin(energies))
+        if energies[best] < self.best_energy:
+            self.best_energy = float(energies[best])
+            self.best_error = float(standard_errors[best])
+        self._best_energies.append(self.best_energy)
+        if len(self._best_energies) <= self.window:
+            return
+        improvement = self._best_energies[0] - self._best_energies[-1]
+        if improvement < self.threshold * self.best_error and self.shots < self.max_shots:
+            self.shots = min(int(math.ceil(self.shots * self.growth)), self.max_shots)
+            print(f"Improvement {improvement} below the statistical error {self.best_error}, "
+                  f"increasing the shots to {self.shots}")
+            # The next increase needs a full window at the new number of shots.
+            self._best_energies.clear()
@@ -0,0 +1,120 @@
+# --*-- conding:utf-8 --*--
+# @Time : 10/19/26 6:15 PM
+# @File : stopping.py
+
+import math
+import time
+from collections import deque
+from typing import Optional
+
+
+class StoppingRule:
+    """
+        Base class of the early stopping rules of a VQE run. A rule is called with the VQE after
+        every iteration (every COBYLA evaluation or every evaluated batch) and returns the reason
+        to stop, or None to continue. Rules are reset at the start of every run_vqe call.
+    """
+    def reset(self) -> None:
+        """
+                Resets the rule for a new run.
+        """
+
+    def __call__(self, vqe) -> Optional[str]:
+        """
+                Parameters:
+                - vqe: The VQE instance after an iteration.
+
+                Returns:
+                - reason: Why the optimization should stop, or None.
+        """
+        raise NotImplementedError
+
+
+class RelativeImprovement(StoppingRule):
+    """
+        Stops when the best energy improved by less than a relative tolerance over the last
+        window iterations, i.e. when the optimization has reached a plateau.
+    """
+    def __init__(self, window: int = 20, tolerance: float = 1e-3):
+        """
+                Parameters:
+                - window: Number of iterations the improvement is measured over.
+                - tolerance: Minimum improvement relative to the magnitude of the best energy.
+        """
+        self.window = window
+        self.tolerance = tolerance
+        self.reset()
+
+    def reset(self) -> None:
+        self._best_energies = deque(maxlen=self.window + 1)
+
+    def __call__(self, vqe) -> Optional[str]:
+        best_energy = vqe.best_energy
+        self._best_energies.append(best_energy)
+        if len(self._best_energies) <= self.window or math.isinf(best_energy):
+            return None
+        improvement = self._best_energies[0] - best_energy
+        if improvement < self.tolerance * abs(best_energy):
+            return (f"The best energy improved by {improvement} over the last {self.window} iterations, "
+                    f"less than {self.tolerance} relative to {best_energy}.")
+        return None
+
+
+class TargetEnergy(StoppingRule):
+    """
+        Stops when the best energy reaches a target, e.g. a known classical optimum.
+    """
+    def __init__(self, target: float, tolerance: float = 0.0):
+        """
+                Parameters:
+                - target: The target energy.
+                - tolerance: Absolute tolerance above the target that counts as reached.
+        """
+        self.target = target
+        self.tolerance = tolerance
+
+    def __call__(self, vqe) -> Optional[str]:
+        if vqe.best_energy <= self.target + self.tolerance:
+            return f"The best energy {vqe.best_energy} reached the target energy {self.target}."
+        return None
+
+
+class WallClockBudget(StoppingRule):
+    """
+        Stops when a run_vqe call has taken longer than a wall-clock budget.
+    """
+    def __init__(self, seconds: float):
+        """
+                Parameters:
+                - seconds: The budget in seconds, measured from the start of run_vqe.
+        """
+        self.seconds = seconds
+        self.reset()
+
+    def reset(self) -> None:
+        self._start = time.monotonic()
+
+    def __call__(self, vqe) -> Optional[str]:
+        elapsed = time.monotonic() - self._start
+        if elapsed >= self.seconds:
+            return f"The wall-clock budget of {self.seconds} s is exhausted after {elapsed:.1f} s."
+        return None
+
+
+class ShotBudget(StoppingRule):
+    """
+        Stops once a run has consumed a number of shots. Unlike the budget of a ShotSchedule, which
+        caps the shots of every iteration, the rule is checked after an iteration and may be
+        exceeded by its shots; it also applies with fixed shots.
+    """
+    def __init__(self, max_shots: int):
+        """
+                Parameters:
+                - max_shots: The shot budget of the run.
+        """
+        self.max_shots = max_shots
+
+    def __call__(self, vqe) -> Optional[str]:
+        if vqe.total_shots >= self.max_shots:
+            return f"The shot budget of {self.max_shots} shots is exhausted after {vqe.total_shots} shots."
+        return None
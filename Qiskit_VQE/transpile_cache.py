@@ -0,0 +1,124 @@
+# --*-- conding:utf-8 --*--
+# @Time : 10/19/26 12:05 PM
+# @File : transpile_cache.py
+
+import hashlib
+import os
+from typing import Optional
+
+from qiskit import QuantumCircuit, qpy
+from qiskit.circuit.library import get_standard_gate_name_mapping
+from qiskit.transpiler import Target
+
+_STANDARD_OPERATIONS = set(get_standard_gate_name_mapping())
+
+
+def target_fingerprint(target: Target, backend_name: str = "") -> str:
+    """
+        Returns a digest of the structure of a backend target: its qubits and the qubits every
+        operation is supported on. Calibration data is not part of it.
+    """
+    digest = hashlib.sha256(f"{backend_name}|{target.num_qubits}|".encode())
+    for name in sorted(target.operation_names):
+        qargs = target.qargs_for_operation_name(name)
+        qargs = sorted(qargs) if qargs is not None else None
+        digest.update(f"{name}:{qargs}|".encode())
+    return digest.hexdigest()
+
+
+def circuit_fingerprint(circuit: QuantumCircuit) -> str:
+    """
+        Returns a digest of the structure of a circuit, with parameters by name. Non-standard
+        instructions, such as the blocks of library circuits, are expanded into their definitions,
+        so that e.g. ansatzes with different entanglement maps have different digests.
+    """
+    digest = hashlib.sha256()
+    _update_digest(digest, circuit)
+    return digest.hexdigest()
+
+
+def _update_digest(digest, circuit: QuantumCircuit) -> None:
+    digest.update(f"{circuit.num_qubits}/{circuit.num_clbits}|".encode())
+    for instruction in circuit.data:
+        operation = instruction.operation
+        qubits = [circuit.find_bit(qubit).index for qubit in instruction.qubits]
+        clbits = [circuit.find_bit(clbit).index for clbit in instruction.clbits]
+        params = [str(param) for param in operation.params]
+        digest.update(f"{operation.name}{qubits}{clbits}{params}|".encode())
+        if operation.name not in _STANDARD_OPERATIONS and operation.definition is not None:
+            _update_digest(digest, operation.definition)
+
+
+class TranspileCache:
+    """
+        On-disk cache of transpiled (ISA) circuits in QPY format, which keeps the layout of a
+        transpiled circuit. Entries are keyed by the structure of the backend target, the
+        structure of the circuit, whose digest covers the ansatz and its qubit count, and the
+        optimization level. Once more than max_entries circuits are stored, the least recently
+        used ones are evicted; recency is tracked by the file modification times.
+
+        Layouts chosen at high optimization levels also depend on calibration data, which is not
+        part of the key, so a cached circuit may be laid out for an older calibration.
+    """
+    def __init__(self, directory: str, max_entries: int = 32):
+        """
+                Parameters:
+                - directory: Directory of the cache. It is created if necessary.
+                - max_entries: Maximum number of stored circuits.
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, circuit: QuantumCircuit, target: Target, optimization_level: int,
+            backend_name: str = "") -> str:
+        """
+                Returns:
+                - key: The cache key of a circuit transpiled for a target at an optimization level.
+        """
+        parts = [target_fingerprint(target, backend_name), circuit_fingerprint(circuit),
+                 str(optimization_level)]
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[QuantumCircuit]:
+        """
+                Returns:
+                - circuit: The cached circuit of a key, or None if it is not cached.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                circuit = qpy.load(file)[0]
+        except (FileNotFoundError, qpy.QpyError):
+            return None
+        os.utime(path)
+        return circuit
+
+    def put(self, key: str, circuit: QuantumCircuit) -> None:
+        """
+                Stores a circuit and evicts the least recently used circuits beyond max_entries.
+        """
+        path = self._path(key)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as file:
+            qpy.dump(circuit, file)
+        os.replace(temporary_path, path)
+        self._evict()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.qpy")
+
+    def _evict(self) -> None:
+        paths = [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(".qpy")
+        ]
+        if len(paths) <= self.max_entries:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
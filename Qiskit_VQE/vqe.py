@@ -4,13 +4,35 @@
 # @Email : yzhan135@kent.edu
 # @File : vqe.py
 
+import math
+
 import numpy as np
-from qiskit.circuit.library import EfficientSU2
+from qiskit.quantum_info import Statevector
 from scipy.optimize import minimize
-from qiskit_ibm_runtime import Session
-from qiskit_ibm_runtime import EstimatorV2 as Estimator
-from qiskit.primitives import Sampler
-from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager
+
+from .ansatz_factory import AnsatzFactory
+from .checkpoint import Checkpointer
+from .history import OptimizationHistory
+from .optimizers import (
+    CMAES,
+    SPSA,
+    Adam,
+    DifferentialEvolution,
+    ParameterShiftGradientDescent,
+    PopulationOptimizer,
+)
+from .primitives import PrimitiveProvider
+from .sampling import SampledEnergyEstimator
+from .shots import ShotSchedule
+from .transpile_cache import TranspileCache
+from .warm_start import ParameterLibrary
+
+
+class StopOptimization(Exception):
+    """
+        Raised during an iteration to end the optimization early, by an exhausted shot budget or
+        a stopping rule; run_vqe then returns the best results so far.
+    """
 
 
 class VQE:
@@ -20,7 +42,12 @@ class VQE:
         ansatz, sets up the optimization process, and computes the minimum eigenvalue
         of a given Hamiltonian using classical-quantum hybrid optimization.
     """
-    def __init__(self, service, hamiltonian, optimization_level=3, shots=200, min_qubit_num=100, maxiter=20):
+    def __init__(self, service, hamiltonian, optimization_level=3, shots=200, min_qubit_num=100, maxiter=20,
+                 backend=None, estimator=None, sampler=None, optimizer="cobyla", population_size=None,
+                 checkpoint_path=None, checkpoint_interval=10, transpile_cache_dir=None, top_k=6,
+                 history_log_path=None, history_retention=None, estimation="estimator", cvar_alpha=None,
+                 parameter_library_dir=None, sequence=None, warm_start=True, ansatz_factory=None,
+                 seed=None, shot_schedule=None, stopping_rules=None, session_manager=None):
         """
                 Initializes the VQE class with the necessary quantum service, backend, and
                 Hamiltonian information.
@@ -32,39 +59,239 @@ class VQE:
                 - hamiltonian: Pauli terms defining the Hamiltonian.
                 - optimization_level: Integer representing the optimization level for transpiling circuits (default: 3).
                 - shots: Number of shots (repeated measurements) to be performed per circuit execution (default: 1000).
+                - backend: Optional BackendV2 to run on instead of the least busy backend of the service,
+                  e.g. an AerSimulator or a fake backend with a noise model. The service may then be None.
+                - estimator: Optional EstimatorV2 primitive to run with, e.g. a StatevectorEstimator.
+                - sampler: Optional SamplerV2 primitive to measure the optimized state with.
+                - optimizer: "cobyla" (default), "cma_es", "differential_evolution", "spsa",
+                  "gradient_descent", "adam" or a PopulationOptimizer. All but COBYLA evaluate the
+                  parameter vectors of an iteration (a population, the SPSA pair or the parameter-shift
+                  points) in one Estimator pub; maxiter then counts iterations instead of evaluations.
+                - population_size: Population size of population-based optimizers, a default if None.
+                - checkpoint_path: Optional file to checkpoint the optimization state to, so that
+                  run_vqe(resume=True) can continue an interrupted run.
+                - checkpoint_interval: Number of iterations between checkpoints.
+                - transpile_cache_dir: Optional directory of an on-disk cache of transpiled ansatz
+                  circuits, so that runs with the same backend and qubit count skip transpilation.
+                - top_k: Number of best (energy, params) results kept in memory.
+                - history_log_path: Optional path of a binary log that all evaluated (energy, params)
+                  records are streamed to, see :class:`OptimizationHistory`.
+                - history_retention: Number of most recent energies kept in energy_list; all if None.
+                - estimation: "estimator" (default) to estimate energies with an Estimator, or "sampler"
+                  to sample the measured ansatz and evaluate the energy of every shot over the Z masks
+                  of the Hamiltonian, which must be diagonal. The sampler mode also records the best
+                  observed bitstring of every iteration in best_samples.
+                - cvar_alpha: If given, the objective is the Conditional Value-at-Risk of the sampled
+                  energies, the mean of the lowest alpha fraction of the shots, instead of the mean
+                  energy. It implies the sampler estimation mode. The recorded energies are then CVaR
+                  values, and best_samples holds the best sampled energies and bitstrings.
+                - parameter_library_dir: Optional directory of a ParameterLibrary. The best parameters
+                  of every run are written back to it at the end of run_vqe.
+                - sequence: Main chain sequence of the folded peptide, which indexes the library.
+                - warm_start: If True and a library is given, a new run starts from the stored
+                  parameters of the most similar sequence with the same qubit count and ansatz.
+                - ansatz_factory: Optional AnsatzFactory selecting the ansatz family, repetitions,
+                  entanglement and a two-qubit gate/depth budget. EfficientSU2 with its default
+                  settings if None. The cost of the ansatz on the backend is reported on creation,
+                  before any job is submitted.
+                - seed: Optional seed of the random initial point and of the batched optimizers, so
+                  that independent runs, e.g. of a MultiStartVQE, are reproducible.
+                - shot_schedule: Optional ShotSchedule, e.g. an AdaptiveShotSchedule, deciding the shots
+                  of every iteration within an optional total shot budget. The shots are passed with
+                  every pub, as a precision of 1 / sqrt(shots) to Estimators. The optimization stops
+                  when the budget is exhausted. Without a schedule, every pub runs with the shots of
+                  the primitive. The shots consumed per iteration are recorded in shots_per_iteration
+                  either way.
+                - stopping_rules: Optional list of StoppingRule callbacks, e.g. RelativeImprovement,
+                  TargetEnergy, WallClockBudget or ShotBudget, checked after every iteration. The first
+                  rule that fires ends the optimization; its reason is kept in stop_reason.
+                - session_manager: Optional SessionManager whose backend and session are shared with
+                  other runs and measurements instead of opening a session per run.
         """
+        if cvar_alpha is not None:
+            estimation = "sampler"
+        if estimation not in ("estimator", "sampler"):
+            raise ValueError(f"Unknown estimation mode: {estimation}")
+        ansatz_factory = ansatz_factory if ansatz_factory is not None else AnsatzFactory()
+        if ansatz_factory.family == "qaoa" and (optimizer in ("gradient_descent", "adam")
+                                                or isinstance(optimizer, ParameterShiftGradientDescent)):
+            # The parameter-shift rule assumes every parameter enters one rotation, while the
+            # parameters of a QAOA layer are shared by all of its rotations.
+            raise ValueError("Parameter-shift gradient optimizers do not support the qaoa ansatz family.")
         self.service = service
         self.shots = shots
-        self.backend = self._select_backend(min_quits=min_qubit_num)
+        transpile_cache = TranspileCache(transpile_cache_dir) if transpile_cache_dir else None
+        self.provider = PrimitiveProvider(service=service, backend=backend, estimator=estimator,
+                                          sampler=sampler, min_qubit_num=min_qubit_num,
+                                          transpile_cache=transpile_cache, session_manager=session_manager,
+                                          needs=(estimation,))
+        self.backend = self.provider.backend
         self.hamiltonian = hamiltonian
-        self.ansatz = EfficientSU2(self.hamiltonian.num_qubits)
         self.optimization_level = optimization_level
-        self.cost_history_dict = {"prev_vector": None, "iters": 0, "cost_history": []}
-        self.energy_list = []
+        self.ansatz_factory = ansatz_factory
+        self.ansatz, self.ansatz_report = self.ansatz_factory.create(hamiltonian, self.provider, optimization_level)
+        print(self.ansatz_report)
+        self.top_k = top_k
+        self.history_log_path = history_log_path
+        self.history_retention = history_retention
         self.maxiter = maxiter
+        self.optimizer = optimizer
+        self.population_size = population_size
+        self.checkpointer = Checkpointer(checkpoint_path, checkpoint_interval) if checkpoint_path else None
+        self.estimation = estimation
+        self.cvar_alpha = cvar_alpha
+        self.sampled_energy_estimator = SampledEnergyEstimator(hamiltonian) if estimation == "sampler" else None
+        self.parameter_library = ParameterLibrary(parameter_library_dir) if parameter_library_dir else None
+        self.sequence = sequence or ""
+        self.warm_start = warm_start
+        self.seed = seed
+        self.shot_schedule = shot_schedule
+        self.stopping_rules = list(stopping_rules) if stopping_rules else []
+        self.stop_reason = None
+        self.history = None
+        self._reset_run_state()
 
-    def _select_backend(self, min_quits):
+    @property
+    def ansatz_key(self):
+        """
+                Returns the key of the ansatz configuration that parameters are stored under in the
+                parameter library, together with the qubit count.
         """
-                Selects the least busy IBM Quantum backend with enough qubits and returns it.
-                This ensures that the quantum job is processed faster by using a backend with fewer queued jobs.
+        return self.ansatz_factory.config_key(self.ansatz_report.reps)
 
-                Returns:
-                - backend: The IBM Quantum backend with the least busy queue.
+    def _reset_run_state(self):
         """
-        backend = self.service.least_busy(simulator=False, operational=True, min_num_qubits=min_quits)
-        return backend
+                Resets the state of a run: the history with the energy list and the best results,
+                the cost history, the iteration count and the batched optimizer. Every fresh
+                run_vqe starts from it, so that runs of the same instance do not mix their results.
+        """
+        if self.history is not None:
+            self.history.close()
+        self.history = OptimizationHistory(self.ansatz.num_parameters, top_k=self.top_k,
+                                           log_path=self.history_log_path, retention=self.history_retention)
+        self.cost_history_dict = {"prev_vector": None, "iters": 0, "cost_history": self.history.energies}
+        self.num_iterations = 0
+        self._active_optimizer = None
+        self.best_samples = []
+        self.warm_start_entry = None
+        self.shots_per_iteration = []
+        if self.shot_schedule is not None:
+            self.shot_schedule.reset()
 
-    def _generate_pass_manager(self):
+    @property
+    def energy_list(self):
+        """
+                Returns the energies of all evaluations, or of the most recent ones if a history
+                retention is set. The cost history of cost_history_dict is the same list.
+        """
+        return self.history.energies
+
+    @property
+    def best_sample(self):
+        """
+                Returns the lowest-energy (energy, bitstring) shot observed in sampler mode, or None.
+        """
+        return min(self.best_samples) if self.best_samples else None
+
+    @property
+    def total_shots(self):
+        """
+                Returns the number of shots consumed by the run.
+        """
+        return sum(self.shots_per_iteration)
+
+    @property
+    def best_energy(self):
+        """
+                Returns the lowest evaluated energy.
         """
-               Generates a preset pass manager to optimize the quantum circuit for the selected backend.
-               The pass manager optimizes the circuit by reducing gate depth and improving efficiency.
+        return self.history.best_energy
+
+    @property
+    def best_params(self):
+        """
+                Returns the parameters of the lowest evaluated energy, or None before the first evaluation.
+        """
+        return self.history.best_params
+
+    def _transpile_ansatz(self):
+        """
+               Transpiles the ansatz for the selected backend and applies its layout to the Hamiltonian.
+               Without a backend, or if the transpiled ansatz has no layout, both are used as they
+               are, so that the Hamiltonian is not copied. In sampler mode, the ansatz is measured
+               and no Hamiltonian is needed, since the measurements map back to the virtual qubits.
 
                Returns:
-               - pm: The preset pass manager object.
+               - ansatz_isa: The ansatz after pass manager optimizations.
+               - hamiltonian_isa: The Hamiltonian applied with the ansatz layout, or None in sampler mode.
+        """
+        if self.estimation == "sampler":
+            return self.provider.transpile(self.ansatz.measure_all(inplace=False), self.optimization_level), None
+        ansatz_isa = self.ansatz_report.isa_circuit
+        if ansatz_isa is None:
+            ansatz_isa = self.provider.transpile(self.ansatz, self.optimization_level)
+        if ansatz_isa.layout is None:
+            return ansatz_isa, self.hamiltonian
+        hamiltonian_isa = self.hamiltonian.apply_layout(layout=ansatz_isa.layout)
+        return ansatz_isa, hamiltonian_isa
+
+    def _initial_point(self):
+        """
+                Returns:
+                - x0: The stored parameters of the most similar peptide if warm starts are enabled
+                  and the library has usable parameters, random parameters otherwise.
+        """
+        if self.parameter_library is not None and self.warm_start:
+            entry = self.parameter_library.nearest(self.sequence, self.hamiltonian.num_qubits,
+                                                   self.ansatz_key)
+            if entry is not None:
+                print(f"Warm start from the parameters of {entry['sequence']} "
+                      f"(similarity {entry['similarity']:.2f}, energy {entry['energy']})")
+                self.warm_start_entry = entry
+                return entry["params"]
+        if self.seed is not None:
+            return np.random.default_rng(self.seed).random(self.ansatz.num_parameters)
+        return np.random.random(self.ansatz.num_parameters)
+
+    def _estimate_energies(self, population, ansatz_isa, hamiltonian_isa, estimator):
         """
-        target = self.backend.target
-        pm = generate_preset_pass_manager(target=target, optimization_level=self.optimization_level)
-        return pm
+                Estimates the energies of an array of parameter vectors with a single pub, whose
+                parameter values form a 2-D array. With an Estimator, they are broadcast against the
+                Hamiltonian. With a Sampler, the energy of every shot is evaluated over the Z masks of
+                the Hamiltonian, the mean or CVaR of the shot energies is returned and the best shot of
+                the pub is recorded in best_samples. Every call is one iteration, whose shots are
+                taken from the shot schedule and recorded in shots_per_iteration.
+
+                Returns:
+                - energies: Array of the estimated energy of every parameter vector.
+
+                Raises:
+                - StopOptimization: If the shot budget of the schedule is exhausted.
+        """
+        shots = None
+        if self.shot_schedule is not None:
+            shots = self.shot_schedule.next_shots(len(population))
+            if shots <= 0:
+                raise StopOptimization(f"The shot budget of {self.shot_schedule.budget} shots is exhausted.")
+
+        if self.estimation == "sampler":
+            pub = (ansatz_isa, population) if shots is None else (ansatz_isa, population, shots)
+            result = estimator.run([pub]).result()
+            energies, errors, best_samples = self.sampled_energy_estimator.evaluate(result[0].data.meas,
+                                                                                    self.cvar_alpha)
+            self.best_samples.append(min(best_samples))
+        else:
+            pub = (ansatz_isa, hamiltonian_isa, population)
+            if shots is not None:
+                pub += (1 / math.sqrt(shots),)
+            result = estimator.run(pubs=[pub]).result()
+            energies = np.asarray(result[0].data.evs, dtype=float).reshape(len(population))
+            errors = np.asarray(result[0].data.stds, dtype=float).reshape(len(population))
+
+        self.shots_per_iteration.append((shots if shots is not None else self.shots) * len(population))
+        if self.shot_schedule is not None:
+            self.shot_schedule.update(shots, energies, errors)
+        return energies
 
     def cost_func(self, params, ansatz_isa, hamiltonian_isa, estimator):
         """
@@ -76,65 +303,220 @@ class VQE:
                 - params: Array of ansatz parameters to be optimized.
                 - ansatz_isa: Quantum circuit representing the ansatz after pass manager optimizations.
                 - hamiltonian_isa: The Hamiltonian applied with the ansatz layout.
-                - estimator: The EstimatorV2 object used to estimate the energy from the quantum circuit.
+                - estimator: The EstimatorV2 object used to estimate the energy from the quantum circuit,
+                  or the SamplerV2 object in sampler mode.
 
                 Returns:
                 - energy: The estimated energy value for the given parameters.
         """
-        pub = (ansatz_isa, [hamiltonian_isa], [params])
-        result = estimator.run(pubs=[pub]).result()
-        energy = result[0].data.evs[0]
+        energy = self._estimate_energies(np.array([params], dtype=float), ansatz_isa, hamiltonian_isa, estimator)[0]
 
-        self.energy_list.append(energy)
+        self._record_energy(energy, params)
+        print(f"Iters. done: {self.cost_history_dict['iters']} [Current cost: {energy}, "
+              f"shots: {self.shots_per_iteration[-1]}]")
+        self._after_iteration()
+
+        return energy
+
+    def evaluate_population(self, population, ansatz_isa, hamiltonian_isa, estimator):
+        """
+                Estimates the energies of a population of parameter vectors with a single pub, whose
+                parameter values form a 2-D array, so that a whole population costs one round trip.
+
+                Parameters:
+                - population: Array of parameter vectors of shape (population size, number of parameters).
+                - ansatz_isa: Quantum circuit representing the ansatz after pass manager optimizations.
+                - hamiltonian_isa: The Hamiltonian applied with the ansatz layout.
+                - estimator: The EstimatorV2 object used to estimate the energies, or the SamplerV2
+                  object in sampler mode.
+
+                Returns:
+                - energies: Array of the estimated energy of every parameter vector.
+        """
+        population = np.array(population, dtype=float, ndmin=2)
+        energies = self._estimate_energies(population, ansatz_isa, hamiltonian_isa, estimator)
+
+        for energy, params in zip(energies, population):
+            self._record_energy(energy, params)
+        print(f"Iters. done: {self.cost_history_dict['iters']} "
+              f"[Population of {len(population)}, best cost: {energies.min()}, "
+              f"shots: {self.shots_per_iteration[-1]}]")
+
+        return energies
+
+    def _record_energy(self, energy, params):
+        """
+                Records the energy of an evaluated parameter vector in the optimization history.
+        """
+        self.history.record(energy, params)
 
         self.cost_history_dict["iters"] += 1
         self.cost_history_dict["prev_vector"] = params
-        self.cost_history_dict["cost_history"].append(energy)
-        print(f"Iters. done: {self.cost_history_dict['iters']} [Current cost: {energy}]")
 
-        return energy
+    def _after_iteration(self):
+        """
+                Called after every optimizer iteration, i.e. after every COBYLA evaluation or every
+                evaluated batch. Writes a checkpoint when one is due and checks the stopping rules.
 
-    def get_probability_distribution(self, optimized_params) -> 'Dict':
+                Raises:
+                - StopOptimization: If a stopping rule fires.
+        """
+        self.num_iterations += 1
+        if self.checkpointer is not None and self.checkpointer.is_due(self.num_iterations):
+            self.checkpointer.save(self._checkpoint_state())
+        for rule in self.stopping_rules:
+            reason = rule(self)
+            if reason is not None:
+                raise StopOptimization(reason)
 
-        circuit = self.ansatz.assign_parameters(optimized_params)
-        circuit.measure_all()
+    def _checkpoint_state(self):
+        """
+                Returns:
+                - state: Everything needed to resume the optimization: the history with the best
+                  results, the state of a batched optimizer and the NumPy random state.
+        """
+        return {
+            "num_iterations": self.num_iterations,
+            "history": self.history,
+            "iters": self.cost_history_dict["iters"],
+            "prev_vector": self.cost_history_dict["prev_vector"],
+            "optimizer": self._active_optimizer,
+            "best_samples": self.best_samples,
+            "shot_schedule": self.shot_schedule,
+            "shots_per_iteration": self.shots_per_iteration,
+            "random_state": np.random.get_state(),
+        }
 
-        sampler = Sampler()
+    def _restore_checkpoint_state(self, state):
+        """
+                Restores the state returned by :meth:`_checkpoint_state`.
+        """
+        self.num_iterations = state["num_iterations"]
+        self.history.close()
+        self.history = state["history"]
+        self.cost_history_dict = {"prev_vector": state["prev_vector"], "iters": state["iters"],
+                                  "cost_history": self.history.energies}
+        self._active_optimizer = state["optimizer"]
+        self.best_samples = state["best_samples"]
+        self.shot_schedule = state.get("shot_schedule", self.shot_schedule)
+        self.shots_per_iteration = state.get("shots_per_iteration", [])
+        np.random.set_state(state["random_state"])
+
+    def _population_optimizer(self):
+        """
+                Returns:
+                - optimizer: The batched optimizer selected by the optimizer argument.
+        """
+        if isinstance(self.optimizer, PopulationOptimizer):
+            return self.optimizer
+        if self.optimizer == "cma_es":
+            return CMAES(population_size=self.population_size, seed=self.seed)
+        if self.optimizer == "differential_evolution":
+            return DifferentialEvolution(population_size=self.population_size or 20, seed=self.seed)
+        if self.optimizer == "spsa":
+            return SPSA(seed=self.seed)
+        if self.optimizer == "gradient_descent":
+            return ParameterShiftGradientDescent(seed=self.seed)
+        if self.optimizer == "adam":
+            return Adam(seed=self.seed)
+        raise ValueError(f"Unknown optimizer: {self.optimizer}")
 
-        job_result = sampler.run([circuit]).result()
+    def get_probability_distribution(self, optimized_params) -> 'Dict':
+        """
+                Returns the probability distribution of the bitstrings measured with the optimized
+                parameters. Without a configured sampler or backend, the probabilities are computed
+                exactly from the statevector; otherwise they are estimated from self.shots shots
+                of the provider's sampler.
+        """
+        if self.provider.exact_sampling:
+            return Statevector(self.ansatz.assign_parameters(optimized_params)).probabilities_dict()
 
-        # print(f'job result:{job_result}')
+        circuit = self.ansatz.measure_all(inplace=False)
+        isa_circuit = self.provider.transpile(circuit, optimization_level=1)
 
-        data = [q.binary_probabilities() for q in job_result.quasi_dists]
+        with self.provider.sampler(self.shots) as sampler:
+            job_result = sampler.run([(isa_circuit, optimized_params)], shots=self.shots).result()
 
-        measure_result = data[0]
+        counts = job_result[0].data.meas.get_counts()
+        total_shots = sum(counts.values())
+        measure_result = {key: value / total_shots for key, value in counts.items()}
 
         return measure_result
 
 
-    def run_vqe(self):
+    def run_vqe(self, resume=False):
         """
                 Executes the VQE algorithm. This method:
                 1. Generates the optimized quantum circuit using the pass manager.
                 2. Prepares the Hamiltonian for computation.
-                3. Initializes the optimization process using COBYLA.
+                3. Initializes the optimization process using COBYLA or a batched optimizer.
                 4. Returns the result of the optimization (minimum eigenvalue of the Hamiltonian).
 
+                If a checkpoint path is set, the state is checkpointed periodically, at the end and
+                when the run fails, e.g. because the session expired. If the shot budget is exhausted or
+                a stopping rule fires, the optimization stops, the session is closed and the best
+                parameters so far are returned.
+
+                Parameters:
+                - resume: If True, continues from the last checkpoint if there is one. Batched
+                  optimizers continue from their exact state; COBYLA, whose internal state cannot be
+                  restored, restarts from the best parameters for the remaining iterations.
+
                 Returns:
                 - res: The result of the classical optimizer containing the optimized parameters and minimum energy value.
         """
-        pm = self._generate_pass_manager()
-        ansatz_isa = pm.run(self.ansatz)
-        hamiltonian_isa = self.hamiltonian.apply_layout(layout=ansatz_isa.layout)
-
-        x0 = np.random.random(self.ansatz.num_parameters)
+        ansatz_isa, hamiltonian_isa = self._transpile_ansatz()
 
-        with Session(backend=self.backend) as session:
-            estimator = Estimator(mode=session)
-            estimator.options.default_shots = self.shots
+        state = self.checkpointer.load() if resume and self.checkpointer is not None else None
+        self.stop_reason = None
+        for rule in self.stopping_rules:
+            rule.reset()
+        if state is None:
+            self._reset_run_state()
+        else:
+            self._restore_checkpoint_state(state)
+            print(f"Resuming from iteration {self.num_iterations} of {self.checkpointer.path}")
+            x0 = self.best_params
+        if state is None or self.best_params is None:
+            x0 = self._initial_point()
 
-            res = minimize(self.cost_func, x0, args=(ansatz_isa, hamiltonian_isa, estimator), method="cobyla", options={'maxiter': self.maxiter}) #type
+        try:
+            if self.estimation == "sampler":
+                primitive = self.provider.sampler(self.shots)
+            else:
+                primitive = self.provider.estimator(self.shots)
+            with primitive as estimator:
+                try:
+                    if self.optimizer == "cobyla":
+                        remaining = self.maxiter - (self.num_iterations if state is not None else 0)
+                        optimized_params = self.best_params
+                        if remaining > 0:
+                            res = minimize(self.cost_func, x0, args=(ansatz_isa, hamiltonian_isa, estimator), method="cobyla", options={'maxiter': remaining}) #type
+                            optimized_params = res.x
+                    else:
+                        resume_optimizer = state is not None and self._active_optimizer is not None
+                        if not resume_optimizer:
+                            self._active_optimizer = self._population_optimizer()
+                        res = self._active_optimizer.minimize(
+                            lambda population: self.evaluate_population(population, ansatz_isa, hamiltonian_isa, estimator),
+                            x0, maxiter=self.maxiter, callback=lambda optimizer: self._after_iteration(),
+                            resume=resume_optimizer)
+                        optimized_params = res.x
+                except StopOptimization as stop:
+                    self.stop_reason = str(stop)
+                    print(f"Optimization stopped after {self.num_iterations} iterations: {stop}")
+                    optimized_params = self.best_params if self.best_params is not None else x0
+        except BaseException:
+            if self.checkpointer is not None:
+                self.checkpointer.save(self._checkpoint_state())
+            raise
+        if self.checkpointer is not None:
+            self.checkpointer.save(self._checkpoint_state())
+        self.history.close()
+        if self.parameter_library is not None and self.best_params is not None:
+            self.parameter_library.add(self.sequence, self.hamiltonian.num_qubits,
+                                       self.ansatz_key, self.best_params, self.best_energy)
 
         # prob_distribution = self.get_probability_distribution(res.x)
 
-        return self.energy_list, res.x, self.ansatz
\ No newline at end of file
+        return self.energy_list, optimized_params, self.ansatz
@@ -1,26 +1,24 @@
 # --*-- conding:utf-8 --*--
-# @Time : 12/9/24 1:49 PM
+# @Time : 12/9/24 1:49 PM
 # @Author : Yuqi Zhang
 # @Email : yzhan135@kent.edu
 # @File : vqe_top5.py
 
-import numpy as np
-from qiskit.circuit.library import EfficientSU2
-from scipy.optimize import minimize
-from qiskit_ibm_runtime import Session
-from qiskit_ibm_runtime import EstimatorV2 as Estimator
-from qiskit.primitives import Sampler
-from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager
+from .vqe import VQE
 
 
-class VQE5:
+class VQE5(VQE):
     """
-        Variational Quantum Eigensolver (VQE) class for performing quantum simulations
-        using Qiskit and the IBM Quantum runtime environment. It defines the quantum
-        ansatz, sets up the optimization process, and computes the minimum eigenvalue
-        of a given Hamiltonian using classical-quantum hybrid optimization.
+        Variational Quantum Eigensolver (VQE) that additionally returns the best parameter sets
+        found during the optimization, kept by its bounded :class:`OptimizationHistory`, so that
+        they can be measured afterwards. Backends and primitives are selected as in :class:`VQE`.
     """
-    def __init__(self, service, hamiltonian, optimization_level=3, shots=200, min_qubit_num=100, maxiter=20):
+    def __init__(self, service, hamiltonian, optimization_level=3, shots=200, min_qubit_num=100, maxiter=20,
+                 backend=None, estimator=None, sampler=None, optimizer="cobyla", population_size=None,
+                 checkpoint_path=None, checkpoint_interval=10, transpile_cache_dir=None, top_k=6,
+                 history_log_path=None, history_retention=None, estimation="estimator", cvar_alpha=None,
+                 parameter_library_dir=None, sequence=None, warm_start=True, ansatz_factory=None,
+                 seed=None, shot_schedule=None, stopping_rules=None, session_manager=None):
         """
                 Initializes the VQE class with the necessary quantum service, backend, and
                 Hamiltonian information.
@@ -30,113 +28,62 @@ class VQE5:
                 - hamiltonian: Pauli terms defining the Hamiltonian.
                 - optimization_level: Integer representing the optimization level for transpiling circuits (default: 3).
                 - shots: Number of shots (repeated measurements) to be performed per circuit execution (default: 1000).
+                - backend: Optional BackendV2 to run on instead of the least busy backend of the service.
+                - estimator: Optional EstimatorV2 primitive to run with.
+                - sampler: Optional SamplerV2 primitive to measure the optimized state with.
+                - optimizer: "cobyla", "cma_es", "differential_evolution", "spsa", "gradient_descent",
+                  "adam" or a PopulationOptimizer.
+                - population_size: Population size of population-based optimizers, a default if None.
+                - checkpoint_path: Optional file to checkpoint the optimization state to.
+                - checkpoint_interval: Number of iterations between checkpoints.
+                - transpile_cache_dir: Optional directory of an on-disk cache of transpiled ansatz circuits.
+                - top_k: Number of best (energy, params) results kept and returned.
+                - history_log_path: Optional path of a binary log of all evaluated (energy, params) records.
+                - history_retention: Number of most recent energies kept in energy_list; all if None.
+                - estimation: "estimator" or "sampler" to estimate energies from sampled bitstrings.
+                - cvar_alpha: If given, the CVaR of the sampled energies at this alpha is optimized.
+                - parameter_library_dir: Optional directory of a ParameterLibrary to warm start from
+                  and to write the best parameters back to.
+                - sequence: Main chain sequence of the folded peptide, which indexes the library.
+                - warm_start: If True, a new run starts from the parameters of the most similar peptide.
+                - ansatz_factory: Optional AnsatzFactory selecting the ansatz and its budget.
+                - seed: Optional seed of the initial point and of the batched optimizers.
+                - shot_schedule: Optional ShotSchedule deciding the shots of every iteration within a
+                  total shot budget.
+                - stopping_rules: Optional list of StoppingRule callbacks checked after every iteration.
+                - session_manager: Optional SessionManager whose backend and session are shared across runs.
         """
-        self.service = service
-        self.shots = shots
-        self.backend = self._select_backend(min_quits=min_qubit_num)
-        self.hamiltonian = hamiltonian
-        self.ansatz = EfficientSU2(self.hamiltonian.num_qubits)
-        self.optimization_level = optimization_level
-        self.cost_history_dict = {"prev_vector": None, "iters": 0, "cost_history": []}
-        self.energy_list = []
-        self.maxiter = maxiter
-        self.iteration_results = []
-
-    def _select_backend(self, min_quits):
-        """
-                Selects the least busy IBM Quantum backend with enough qubits and returns it.
-                This ensures that the quantum job is processed faster by using a backend with fewer queued jobs.
-
-                Returns:
-                - backend: The IBM Quantum backend with the least busy queue.
-        """
-        backend = self.service.least_busy(simulator=False, operational=True, min_num_qubits=min_quits)
-        return backend
-
-    def _generate_pass_manager(self):
-        """
-               Generates a preset pass manager to optimize the quantum circuit for the selected backend.
-               The pass manager optimizes the circuit by reducing gate depth and improving efficiency.
-
-               Returns:
-               - pm: The preset pass manager object.
-        """
-        target = self.backend.target
-        pm = generate_preset_pass_manager(target=target, optimization_level=self.optimization_level)
-        return pm
-
-    def cost_func(self, params, ansatz_isa, hamiltonian_isa, estimator):
-        """
-                The cost function for the VQE optimization. This function estimates the energy
-                for a given set of parameters by executing the ansatz circuit and measuring
-                the energy expectation value of the Hamiltonian.
-
-                Parameters:
-                - params: Array of ansatz parameters to be optimized.
-                - ansatz_isa: Quantum circuit representing the ansatz after pass manager optimizations.
-                - hamiltonian_isa: The Hamiltonian applied with the ansatz layout.
-                - estimator: The EstimatorV2 object used to estimate the energy from the quantum circuit.
-
-                Returns:
-                - energy: The estimated energy value for the given parameters.
-        """
-        pub = (ansatz_isa, [hamiltonian_isa], [params])
-        result = estimator.run(pubs=[pub]).result()
-        energy = result[0].data.evs[0]
-
-        self.energy_list.append(energy)
-        self.iteration_results.append((energy, params))
-
-        self.cost_history_dict["iters"] += 1
-        self.cost_history_dict["prev_vector"] = params
-        self.cost_history_dict["cost_history"].append(energy)
-        print(f"Iters. done: {self.cost_history_dict['iters']} [Current cost: {energy}]")
-
-        return energy
-
-    def get_probability_distribution(self, optimized_params) -> 'Dict':
-
-        circuit = self.ansatz.assign_parameters(optimized_params)
-        circuit.measure_all()
-
-        sampler = Sampler()
-
-        job_result = sampler.run([circuit]).result()
-
-        data = [q.binary_probabilities() for q in job_result.quasi_dists]
-
-        measure_result = data[0]
-
-        return measure_result
-
-    def run_vqe(self):
+        super().__init__(service, hamiltonian, optimization_level=optimization_level, shots=shots,
+                         min_qubit_num=min_qubit_num, maxiter=maxiter, backend=backend,
+                         estimator=estimator, sampler=sampler, optimizer=optimizer,
+                         population_size=population_size, checkpoint_path=checkpoint_path,
+                         checkpoint_interval=checkpoint_interval, transpile_cache_dir=transpile_cache_dir,
+                         top_k=top_k, history_log_path=history_log_path,
+                         history_retention=history_retention, estimation=estimation,
+                         cvar_alpha=cvar_alpha, parameter_library_dir=parameter_library_dir,
+                         sequence=sequence, warm_start=warm_start, ansatz_factory=ansatz_factory,
+                         seed=seed, shot_schedule=shot_schedule, stopping_rules=stopping_rules,
+                         session_manager=session_manager)
+
+    def run_vqe(self, resume=False):
         """
                 Executes the VQE algorithm. This method:
                 1. Generates the optimized quantum circuit using the pass manager.
                 2. Prepares the Hamiltonian for computation.
-                3. Initializes the optimization process using COBYLA.
+                3. Initializes the optimization process using COBYLA or a batched optimizer.
                 4. Returns the result of the optimization (minimum eigenvalue of the Hamiltonian).
 
+                Parameters:
+                - resume: If True, continues from the last checkpoint if there is one, see :meth:`VQE.run_vqe`.
+
                 Returns:
                 - energy_list: The list of all observed energies during optimization.
                 - res.x: The optimized parameters found by the classical optimizer.
                 - self.ansatz: The ansatz circuit used.
-                - top_5_results: A list of the top 5 (energy, params) results from all iterations.
+                - top_5_results: A list of the top_k (6 by default) (energy, params) results from all iterations.
         """
-        pm = self._generate_pass_manager()
-        ansatz_isa = pm.run(self.ansatz)
-        hamiltonian_isa = self.hamiltonian.apply_layout(layout=ansatz_isa.layout)
-
-        x0 = np.random.random(self.ansatz.num_parameters)
-
-        with Session(backend=self.backend) as session:
-            estimator = Estimator(mode=session)
-            estimator.options.default_shots = self.shots
-
-            res = minimize(self.cost_func, x0, args=(ansatz_isa, hamiltonian_isa, estimator),
-                           method="cobyla", options={'maxiter': self.maxiter})
+        energy_list, optimized_params, ansatz = super().run_vqe(resume=resume)
 
-        sorted_results = sorted(self.iteration_results, key=lambda x: x[0])
-        top_6_results = sorted_results[:6]
+        top_6_results = self.history.top()
 
-        return self.energy_list, res.x, self.ansatz, top_6_results
\ No newline at end of file
+        return energy_list, optimized_params, ansatz, top_6_results
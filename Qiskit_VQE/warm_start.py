@@ -0,0 +1,134 @@
+# --*-- conding:utf-8 --*--
+# @Time : 10/19/26 3:05 PM
+# @File : warm_start.py
+
+import difflib
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+INDEX_NAME = "index.json"
+
+
+def sequence_similarity(sequence_a: str, sequence_b: str, length_weight: float = 0.5) -> float:
+    """
+        Scores the similarity of two amino acid sequences as the ratio of matching characters of
+        their best alignment (difflib), penalized by their relative length difference.
+
+        Parameters:
+        - sequence_a: A main chain sequence.
+        - sequence_b: Another main chain sequence.
+        - length_weight: Weight of the relative length difference.
+
+        Returns:
+        - similarity: 1 for equal sequences, lower for less similar ones.
+    """
+    if not sequence_a and not sequence_b:
+        return 1.0
+    ratio = difflib.SequenceMatcher(None, sequence_a, sequence_b).ratio()
+    length_difference = abs(len(sequence_a) - len(sequence_b)) / max(len(sequence_a), len(sequence_b))
+    return ratio - length_weight * length_difference
+
+
+class ParameterLibrary:
+    """
+        Persistent library of optimized ansatz parameters, so that new VQE runs can start from the
+        solution of the most similar peptide folded before instead of random parameters.
+
+        Parameters are only interchangeable between circuits of the same structure, so entries are
+        indexed by qubit count and ansatz configuration (a structural digest of the ansatz
+        circuit), and ranked by :func:`sequence_similarity` within such a group. The library is a
+        directory with a JSON index and one .npy file of parameters per entry; every sequence keeps
+        the lowest-energy parameters stored for it.
+    """
+    def __init__(self, directory: str, length_weight: float = 0.5):
+        """
+                Parameters:
+                - directory: Directory of the library. It is created if necessary.
+                - length_weight: Weight of the length difference in the sequence similarity.
+        """
+        self.directory = directory
+        self.length_weight = length_weight
+        os.makedirs(directory, exist_ok=True)
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """
+                Returns:
+                - entries: The index entries of all stored parameter sets.
+        """
+        path = os.path.join(self.directory, INDEX_NAME)
+        if not os.path.exists(path):
+            return []
+        with open(path) as file:
+            return json.load(file)
+
+    def nearest(self, sequence: str, num_qubits: int, ansatz_key: str,
+                min_similarity: float = 0.0) -> Optional[Dict[str, Any]]:
+        """
+                Finds the stored parameters of the most similar sequence for the same qubit count
+                and ansatz. Ties are broken by the lower energy.
+
+                Parameters:
+                - sequence: Main chain sequence of the new run.
+                - num_qubits: Number of qubits of its Hamiltonian.
+                - ansatz_key: Ansatz configuration, e.g. from AnsatzFactory.config_key.
+                - min_similarity: Minimum similarity of a usable entry.
+
+                Returns:
+                - entry: The index entry with its parameters under "params" and its similarity under
+                  "similarity", or None if there is no usable entry.
+        """
+        best, best_rank = None, None
+        for entry in self.entries():
+            if entry["num_qubits"] != num_qubits or entry["ansatz"] != ansatz_key:
+                continue
+            similarity = sequence_similarity(sequence, entry["sequence"], self.length_weight)
+            rank = (similarity, -entry["energy"])
+            if similarity >= min_similarity and (best_rank is None or rank > best_rank):
+                best, best_rank = entry, rank
+        if best is None:
+            return None
+        best = dict(best, similarity=best_rank[0])
+        best["params"] = np.load(os.path.join(self.directory, best["file"]))
+        return best
+
+    def add(self, sequence: str, num_qubits: int, ansatz_key: str, params: np.ndarray,
+            energy: float) -> bool:
+        """
+                Stores optimized parameters, unless parameters with a lower energy are already
+                stored for the same sequence, qubit count and ansatz.
+
+                Parameters:
+                - sequence: Main chain sequence.
+                - num_qubits: Number of qubits of its Hamiltonian.
+                - ansatz_key: Ansatz configuration, e.g. from AnsatzFactory.config_key.
+                - params: The optimized parameters.
+                - energy: Their energy.
+
+                Returns:
+                - stored: True if the parameters were stored.
+        """
+        entry_id = hashlib.sha256(f"{sequence}|{num_qubits}|{ansatz_key}".encode()).hexdigest()[:16]
+        entries = self.entries()
+        existing = [entry for entry in entries if entry["id"] == entry_id]
+        if existing and existing[0]["energy"] <= energy:
+            return False
+        entry = {
+            "id": entry_id,
+            "sequence": sequence,
+            "num_qubits": num_qubits,
+            "ansatz": ansatz_key,
+            "energy": float(energy),
+            "file": f"{entry_id}.npy",
+        }
+        np.save(os.path.join(self.directory, entry["file"]), np.asarray(params, dtype=float))
+        entries = [other for other in entries if other["id"] != entry_id] + [entry]
+        path = os.path.join(self.directory, INDEX_NAME)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(entries, file, indent=2)
+        os.replace(temporary_path, path)
+        return True